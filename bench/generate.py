@@ -0,0 +1,216 @@
+# bench/generate.py
+"""Generator syntetycznej bazy do testów wydajności.
+
+    python -m bench.generate bench.db --perfumes 5000 --orders 60000 --items 200000 --seed 1
+
+Ta sama wartość ``--seed`` daje zawsze tę samą bazę. Dane trafiają do bazy
+wstawieniami hurtowymi; liczniki perfum, indeksy wyszukiwania i słownik nut
+uzupełniają te same triggery i funkcje co w aplikacji.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+BRANDS = [
+    "Chanel", "Dior", "Guerlain", "Hermès", "Tom Ford", "Creed", "Amouage", "Byredo",
+    "Le Labo", "Maison Francis Kurkdjian", "Serge Lutens", "Xerjoff", "Parfums de Marly",
+    "Diptyque", "Frédéric Malle", "Kilian", "Nishane", "Initio", "Memo", "Penhaligon's",
+    "Acqua di Parma", "Yves Saint Laurent", "Giorgio Armani", "Prada", "Lattafa",
+]
+NAME_WORDS = [
+    "Noir", "Oud", "Rose", "Ambre", "Santal", "Vanille", "Cuir", "Musc", "Iris", "Bois",
+    "Nuit", "Soleil", "Velours", "Encens", "Tabac", "Fleur", "Absolu", "Intense", "Elixir",
+    "Royal", "Sauvage", "Mystère", "Lumière", "Impérial", "Ombre", "Jardin", "Éclat",
+]
+NOTES = [
+    "bergamota", "cytryna", "mandarynka", "grejpfrut", "różowy pieprz", "kardamon",
+    "szafran", "lawenda", "neroli", "jaśmin", "róża", "irys", "tuberoza", "fiołek",
+    "kwiat pomarańczy", "ylang-ylang", "cynamon", "gałka muszkatołowa", "kadzidło",
+    "paczula", "wetiwer", "drzewo sandałowe", "cedr", "oud", "skóra", "tytoń", "wanilia",
+    "tonka", "bursztyn", "piżmo", "ambroksan", "labdanum", "benzoes", "mech dębowy",
+    "kawa", "kakao", "miód", "rum", "śliwka", "wiśnia", "brzoskwinia", "ananas",
+]
+FIRST_NAMES = [
+    "Anna", "Katarzyna", "Małgorzata", "Agnieszka", "Magdalena", "Joanna", "Ewa", "Zofia",
+    "Piotr", "Krzysztof", "Tomasz", "Paweł", "Michał", "Łukasz", "Jakub", "Mateusz",
+]
+LAST_NAMES = [
+    "Nowak", "Kowalska", "Wiśniewski", "Wójcik", "Kowalczyk", "Kamińska", "Lewandowski",
+    "Zielińska", "Szymański", "Woźniak", "Dąbrowska", "Kozłowski", "Jankowska", "Mazur",
+]
+SHIPPING = [12.0, 10.0, 0.0]
+ML_OPTIONS = [3, 5, 10, 15, 20, 30]
+VIAL_COST = 4.0
+
+FIRST_SALE_DAY = date(2023, 1, 1)  # stała data – ta sama baza niezależnie od dnia uruchomienia
+
+CHUNK = 10000
+
+
+def _perfumes(rng, count):
+    for pid in range(1, count + 1):
+        notes = rng.sample(NOTES, 9)
+        gender = rng.choice(["is_feminine", "is_masculine", "is_unisex"])
+        yield {
+            "id": pid,
+            "status": "Dostępny" if rng.random() < 0.7 else "Niedostępny",
+            "brand": rng.choice(BRANDS),
+            "name": " ".join(rng.sample(NAME_WORDS, rng.randint(1, 3))) + f" {pid}",
+            "to_decant": float(rng.choice([50, 75, 100, 100, 200])),
+            "price_per_ml": round(rng.uniform(1.5, 25.0), 2),
+            "purchase_price": round(rng.uniform(150, 1500), 2),
+            "fragrantica_url": f"https://www.fragrantica.pl/perfumy/{pid}.html",
+            gender: True,
+            "season_spring": rng.random() < 0.5,
+            "season_summer": rng.random() < 0.5,
+            "season_autumn": rng.random() < 0.5,
+            "season_winter": rng.random() < 0.5,
+            "top_notes": ", ".join(notes[:3]),
+            "heart_notes": ", ".join(notes[3:6]),
+            "base_notes": ", ".join(notes[6:]),
+            "is_split": rng.random() < 0.2,
+        }
+
+
+def _order(rng, oid, first_day, days):
+    from models.order import Order
+    from models.search_index import order_search_text, fold_text
+
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    progress = rng.randint(0, 6)  # ile kroków realizacji za zamówieniem
+    paid = progress >= 2
+    order = Order(
+        id=oid,
+        name=f"{first} {last} {oid}",
+        first_name=first if rng.random() < 0.6 else None,
+        last_name=last if rng.random() < 0.6 else None,
+        email=f"{fold_text(first)}.{fold_text(last)}{oid}@example.pl" if rng.random() < 0.5 else None,
+        phone=f"{rng.randint(500, 899)} {rng.randint(100, 999)} {rng.randint(100, 999)}"
+        if rng.random() < 0.5 else None,
+        shipping=rng.choice(SHIPPING),
+        sent_message=progress >= 1,
+        received_money=paid,
+        generated_label=progress >= 3,
+        packed=progress >= 4,
+        sent=progress >= 5,
+        confirmation_obtained=progress >= 6,
+        sale_date=first_day + timedelta(days=rng.randrange(days)) if paid else None,
+        notes="",
+        is_split=False,
+    )
+    order.confirmation_date = order.sale_date if order.confirmation_obtained else None
+    order.stage = order.compute_stage()
+    order.search_text = order_search_text(order)
+    return order
+
+
+def _order_items(rng, order_count, item_count, perfumes):
+    """Pozycje rozdzielone losowo między zamówienia (każde ma co najmniej jedną)."""
+    owners = list(range(1, order_count + 1)) + [
+        rng.randint(1, order_count) for _ in range(item_count - order_count)
+    ]
+    owners.sort()
+    for item_id, oid in enumerate(owners, 1):
+        pid, price = perfumes[rng.randrange(len(perfumes))]
+        qty = float(rng.choice(ML_OPTIONS))
+        gratis = rng.random() < 0.05
+        price = 0.0 if gratis else price
+        yield {
+            "id": item_id,
+            "order_id": oid,
+            "perfume_id": pid,
+            "quantity_ml": qty,
+            "price_per_ml": price,
+            "partial_sum": round(qty * price, 2),
+            "is_flask": rng.random() < 0.02,
+            "is_split": rng.random() < 0.1,
+        }
+
+
+def _chunks(rows, size=CHUNK):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def generate(session, perfumes=5000, orders=60000, items=200000, seed=1, progress=print):
+    """Wypełnia pustą bazę; zwraca liczby wstawionych wierszy."""
+    from models.perfume import Perfume
+    from models.order import Order
+    from models.order_item import OrderItem
+    from models.note import rebuild_note_links
+
+    if items < orders:
+        raise ValueError("Pozycji musi być co najmniej tyle, ile zamówień.")
+    if session.query(Perfume.id).first() or session.query(Order.id).first():
+        raise ValueError("Baza nie jest pusta – generator wypełnia tylko nową bazę.")
+    rng = random.Random(seed)
+
+    for chunk in _chunks(_perfumes(rng, perfumes)):
+        session.bulk_insert_mappings(Perfume, chunk)
+    rebuild_note_links(session)
+    session.commit()
+    progress(f"perfumy: {perfumes}")
+
+    first_day, days = FIRST_SALE_DAY, 730
+    totals = {}
+    for chunk in _chunks(_order(rng, oid, first_day, days) for oid in range(1, orders + 1)):
+        session.bulk_save_objects(chunk)
+        totals.update((o.id, o.shipping) for o in chunk)
+    session.commit()
+    progress(f"zamówienia: {orders}")
+
+    priced = [(pid, price) for pid, price in session.query(Perfume.id, Perfume.price_per_ml)]
+    for chunk in _chunks(_order_items(rng, orders, items, priced)):
+        session.bulk_insert_mappings(OrderItem, chunk)
+        for item in chunk:
+            if item["price_per_ml"] > 0:
+                totals[item["order_id"]] += item["partial_sum"] + VIAL_COST
+    session.commit()
+    progress(f"pozycje: {items}")
+
+    for chunk in _chunks(totals.items()):
+        session.bulk_update_mappings(Order, [{"id": oid, "total": round(total, 2)} for oid, total in chunk])
+    session.commit()
+    return {"perfumes": perfumes, "orders": orders, "items": items, "seed": seed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Syntetyczna baza do testów wydajności.")
+    parser.add_argument("db", help="ścieżka nowej bazy (istniejący plik zostanie zastąpiony z --force)")
+    parser.add_argument("--perfumes", type=int, default=5000)
+    parser.add_argument("--orders", type=int, default=60000)
+    parser.add_argument("--items", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--force", action="store_true", help="usuń istniejącą bazę")
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.db):
+        if not args.force:
+            parser.error(f"{args.db} już istnieje (użyj --force)")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.db + suffix):
+                os.remove(args.db + suffix)
+
+    # silnik aplikacji czyta ścieżkę przy imporcie models.database
+    os.environ["ORGANIZER_DB"] = args.db
+    from models.database import Session
+    from models.schema import upgrade_schema
+
+    started = time.perf_counter()
+    upgrade_schema()
+    generate(Session(), args.perfumes, args.orders, args.items, args.seed)
+    print(f"Gotowe: {args.db} ({time.perf_counter() - started:.1f} s)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,367 @@
+# bench/run.py
+"""Testy wydajności głównych ścieżek aplikacji (bez okna, ``QT_QPA_PLATFORM=offscreen``).
+
+    python -m bench.generate bench.db                   # jednorazowo: dane syntetyczne
+    python -m bench.run bench.db                        # porównanie z bench/baseline.json
+    python -m bench.run bench.db --update-baseline      # zapis nowego punktu odniesienia
+    python -m bench.run bench.db --only perfumes_reload orders_load
+
+Każdy test jest mierzony na kopii bazy (zapisy nie zmieniają pliku źródłowego):
+czas (najlepszy z ``--repeat`` przebiegów), liczba zapytań SQL i szczyt pamięci
+Pythona (tracemalloc, osobny przebieg). Kod wyjścia 1, jeśli wynik jest wyraźnie
+gorszy od zapisanego – progi w ``LIMITS``. Czasy zależą od komputera, więc punkt
+odniesienia zapisuje się na tej maszynie, na której się porównuje.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+WAIT_TIMEOUT_S = 300
+
+# (względny, bezwzględny) wzrost, powyżej którego wynik jest regresją
+LIMITS = {
+    "wall_s": (0.25, 0.05),
+    "queries": (0.10, 2),
+    "peak_kib": (0.25, 1024),
+}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# POMIARY
+# ─────────────────────────────────────────────────────────────────────────────
+
+class QueryCounter:
+    """Liczy polecenia SQL wysłane przez silnik (ze wszystkich wątków)."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.count = 0
+        self._lock = threading.Lock()
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        with self._lock:
+            self.count += 1
+
+
+def wait_until(predicate, timeout=WAIT_TIMEOUT_S):
+    """Obsługuje zdarzenia Qt, dopóki warunek nie jest spełniony."""
+    from PyQt5.QtWidgets import QApplication
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("Przekroczono czas oczekiwania na wynik.")
+        QApplication.processEvents()
+        time.sleep(0.001)
+    QApplication.processEvents()
+
+
+@contextmanager
+def _no_dialogs(pdf_path):
+    """Zastępuje okna modalne: zapis PDF idzie do pdf_path, ostrzeżenie przerywa test."""
+    from PyQt5.QtWidgets import QMessageBox, QFileDialog, QInputDialog
+
+    def fail(parent, title, text, *args, **kwargs):
+        raise RuntimeError(f"{title}: {text}")
+
+    patches = {
+        (QMessageBox, "information"): lambda *a, **k: QMessageBox.Ok,
+        (QMessageBox, "question"): lambda *a, **k: QMessageBox.Yes,
+        (QMessageBox, "warning"): fail,
+        (QMessageBox, "critical"): fail,
+        (QFileDialog, "getSaveFileName"): lambda *a, **k: (pdf_path, ""),
+        (QInputDialog, "getItem"): lambda *a, **k: ("", False),
+    }
+    saved = {key: getattr(*key) for key in patches}
+    for (cls, name), replacement in patches.items():
+        setattr(cls, name, staticmethod(replacement))
+    try:
+        yield
+    finally:
+        for (cls, name), original in saved.items():
+            setattr(cls, name, original)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# TESTY – setup() przygotowuje stan (bez pomiaru), run(stan) jest mierzone
+# ─────────────────────────────────────────────────────────────────────────────
+
+class Benchmark:
+    __slots__ = ("name", "description", "setup", "run")
+
+    def __init__(self, name, description, setup, run):
+        self.name = name
+        self.description = description
+        self.setup = setup
+        self.run = run
+
+
+def _shown(widget):
+    widget.resize(1400, 800)
+    widget.show()
+    wait_until(lambda: True)
+    return widget
+
+
+def _perfumes_view():
+    from ui.perfumes_view import PerfumesView
+    view = _shown(PerfumesView())
+    wait_until(lambda: not view.is_loading())
+    return view
+
+
+def _perfumes_reload(view):
+    view.reload()
+    wait_until(lambda: not view.is_loading())
+
+
+def _orders_view():
+    from ui.orders_view import OrdersView
+    view = _shown(OrdersView())
+    wait_until(lambda: not view.is_loading())
+    return view
+
+
+def _orders_load(view):
+    view.load_orders()
+    wait_until(lambda: not view.is_loading())
+
+
+def _orders_scroll(view):
+    """Pierwsza strona i pięć kolejnych doczytanych przewijaniem."""
+    _orders_load(view)
+    for _ in range(5):
+        if view.model.canFetchMore():
+            view.model.fetchMore()
+    wait_until(lambda: True)
+
+
+def _new_order_dialog():
+    from ui.add_order_dialog import AddOrderDialog
+    dialog = AddOrderDialog()
+    wait_until(lambda: dialog.items_table.rowCount() > 0)
+    dialog.name_input.setText("Test wydajności")
+    dialog.add_item_row(default_ml=10)
+    wait_until(lambda: True)
+    return dialog
+
+
+def _edit_order_dialog():
+    from sqlalchemy import func
+    from sqlalchemy.orm import selectinload
+    from models.database import Session
+    from models.order import Order
+    from models.order_item import OrderItem
+    from ui.add_order_dialog import AddOrderDialog
+
+    session = Session()
+    # zamówienie z największą liczbą pozycji – najdroższy zapis
+    order_id = session.query(OrderItem.order_id).group_by(OrderItem.order_id).order_by(
+        func.count().desc(), OrderItem.order_id
+    ).limit(1).scalar()
+    order = session.get(Order, order_id, options=[selectinload(Order.items)])
+    dialog = AddOrderDialog(order_to_edit=order)
+    wait_until(lambda: dialog.items_table.rowCount() == len(order.items)
+               and not dialog._pending_checkbox_states)
+    return dialog
+
+
+def _save_order(dialog):
+    dialog.save_order()
+    if dialog.result() != dialog.Accepted:
+        raise RuntimeError("Zamówienie nie zostało zapisane.")
+
+
+def _save_to_pdf(view):
+    """Eksport działa w tle – czekamy na sygnał zakończenia zadania."""
+    outcome = []
+    job = view.save_to_pdf()
+    job.signals.finished.connect(lambda path, error: outcome.append(error))
+    job.signals.cancelled.connect(lambda: outcome.append("przerwano"))
+    wait_until(lambda: outcome)
+    if outcome[0]:
+        raise RuntimeError(outcome[0])
+
+
+BENCHMARKS = [
+    Benchmark("perfumes_reload", "PerfumesView.reload – wszystkie perfumy i filtry",
+              _perfumes_view, _perfumes_reload),
+    Benchmark("orders_load", "OrdersView.load_orders – pierwsza strona i liczniki etapów",
+              _orders_view, _orders_load),
+    Benchmark("orders_scroll", "OrdersView – pierwsza strona + 5 doczytanych",
+              _orders_view, _orders_scroll),
+    Benchmark("add_order_dialog", "AddOrderDialog – otwarcie okna nowego zamówienia",
+              lambda: None, lambda _: _new_order_dialog()),
+    Benchmark("save_order_new", "AddOrderDialog.save_order – nowe zamówienie",
+              _new_order_dialog, _save_order),
+    Benchmark("save_order_edit", "AddOrderDialog.save_order – edycja największego zamówienia",
+              _edit_order_dialog, _save_order),
+    Benchmark("save_to_pdf", "PerfumesView.save_to_pdf – lista wszystkich perfum",
+              _perfumes_view, _save_to_pdf),
+]
+
+
+def _measure(bench, counter, repeat):
+    from models.database import Session
+
+    def prepared():
+        Session.remove()  # każdy przebieg z czystą sesją GUI
+        state = bench.setup()
+        wait_until(lambda: True)
+        return state
+
+    times, queries = [], None
+    for _ in range(repeat):
+        state = prepared()
+        before = counter.count
+        started = time.perf_counter()
+        bench.run(state)
+        times.append(time.perf_counter() - started)
+        if queries is None:
+            queries = counter.count - before
+
+    state = prepared()
+    tracemalloc.start()
+    try:
+        bench.run(state)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"wall_s": round(min(times), 4), "queries": queries, "peak_kib": round(peak / 1024)}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# PUNKT ODNIESIENIA
+# ─────────────────────────────────────────────────────────────────────────────
+
+def dataset_info(session):
+    from models.perfume import Perfume
+    from models.order import Order
+    from models.order_item import OrderItem
+    return {
+        "perfumes": session.query(Perfume).count(),
+        "orders": session.query(Order).count(),
+        "items": session.query(OrderItem).count(),
+    }
+
+
+def compare(result, baseline):
+    """Lista (metryka, było, jest) przekraczających progi z LIMITS."""
+    regressions = []
+    for metric, (relative, absolute) in LIMITS.items():
+        old, new = baseline.get(metric), result.get(metric)
+        if old is None or new is None:
+            continue
+        if new > old * (1 + relative) and new - old > absolute:
+            regressions.append((metric, old, new))
+    return regressions
+
+
+def _qt_message(mode, context, message):
+    # platforma offscreen ostrzega przy każdym oknie dialogowym – to tylko szum
+    if "propagateSizeHints" not in message:
+        print(message, file=sys.stderr)
+
+
+def _format_change(old, new):
+    if old in (None, 0):
+        return ""
+    return f" ({(new - old) / old:+.0%})"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Testy wydajności na bazie syntetycznej.")
+    parser.add_argument("db", help="baza z python -m bench.generate")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true", help="zapisz wyniki jako punkt odniesienia")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="+", metavar="TEST", choices=[b.name for b in BENCHMARKS])
+    args = parser.parse_args(argv)
+
+    if not os.path.isfile(args.db):
+        parser.error(f"brak bazy {args.db} (python -m bench.generate {args.db})")
+
+    # kopia bazy – zapisane zamówienia nie zmieniają danych kolejnych uruchomień
+    workdir = tempfile.mkdtemp(prefix="organizer-bench-")
+    db_copy = os.path.join(workdir, "bench.db")
+    with sqlite3.connect(args.db) as src, sqlite3.connect(db_copy) as dst:
+        src.backup(dst)
+    os.environ["ORGANIZER_DB"] = db_copy
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    from PyQt5.QtCore import qInstallMessageHandler
+    from PyQt5.QtWidgets import QApplication
+    qInstallMessageHandler(_qt_message)
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+
+    from models.database import engine, Session
+    from models.schema import upgrade_schema
+
+    try:
+        upgrade_schema()
+        dataset = dataset_info(Session())
+        counter = QueryCounter(engine)
+
+        baseline = {}
+        if os.path.isfile(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        if baseline and baseline.get("dataset") != dataset:
+            print(f"UWAGA: punkt odniesienia dotyczy innych danych: {baseline.get('dataset')}")
+
+        selected = [b for b in BENCHMARKS if not args.only or b.name in args.only]
+        results, failures = {}, []
+        pdf_path = os.path.join(workdir, "lista_perfum.pdf")
+        print(f"Dane: {dataset['perfumes']} perfum, {dataset['orders']} zamówień, {dataset['items']} pozycji")
+        print(f"{'test':<20} {'czas [s]':>16} {'zapytania':>16} {'pamięć [KiB]':>20}")
+        with _no_dialogs(pdf_path):
+            for bench in selected:
+                result = _measure(bench, counter, max(args.repeat, 1))
+                results[bench.name] = result
+                previous = baseline.get("results", {}).get(bench.name, {})
+                cells = [
+                    f"{result[m]}{_format_change(previous.get(m), result[m])}"
+                    for m in ("wall_s", "queries", "peak_kib")
+                ]
+                print(f"{bench.name:<20} {cells[0]:>16} {cells[1]:>16} {cells[2]:>20}")
+                for metric, old, new in compare(result, previous):
+                    failures.append(f"{bench.name}: {metric} {old} → {new}")
+        app.processEvents()
+    finally:
+        Session.remove()
+        engine.dispose()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.update_baseline:
+        recorded = baseline.get("results", {}) if args.only else {}
+        recorded.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "dataset": dataset,
+                "machine": f"{platform.system()} {platform.machine()}, Python {platform.python_version()}",
+                "results": recorded,
+            }, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"Zapisano punkt odniesienia: {args.baseline}")
+        return 0
+
+    for line in failures:
+        print(f"REGRESJA {line}")
+    if baseline and not failures:
+        print("Bez regresji względem punktu odniesienia.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,5 @@
-from models.database import Base, engine
-import models.perfume
-import models.order
-import models.order_item
+from models.schema import upgrade_schema
 
-Base.metadata.create_all(engine)
+version = upgrade_schema()
 
-print("Wszystkie tabele zostały utworzone (jeśli nie istniały).")
+print(f"Baza danych jest aktualna (wersja schematu {version}).")
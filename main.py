@@ -1,3 +1,6 @@
+import time
+STARTED = time.perf_counter()  # początek pomiaru startu – przed importami
+
 import sys
 from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import QApplication
@@ -6,12 +9,22 @@ from PyQt5.QtWidgets import QApplication
 QApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
 QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
 
+from models.database import setup_query_log
+from models.schema import upgrade_schema
 from ui.main_window import MainWindow
+from ui.startup import StartupTimer
 
 def main():
+    startup = StartupTimer(STARTED)
+    startup.lap("import")
     app = QApplication(sys.argv)
+    setup_query_log()  # organizer_queries.log: podsumowania akcji i wolne zapytania
+    upgrade_schema()  # dociąga schemat starszych plików organizer.db
+    startup.lap("przygotowanie")
     window = MainWindow()
-    window.show()
+    window.show()  # widoki aktywnych zakładek powstają tu, dane wczytują się po narysowaniu
+    startup.lap("okno")
+    startup.wait_for_first_load()
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
@@ -0,0 +1,11 @@
+# models/__init__.py
+"""Modele ORM.
+
+Relacje wskazują klasy po nazwie, więc wszystkie mapowane klasy muszą być
+zarejestrowane przed konfiguracją mapperów. Import dowolnego modułu pakietu
+(także samego ``models.order_item`` w skrypcie) rejestruje je tutaj, raz.
+"""
+
+from models import image, note, order, order_item, perfume
+
+__all__ = ["image", "note", "order", "order_item", "perfume"]
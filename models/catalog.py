@@ -0,0 +1,99 @@
+# models/catalog.py
+"""Wspólny dla całego procesu katalog perfum – lekkie rekordy po id, bez zdjęć.
+
+Lista perfum i okno zamówienia biorą rekordy stąd; zapytanie idzie do bazy
+tylko przy pierwszym użyciu i potem wyłącznie po perfumy, które się zmieniły.
+Wpisy są unieważniane dokładnie po id zatwierdzonych zmian
+(``models/changes.py``) – także perfum, których pozycje zamówień zmieniono
+(liczniki przeliczają wtedy triggery); niezatwierdzone zmiany nie psują katalogu.
+"""
+
+import threading
+
+from models.changes import ALL, add_change_listener
+from models.perfume import Perfume
+
+# liczniki są zapisane w wierszu perfum, więc to wszystko, czego potrzebują widoki
+CATALOG_COLUMNS = (
+    Perfume.id, Perfume.status, Perfume.brand, Perfume.name, Perfume.to_decant,
+    Perfume.available_ml.label("available_ml"), Perfume.price_per_ml, Perfume.order_count, Perfume.selling_price,
+    Perfume.purchase_price, Perfume.extra_costs, Perfume.balance, Perfume.is_split,
+    Perfume.image_hash,
+)
+
+
+class CatalogEntry:
+    """Kolumny ``CATALOG_COLUMNS`` jednego wiersza perfum."""
+    __slots__ = tuple(col.key for col in CATALOG_COLUMNS)
+
+    def __init__(self, row):
+        for field in self.__slots__:
+            setattr(self, field, getattr(row, field))
+
+
+class PerfumeCatalog:
+    """Rekordy perfum po id; bezpieczny dla wątków (lista wczytywana jest w tle)."""
+
+    def __init__(self):
+        self._entries = {}  # id → CatalogEntry, w kolejności id
+        self._stale = set()
+        self._complete = False
+        self._lock = threading.Lock()
+
+    def entries(self, session, perfume_ids=None):
+        """Rekordy wszystkich perfum albo tylko ``perfume_ids``; brakujące id są pomijane.
+
+        Nieaktualne wpisy są doczytywane jednym zapytaniem sesją wywołującego.
+        """
+        with self._lock:
+            if not self._complete:
+                self._entries = {e.id: e for e in self._load(session, None)}
+                self._stale.clear()
+                self._complete = True
+            elif self._stale:
+                self._refresh(session, self._stale)
+                self._stale = set()
+            if perfume_ids is None:
+                return list(self._entries.values())
+            return [self._entries[pid] for pid in perfume_ids if pid in self._entries]
+
+    def invalidate(self, perfume_ids):
+        """Oznacza wpisy jako nieaktualne (ALL – cały katalog)."""
+        with self._lock:
+            if ALL in perfume_ids:
+                self._complete = False
+                self._entries = {}
+                self._stale.clear()
+            elif self._complete:
+                self._stale.update(pid for pid in perfume_ids if pid is not None)
+
+    def _refresh(self, session, perfume_ids):
+        fresh = {e.id: e for e in self._load(session, perfume_ids)}
+        new_ids = False
+        for pid in perfume_ids:
+            entry = fresh.get(pid)
+            if entry is None:
+                self._entries.pop(pid, None)
+            else:
+                new_ids |= pid not in self._entries
+                self._entries[pid] = entry
+        if new_ids:
+            self._entries = dict(sorted(self._entries.items()))
+
+    @staticmethod
+    def _load(session, perfume_ids):
+        q = session.query(*CATALOG_COLUMNS)
+        if perfume_ids is not None:
+            q = q.filter(Perfume.id.in_(list(perfume_ids)))
+        return [CatalogEntry(row) for row in q.order_by(Perfume.id)]
+
+
+catalog = PerfumeCatalog()
+
+
+def _invalidate(changes):
+    if changes.perfume_ids:
+        catalog.invalidate(changes.perfume_ids)
+
+
+add_change_listener(_invalidate)  # przed słuchaczami widoków – odświeżają się już z katalogu
@@ -0,0 +1,125 @@
+# models/changes.py
+"""Zatwierdzone zmiany perfum i zamówień – dla katalogu i widoków.
+
+``after_flush`` każdej sesji zbiera id zmienionych obiektów, ``after_commit``
+ogłasza je słuchaczom (``add_change_listener``) jako jeden ``Changes``,
+``after_rollback`` je porzuca. Zmiana pozycji zamówienia liczy się jako zmiana
+zamówienia i perfum (liczniki perfum przeliczają triggery).
+
+Zapis z pominięciem ORM (``bulk_*_mappings``) zgłasza zmienione id przez
+``mark_changed``. Instrukcje ``insert()/update()/delete()`` na tych tabelach
+wykonane przez ``session.execute()`` (także ``query(...).update/delete``)
+oznaczają zmianę wszystkiego (``ALL``), chyba że mają
+``execution_options(changes_reported=True)`` – wtedy id zgłosił wywołujący.
+"""
+
+from itertools import chain
+
+from sqlalchemy import event, inspect
+
+from models.database import SessionFactory
+from models.order import Order
+from models.order_item import OrderItem
+from models.perfume import Perfume
+
+ALL = "all"  # w zbiorze id: zmieniło się nie wiadomo co
+REPORTED = "changes_reported"
+_PENDING_KEY = "pending_changes"
+
+
+class Changes:
+    """Id zmienionych perfum, zmienionych (lub nowych) i usuniętych zamówień."""
+    __slots__ = ("perfume_ids", "order_ids", "deleted_order_ids")
+
+    def __init__(self):
+        self.perfume_ids = set()
+        self.order_ids = set()
+        self.deleted_order_ids = set()
+
+    def __bool__(self):
+        return bool(self.perfume_ids or self.order_ids or self.deleted_order_ids)
+
+    def normalized(self):
+        """Usunięte zamówienia nie są jednocześnie "zmienione"; bez id None."""
+        for ids in (self.perfume_ids, self.order_ids, self.deleted_order_ids):
+            ids.discard(None)
+        self.order_ids -= self.deleted_order_ids
+        return self
+
+
+_listeners = []
+
+
+def add_change_listener(callback):
+    """callback(Changes) po każdym commit ze zmianami (z wątku, który zatwierdzał)."""
+    _listeners.append(callback)
+
+
+def remove_change_listener(callback):
+    if callback in _listeners:
+        _listeners.remove(callback)
+
+
+def pending_changes(session):
+    changes = session.info.get(_PENDING_KEY)
+    if changes is None:
+        changes = session.info[_PENDING_KEY] = Changes()
+    return changes
+
+
+def mark_changed(session, perfume_ids=(), order_ids=()):
+    """Zgłasza id zmienione z pominięciem ORM; słuchacze dowiedzą się o nich przy commit."""
+    changes = pending_changes(session)
+    changes.perfume_ids.update(perfume_ids)
+    changes.order_ids.update(order_ids)
+
+
+def _collect(changes, obj, deleted):
+    if isinstance(obj, Perfume):
+        changes.perfume_ids.add(obj.id)
+    elif isinstance(obj, OrderItem):
+        # przeniesiona pozycja zmienia liczniki starych i nowych perfum
+        changes.perfume_ids.add(obj.perfume_id)
+        changes.perfume_ids.update(inspect(obj).attrs.perfume_id.history.deleted)
+        changes.order_ids.add(obj.order_id)
+    elif isinstance(obj, Order):
+        (changes.deleted_order_ids if deleted else changes.order_ids).add(obj.id)
+
+
+@event.listens_for(SessionFactory, "after_flush")
+def _collect_flushed(session, flush_context):
+    # new/dirty/deleted są tu jeszcze w stanie sprzed flush
+    if not (session.new or session.dirty or session.deleted):
+        return
+    changes = pending_changes(session)
+    for obj in chain(session.new, session.dirty):
+        _collect(changes, obj, deleted=False)
+    for obj in session.deleted:
+        _collect(changes, obj, deleted=True)
+
+
+@event.listens_for(SessionFactory, "do_orm_execute")
+def _collect_statement(state):
+    # instrukcje DML omijają flush – nie wiadomo, które wiersze zmieniły
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    if state.execution_options.get(REPORTED) or state.bind_mapper is None:
+        return
+    cls = state.bind_mapper.class_
+    if cls in (Perfume, OrderItem):
+        pending_changes(state.session).perfume_ids.add(ALL)
+    if cls in (Order, OrderItem):
+        pending_changes(state.session).order_ids.add(ALL)
+
+
+@event.listens_for(SessionFactory, "after_commit")
+def _publish(session):
+    changes = session.info.pop(_PENDING_KEY, None)
+    if changes and changes.normalized():
+        for callback in list(_listeners):
+            callback(changes)
+
+
+@event.listens_for(SessionFactory, "after_rollback")
+def _drop(session):
+    session.info.pop(_PENDING_KEY, None)
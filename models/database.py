@@ -1,9 +1,287 @@
-from sqlalchemy import create_engine
+# models/database.py
+"""Silnik bazy danych i sesje.
+
+Ścieżka bazy (kolejno):
+
+- zmienna środowiskowa ``ORGANIZER_DB`` – plik albo ``:memory:`` (testy),
+- plik konfiguracyjny ``organizer.ini`` (lub wskazany w ``ORGANIZER_CONFIG``)::
+
+    [database]
+    path = D:/dane/organizer.db
+
+    [pragmas]
+    synchronous = FULL
+    mmap_size = 0
+
+- domyślnie ``organizer.db`` w katalogu roboczym.
+
+PRAGMY z ``DEFAULT_PRAGMAS`` (nadpisywane sekcją ``[pragmas]``) są ustawiane
+na każdym nowym połączeniu.
+
+Każde zapytanie jest liczone i mierzone. Zapytania wykonane wewnątrz
+``track_action("…")`` (także w tle, przez ``ui/loader.py``) składają się na
+statystykę tej akcji, zapisywaną w dzienniku ``organizer_queries.log``;
+zapytania wolniejsze niż ``slow_query_ms`` trafiają tam razem z parametrami.
+Ustawienia w sekcji ``[debug]``::
+
+    [debug]
+    status_bar = true        # pasek statystyk akcji w oknie głównym
+    slow_query_ms = 50
+    log_file = organizer_queries.log
+"""
+
+import configparser
+import contextvars
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.pool import StaticPool
+
+DEFAULT_DB_PATH = "organizer.db"
+DEFAULT_CONFIG_FILE = "organizer.ini"
+MEMORY = ":memory:"
+
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",       # czytelnicy nie czekają na zapis okna zamówienia
+    "synchronous": "NORMAL",     # w WAL bezpieczne; fsync tylko przy checkpoincie
+    "mmap_size": 268435456,      # 256 MB odczytów przez mapowanie pamięci
+    "cache_size": -65536,        # 64 MB (wartość ujemna = KiB)
+    "temp_store": "MEMORY",
+    "foreign_keys": "ON",
+}
+
+DEFAULT_DEBUG = {
+    "status_bar": False,
+    "slow_query_ms": 100.0,
+    "log_file": "organizer_queries.log",
+}
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUPS = 3
+
+query_log = logging.getLogger("organizer.sql")
+query_log.addHandler(logging.NullHandler())  # bez setup_query_log() nic nie jest wypisywane
+
+
+def _read_config(config_file=None):
+    config_file = config_file or os.environ.get("ORGANIZER_CONFIG", DEFAULT_CONFIG_FILE)
+    parser = configparser.ConfigParser()
+    parser.read(config_file, encoding="utf-8")
+    return parser
+
+
+def load_config(config_file=None):
+    """Zwraca (ścieżka bazy, pragmy) według zmiennych środowiskowych i pliku."""
+    parser = _read_config(config_file)
+
+    db_path = os.environ.get("ORGANIZER_DB") or parser.get("database", "path", fallback=DEFAULT_DB_PATH)
+    pragmas = dict(DEFAULT_PRAGMAS)
+    if parser.has_section("pragmas"):
+        pragmas.update(parser.items("pragmas"))
+    return db_path, pragmas
+
+
+def make_engine(db_path=DEFAULT_DB_PATH, pragmas=None, echo=False):
+    """Silnik SQLite z pragmami ustawianymi przy każdym połączeniu.
+
+    ``db_path=":memory:"`` daje bazę w pamięci – jedno połączenie współdzielone
+    przez wszystkie sesje i wątki (inaczej każde połączenie miałoby pustą bazę).
+    """
+    pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+    for name, value in pragmas.items():
+        # wartości trafiają wprost do SQL – tylko nazwy i proste wartości
+        if not name.isidentifier() or not str(value).lstrip("-").isalnum():
+            raise ValueError(f"Nieprawidłowa pragma: {name} = {value}")
+    if db_path == MEMORY:
+        pragmas.pop("journal_mode", None)  # baza w pamięci nie ma pliku dziennika
+        pragmas.pop("mmap_size", None)
+        new_engine = create_engine(
+            "sqlite://", poolclass=StaticPool,
+            connect_args={"check_same_thread": False}, echo=echo,
+        )
+    else:
+        new_engine = create_engine(f"sqlite:///{db_path}", connect_args={"timeout": 30}, echo=echo)
+
+    @event.listens_for(new_engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+    event.listen(new_engine, "before_cursor_execute", _before_execute)
+    event.listen(new_engine, "after_cursor_execute", _after_execute)
+    return new_engine
+
+
+def load_debug_config(config_file=None):
+    """Ustawienia instrumentacji z sekcji ``[debug]`` (``ORGANIZER_DEBUG=1`` włącza pasek)."""
+    parser = _read_config(config_file)
+    return {
+        "status_bar": os.environ.get("ORGANIZER_DEBUG") == "1"
+        or parser.getboolean("debug", "status_bar", fallback=DEFAULT_DEBUG["status_bar"]),
+        "slow_query_ms": parser.getfloat("debug", "slow_query_ms", fallback=DEFAULT_DEBUG["slow_query_ms"]),
+        "log_file": parser.get("debug", "log_file", fallback=DEFAULT_DEBUG["log_file"]),
+    }
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# INSTRUMENTACJA ZAPYTAŃ
+# ─────────────────────────────────────────────────────────────────────────────
+
+class ActionStats:
+    """Zapytania jednej akcji użytkownika (np. "Wczytanie perfum").
+
+    Akcja trwa, dopóki ktoś ją trzyma (``retain``/``release``) – blok
+    ``track_action`` i każde zlecone w nim zadanie w tle. Ostatnie ``release``
+    zapisuje podsumowanie i powiadamia słuchaczy.
+    """
+
+    __slots__ = ("name", "queries", "sql_seconds", "slow_queries", "rows_changed", "started",
+                 "wall_seconds", "_holders", "_lock")
+
+    def __init__(self, name):
+        self.name = name
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.slow_queries = 0
+        self.rows_changed = 0  # zgłaszane przez zapisy (np. pozycje zamówienia), nie przez kursor
+        self.started = time.perf_counter()
+        self.wall_seconds = None
+        self._holders = 0
+        self._lock = threading.Lock()
+
+    def add(self, seconds, slow):
+        with self._lock:
+            self.queries += 1
+            self.sql_seconds += seconds
+            self.slow_queries += slow
+
+    def add_rows(self, count):
+        with self._lock:
+            self.rows_changed += count
+
+    def retain(self):
+        with self._lock:
+            self._holders += 1
+        return self
+
+    def release(self):
+        with self._lock:
+            self._holders -= 1
+            done = self._holders == 0
+        if done:
+            self.wall_seconds = time.perf_counter() - self.started
+            _action_finished(self)
+
+    def summary(self):
+        return (f"{self.name}: {self.queries} zapytań, {self.sql_seconds * 1000:.0f} ms w SQL, "
+                f"{(self.wall_seconds or 0) * 1000:.0f} ms łącznie"
+                + (f", zmienionych wierszy: {self.rows_changed}" if self.rows_changed else "")
+                + (f", wolnych: {self.slow_queries}" if self.slow_queries else ""))
+
+
+_current_action = contextvars.ContextVar("current_action", default=None)
+_action_listeners = []
+_slow_query_seconds = DEFAULT_DEBUG["slow_query_ms"] / 1000
+
+
+def current_action():
+    """Akcja, do której doliczane są zapytania bieżącego wątku (albo None)."""
+    return _current_action.get()
+
+
+@contextmanager
+def track_action(name):
+    """Zapytania w bloku (i w zadaniach zleconych z niego w tle) liczone jako akcja."""
+    stats = ActionStats(name).retain()
+    token = _current_action.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_action.reset(token)
+        stats.release()
+
+
+@contextmanager
+def attach_action(stats):
+    """Dolicza zapytania bloku do akcji przekazanej z innego wątku (None – bez zmian)."""
+    if stats is None:
+        yield None
+        return
+    token = _current_action.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_action.reset(token)
+
+
+def add_action_listener(callback):
+    """callback(ActionStats) po zakończeniu każdej akcji (z wątku, który ją zakończył)."""
+    _action_listeners.append(callback)
+
+
+def remove_action_listener(callback):
+    if callback in _action_listeners:
+        _action_listeners.remove(callback)
+
+
+def _action_finished(stats):
+    query_log.info(stats.summary())
+    for callback in list(_action_listeners):
+        callback(stats)
+
+
+def _format_parameters(parameters, executemany, limit=500):
+    if executemany:
+        text = f"{len(parameters)} zestawów, pierwszy: {parameters[0]!r}" if parameters else "[]"
+    else:
+        text = repr(parameters)
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    slow = elapsed >= _slow_query_seconds
+    stats = _current_action.get()
+    if stats is not None:
+        stats.add(elapsed, slow)
+    if slow:
+        query_log.warning(
+            "Wolne zapytanie (%.0f ms%s): %s | parametry: %s",
+            elapsed * 1000, f", {stats.name}" if stats else "",
+            " ".join(statement.split()), _format_parameters(parameters, executemany),
+        )
+
+
+def setup_query_log(debug=None):
+    """Dziennik zapytań z rotacją plików; wywoływane przez aplikację przy starcie."""
+    global _slow_query_seconds
+    debug = debug or load_debug_config()
+    _slow_query_seconds = debug["slow_query_ms"] / 1000
+    handler = RotatingFileHandler(
+        debug["log_file"], maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8",
+    )
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    query_log.addHandler(handler)
+    query_log.setLevel(logging.INFO)
+    return debug
+
 
-DATABASE_URL = "sqlite:///organizer.db"
+DATABASE_PATH, DATABASE_PRAGMAS = load_config()
 
-engine = create_engine(DATABASE_URL, connect_args={"timeout": 30}, echo=False)
-Session = scoped_session(sessionmaker(bind=engine, expire_on_commit=False))
+engine = make_engine(DATABASE_PATH, DATABASE_PRAGMAS)
+SessionFactory = sessionmaker(bind=engine, expire_on_commit=False)
+# sesja wątku GUI; wątki robocze tworzą własne przez SessionFactory()
+Session = scoped_session(SessionFactory)
 Base = declarative_base()
@@ -0,0 +1,95 @@
+# models/image.py
+"""Zdjęcia perfum – osobna tabela adresowana treścią (sha256).
+
+Wiersz ``perfumes`` trzyma tylko skrót ``image_hash``, więc zwykłe zapytania
+o perfumy nie wczytują obrazów. Te same bajty zapisane dwa razy to jeden
+wiersz w ``perfume_images``; nieużywane obrazy usuwają triggery.
+"""
+
+import base64
+import binascii
+import hashlib
+import os
+
+from sqlalchemy import Column, String, LargeBinary, inspect, text
+
+from models.database import Base
+
+
+class PerfumeImage(Base):
+    __tablename__ = 'perfume_images'
+
+    hash = Column(String, primary_key=True)     # sha256 zawartości (hex)
+    data = Column(LargeBinary, nullable=False)  # oryginalny plik (PNG/JPG)
+
+    def __repr__(self):
+        return f"<PerfumeImage({self.hash[:12]}…, {len(self.data or b'')} B)>"
+
+
+# Obraz bez żadnych perfum jest zbędny – także po zmianach spoza ORM
+PERFUME_IMAGES_DDL = [
+    """CREATE TRIGGER IF NOT EXISTS perfume_images_au AFTER UPDATE OF image_hash ON perfumes
+    WHEN old.image_hash IS NOT NULL AND old.image_hash IS NOT new.image_hash BEGIN
+        DELETE FROM perfume_images WHERE hash = old.image_hash
+            AND NOT EXISTS (SELECT 1 FROM perfumes WHERE image_hash = old.image_hash);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS perfume_images_ad AFTER DELETE ON perfumes
+    WHEN old.image_hash IS NOT NULL BEGIN
+        DELETE FROM perfume_images WHERE hash = old.image_hash
+            AND NOT EXISTS (SELECT 1 FROM perfumes WHERE image_hash = old.image_hash);
+    END""",
+]
+
+
+def image_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def store_image(session, data: bytes) -> str:
+    """Dodaje obraz do magazynu (jeśli go tam nie ma) i zwraca jego skrót."""
+    digest = image_hash(data)
+    # autoflush: obraz dodany wcześniej w tej samej sesji też zostanie znaleziony
+    if session.query(PerfumeImage.hash).filter_by(hash=digest).first() is None:
+        session.add(PerfumeImage(hash=digest, data=data))
+    return digest
+
+
+def load_image(session, digest):
+    """Bajty obrazu o podanym skrócie albo None."""
+    if not digest:
+        return None
+    return session.query(PerfumeImage.data).filter_by(hash=digest).scalar()
+
+
+def _legacy_image_bytes(value):
+    """Stara kolumna image_data: base64 albo ścieżka do pliku."""
+    if os.path.isfile(value):
+        with open(value, "rb") as f:
+            return f.read()
+    try:
+        return base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+
+
+def ensure_image_store(conn):
+    """Triggery oraz przeniesienie obrazów ze starej kolumny perfumes.image_data."""
+    for ddl in PERFUME_IMAGES_DDL:
+        conn.execute(text(ddl))
+    columns = {c["name"] for c in inspect(conn).get_columns("perfumes")}
+    if "image_data" not in columns:
+        return
+    ids = [pid for pid, in conn.execute(text(
+        "SELECT id FROM perfumes WHERE image_data IS NOT NULL AND image_data <> ''"
+    ))]
+    # po jednym wierszu – w pamięci nigdy nie ma wszystkich obrazów naraz
+    for pid in ids:
+        value = conn.execute(text("SELECT image_data FROM perfumes WHERE id = :id"), {"id": pid}).scalar()
+        data = _legacy_image_bytes(value)
+        if not data:
+            continue  # nieczytelna wartość (np. ścieżka do usuniętego pliku) zostaje jak była
+        digest = image_hash(data)
+        conn.execute(text("INSERT OR IGNORE INTO perfume_images (hash, data) VALUES (:h, :d)"),
+                     {"h": digest, "d": data})
+        conn.execute(text("UPDATE perfumes SET image_hash = :h, image_data = NULL WHERE id = :id"),
+                     {"h": digest, "id": pid})
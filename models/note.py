@@ -0,0 +1,181 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index, event, inspect, select, intersect, text
+from sqlalchemy.orm import relationship, Session as OrmSession
+from models.database import Base
+
+# Warstwy piramidy zapachowej ↔ kolumny CSV w Perfume
+LAYERS = {
+    "top": "top_notes",
+    "heart": "heart_notes",
+    "base": "base_notes",
+}
+
+
+def normalize_note(name: str) -> str:
+    """Klucz słownika: bez zbędnych spacji, bez rozróżniania wielkości liter."""
+    return " ".join((name or "").split()).casefold()
+
+
+def split_notes(csv_notes):
+    """"wanilia, Róża ,," → ["wanilia", "Róża"]"""
+    return [" ".join(n.split()) for n in (csv_notes or "").split(",") if n.strip()]
+
+
+class Note(Base):
+    __tablename__ = 'notes'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)                     # nazwa do wyświetlania
+    normalized = Column(String, nullable=False, unique=True)  # normalize_note(name)
+
+    def __repr__(self):
+        return f"<Note({self.name})>"
+
+
+class PerfumeNote(Base):
+    __tablename__ = 'perfume_notes'
+
+    perfume_id = Column(Integer, ForeignKey('perfumes.id'), primary_key=True)
+    note_id = Column(Integer, ForeignKey('notes.id'), primary_key=True)
+    layer = Column(String, primary_key=True)  # top / heart / base
+
+    # klucz główny obsługuje perfumy → nuty, ten indeks nuty → perfumy
+    __table_args__ = (Index('ix_perfume_notes_note', 'note_id', 'layer', 'perfume_id'),)
+
+    perfume = relationship("Perfume", back_populates="note_links")
+    note = relationship("Note")
+
+
+# Usunięcie perfum zapytaniem (query.delete) omija kaskadę ORM – sprząta trigger
+PERFUME_NOTES_DDL = [
+    """CREATE TRIGGER IF NOT EXISTS perfume_notes_ad AFTER DELETE ON perfumes BEGIN
+        DELETE FROM perfume_notes WHERE perfume_id = old.id;
+    END""",
+]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# SŁOWNIK
+# ─────────────────────────────────────────────────────────────────────────────
+
+def note_vocabulary(session):
+    """Nazwy wszystkich nut (do podpowiedzi), alfabetycznie."""
+    return [name for name, in session.query(Note.name).order_by(Note.normalized)]
+
+
+def _prefix_match(keyword):
+    """Nuty równe słowu kluczowemu lub zaczynające się od niego (zakres po indeksie)."""
+    key = normalize_note(keyword)
+    return Note.normalized >= key, Note.normalized < key + "\U0010ffff"
+
+
+def perfume_ids_with_notes(session, keywords):
+    """Perfumy mające wszystkie podane nuty – przecięcie zbiorów z indeksu."""
+    keywords = [k for k in keywords if normalize_note(k)]
+    if not keywords:
+        return None
+    selects = [
+        select(PerfumeNote.perfume_id).where(
+            PerfumeNote.note_id.in_(select(Note.id).where(*_prefix_match(kw)))
+        )
+        for kw in keywords
+    ]
+    stmt = selects[0] if len(selects) == 1 else intersect(*selects)
+    return {pid for pid, in session.execute(stmt)}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# SYNCHRONIZACJA Z KOLUMNAMI CSV
+# ─────────────────────────────────────────────────────────────────────────────
+
+class _NoteResolver:
+    """Get-or-create nut w obrębie jednej operacji (bez duplikatów w słowniku)."""
+
+    def __init__(self, session):
+        self.session = session
+        self._cache = {}
+
+    def get(self, name):
+        key = normalize_note(name)
+        note = self._cache.get(key)
+        if note is None:
+            with self.session.no_autoflush:
+                note = self.session.query(Note).filter_by(normalized=key).first()
+            if note is None:
+                note = Note(name=name, normalized=key)
+                self.session.add(note)
+            self._cache[key] = note
+        return note
+
+
+def _sync_links(perfume, resolver):
+    """Ustawia perfume.note_links zgodnie z kolumnami CSV, zachowując niezmienione."""
+    with resolver.session.no_autoflush:
+        existing = {(link.note.normalized, link.layer): link for link in perfume.note_links}
+    links = {}
+    for layer, attr in LAYERS.items():
+        for name in split_notes(getattr(perfume, attr)):
+            note = resolver.get(name)
+            key = (note.normalized, layer)
+            if key not in links:
+                links[key] = existing.get(key) or PerfumeNote(note=note, layer=layer)
+    perfume.note_links = list(links.values())
+
+
+@event.listens_for(OrmSession, "before_flush")
+def _sync_note_links(session, flush_context, instances):
+    from models.perfume import Perfume
+    resolver = None
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Perfume):
+            continue
+        state = inspect(obj)
+        if obj not in session.new and not any(
+            state.attrs[attr].history.has_changes() for attr in LAYERS.values()
+        ):
+            continue
+        resolver = resolver or _NoteResolver(session)
+        _sync_links(obj, resolver)
+
+
+def rebuild_note_links(session, perfume_ids=None):
+    """Odbudowuje perfume_notes z kolumn CSV (migracja, import hurtowy)."""
+    from models.perfume import Perfume
+    q = session.query(Perfume.id, *[getattr(Perfume, a) for a in LAYERS.values()])
+    if perfume_ids is not None:
+        q = q.filter(Perfume.id.in_(list(perfume_ids)))
+    rows = q.all()
+
+    resolver = _NoteResolver(session)
+    mappings, seen = [], set()
+    for pid, *csv_layers in rows:
+        for layer, csv_notes in zip(LAYERS, csv_layers):
+            for name in split_notes(csv_notes):
+                note = resolver.get(name)
+                if (pid, note.normalized, layer) not in seen:
+                    seen.add((pid, note.normalized, layer))
+                    mappings.append((pid, note, layer))
+    session.flush()  # nadaje id nowym nutom
+
+    ids = [pid for pid, *_ in rows]
+    for i in range(0, len(ids), 500):
+        session.query(PerfumeNote).filter(PerfumeNote.perfume_id.in_(ids[i:i + 500])).delete(
+            synchronize_session=False
+        )
+    session.bulk_insert_mappings(PerfumeNote, [
+        {"perfume_id": pid, "note_id": note.id, "layer": layer} for pid, note, layer in mappings
+    ])
+
+
+def ensure_note_vocabulary(conn):
+    """Triggery oraz jednorazowe przeniesienie istniejących nut CSV do słownika."""
+    for ddl in PERFUME_NOTES_DDL:
+        conn.execute(text(ddl))
+    has_links = conn.execute(text("SELECT 1 FROM perfume_notes LIMIT 1")).first()
+    has_notes = conn.execute(text(
+        "SELECT 1 FROM perfumes WHERE COALESCE(top_notes, '') || COALESCE(heart_notes, '') "
+        "|| COALESCE(base_notes, '') <> '' LIMIT 1"
+    )).first()
+    if has_notes and not has_links:
+        with OrmSession(bind=conn) as session:
+            rebuild_note_links(session)
+            session.commit()  # w transakcji conn – zatwierdzi ją engine.begin()
@@ -1,5 +1,21 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, Date
+from sqlalchemy import Column, Integer, String, Float, Boolean, Date, Index, event, func, literal_column
+from sqlalchemy.orm import relationship
 from models.database import Base
+from models.search_index import order_search_text
+
+# Etapy realizacji zamówienia w kolejności przepływu
+STAGE_SEND_MESSAGE = "Wyślij wiadomość"
+STAGE_AWAITING_PAYMENT = "Oczekiwanie na zapłatę"
+STAGE_GENERATE_LABEL = "Wygeneruj etykietę"
+STAGE_SEND_PACKAGE = "Wyślij paczkę"
+STAGE_GET_CONFIRMATION = "Pobierz potwierdzenie"
+STAGE_COMPLETE_BUYER = "Uzupełnij dane kupującego"
+STAGE_DONE = "Zakończone"
+
+STAGES = [
+    STAGE_SEND_MESSAGE, STAGE_AWAITING_PAYMENT, STAGE_GENERATE_LABEL,
+    STAGE_SEND_PACKAGE, STAGE_GET_CONFIRMATION, STAGE_COMPLETE_BUYER, STAGE_DONE,
+]
 
 class Order(Base):
     __tablename__ = 'orders'
@@ -30,6 +46,58 @@ class Order(Base):
     confirmation_date = Column(Date, nullable=True)
     is_split = Column(Boolean, default=False)
     
+    # Etap realizacji – wyliczany z flag i danych kontaktowych przy zapisie
+    stage = Column(String, index=True)
+    
+    # Znormalizowane dane kontaktowe dla wyszukiwarki kupującego (indeks orders_search)
+    search_text = Column(String)
+    
+    # Zakres dat (filtry eksportu) – zwykły indeks kolumny; sortowanie listy po dacie
+    # sprzedaży używa wyrażenia coalesce(sale_date, '') i ma własny indeks (ui/orders_model.py)
+    __table_args__ = (
+        Index('ix_orders_sale_date', sale_date),
+        Index('ix_orders_sale_date_sort', func.coalesce(sale_date, literal_column("''"))),
+    )
+    
+    # Pozycje zamówienia – usuwane razem z zamówieniem
+    items = relationship(
+        "OrderItem", back_populates="order",
+        cascade="all, delete-orphan", order_by="OrderItem.id",
+    )
+    
+    def has_complete_buyer_data(self):
+        """Sprawdź czy zamówienie ma kompletne dane kupującego"""
+        # Musi być wypełniona przynajmniej nazwa FB lub imię+nazwisko
+        has_name = (self.name and self.name.strip()) or (
+            self.first_name and self.first_name.strip() and self.last_name and self.last_name.strip()
+        )
+        # Musi być wypełniony email lub telefon
+        has_contact = (self.email and self.email.strip()) or (self.phone and self.phone.strip())
+        return bool(has_name and has_contact)
+    
+    def compute_stage(self):
+        if self.confirmation_obtained:
+            # Po zakończeniu wszystkich kroków sprawdź jeszcze dane kupującego
+            if not self.has_complete_buyer_data():
+                return STAGE_COMPLETE_BUYER
+            return STAGE_DONE
+        if self.sent:
+            return STAGE_GET_CONFIRMATION
+        if self.generated_label:
+            return STAGE_SEND_PACKAGE
+        if self.received_money:
+            return STAGE_GENERATE_LABEL
+        if self.sent_message:
+            return STAGE_AWAITING_PAYMENT
+        return STAGE_SEND_MESSAGE
+    
     def __repr__(self):
         display_name = self.name or self.buyer or f"{self.first_name} {self.last_name}".strip() or "Brak nazwy"
         return f"<Order({display_name})>"
+
+
+@event.listens_for(Order, "before_insert")
+@event.listens_for(Order, "before_update")
+def _update_derived_fields(mapper, connection, target):
+    target.stage = target.compute_stage()
+    target.search_text = order_search_text(target)
@@ -1,15 +1,17 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, func
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import relationship
 from models.database import Base
 
 class Perfume(Base):
     __tablename__ = 'perfumes'
 
     id = Column(Integer, primary_key=True)
-    status = Column(String, default='Dostępny')  # Dostępny/Niedostępny
+    status = Column(String, default='Dostępny', index=True)  # Dostępny/Niedostępny
     brand = Column(String)
     name = Column(String)
     to_decant = Column(Float)  # ml do odlania
-    remaining = Column(Float, default=0.0)  # automatycznie (to_decant - zamówione)
+    remaining = Column(Float, default=0.0)  # automatycznie (to_decant - zamówione), może być < 0 – czytać available_ml
     price_per_ml = Column(Float)
     purchase_price = Column(Float)
     fragrantica_url = Column(String)  # Link do Fragrantica
@@ -30,16 +32,35 @@ class Perfume(Base):
     heart_notes = Column(String) # JSON string or comma-separated
     base_notes = Column(String)  # JSON string or comma-separated
 
-    # Image data (can store path or base64)
-    image_data = Column(String)
+    # Zdjęcie w tabeli perfume_images (wczytywane dopiero, gdy jest potrzebne)
+    image_hash = Column(String, ForeignKey('perfume_images.hash'), index=True)
     is_split = Column(Boolean, default=False)  # True jeśli perfuma to ROZBIÓRKA
 
-    # Pola automatyczne
-    order_count = Column(Integer, default=0)    # liczba zamówień
-    selling_price = Column(Float, default=0.0)  # suma wartości zamówień
-    extra_costs = Column(Float, default=5.0)    # dekant + koperta
+    # Pola automatyczne – utrzymywane triggerami (models/perfume_counters.py)
+    order_count = Column(Integer, default=0)    # liczba płatnych pozycji zamówień
+    selling_price = Column(Float, default=0.0)  # suma wartości zamówień + dekanty
+    extra_costs = Column(Float, default=0.0)    # EXTRA_COST_PER_ORDER (koperta itp.) za każdą płatną pozycję
     balance = Column(Float, default=0.0)        # selling_price - purchase_price - extra_costs
 
+    # Pozycje zamówień z tymi perfumami – bez kaskadowego usuwania historii
+    order_items = relationship("OrderItem", back_populates="perfume")
+
+    # Nuty ze słownika (notes) – utrzymywane z kolumn CSV przy zapisie
+    note_links = relationship("PerfumeNote", back_populates="perfume", cascade="all, delete-orphan")
+
+    image = relationship("PerfumeImage")
+
+    # Stan do wyświetlenia i eksportu: remaining obcięte do zera. Zapisana wartość
+    # zostaje ujemna, żeby triggery po usunięciu pozycji wracały do dokładnego stanu.
+    @hybrid_property
+    def available_ml(self):
+        return max(self.remaining or 0, 0)
+
+    @available_ml.inplace.expression
+    @classmethod
+    def _available_ml_expression(cls):
+        return func.max(func.coalesce(cls.remaining, 0), 0)
+
     def compute_balance(self):
         self.balance = round((self.selling_price or 0) -
                              (self.purchase_price or 0) -
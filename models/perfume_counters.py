@@ -0,0 +1,126 @@
+# models/perfume_counters.py
+"""Liczniki sprzedaży zapisane w wierszu perfum.
+
+``remaining``, ``order_count``, ``selling_price``, ``extra_costs`` i ``balance``
+utrzymują triggery SQLite – każda zmiana w ``order_items`` (także przez
+``query.delete()`` czy kaskadę przy usuwaniu zamówienia) dolicza lub odejmuje
+swoją różnicę. Wzory są te same co w ``compute_stats``; ``remaining`` jest
+zapisywane bez obcinania do zera (ujemne = sprzedano więcej, niż było).
+
+Triggery zakłada migracja schematu (``models/schema.py``); sprawdzenie
+i naprawa rozjazdów z wiersza poleceń – ``services/perfume_counters.py``.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session as OrmSession
+
+from models.changes import mark_changed
+from models.perfume import Perfume
+from models.stock_stats import compute_stats, EMPTY_STATS, DECANT_COST, EXTRA_COST_PER_ORDER
+
+COUNTER_COLUMNS = ("remaining", "order_count", "selling_price", "extra_costs", "balance")
+
+# różnice mniejsze niż to są błędem zaokrągleń, nie rozjazdem
+TOLERANCE = 0.005
+
+
+def _apply_item(row, sign):
+    """UPDATE doliczający (sign="+") lub odejmujący (sign="-") jedną pozycję."""
+    paid = f"COALESCE({row}.price_per_ml, 0) > 0"
+    return f"""UPDATE perfumes SET
+            remaining = ROUND(COALESCE(remaining, 0) {'-' if sign == '+' else '+'} COALESCE({row}.quantity_ml, 0), 6),
+            order_count = COALESCE(order_count, 0) {sign} ({paid}),
+            selling_price = ROUND(COALESCE(selling_price, 0) {sign} CASE WHEN {paid}
+                THEN COALESCE({row}.quantity_ml, 0) * {row}.price_per_ml + {DECANT_COST} ELSE 0 END, 6),
+            extra_costs = ROUND(COALESCE(extra_costs, 0) {sign} CASE WHEN {paid}
+                THEN {EXTRA_COST_PER_ORDER} ELSE 0 END, 6)
+        WHERE id = {row}.perfume_id;"""
+
+
+PERFUME_COUNTERS_DDL = [
+    f"""CREATE TRIGGER IF NOT EXISTS order_items_counters_ai AFTER INSERT ON order_items BEGIN
+        {_apply_item('new', '+')}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS order_items_counters_ad AFTER DELETE ON order_items BEGIN
+        {_apply_item('old', '-')}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS order_items_counters_au
+    AFTER UPDATE OF perfume_id, quantity_ml, price_per_ml ON order_items BEGIN
+        {_apply_item('old', '-')}
+        {_apply_item('new', '+')}
+    END""",
+    # nowe perfumy zaczynają bez sprzedaży
+    """CREATE TRIGGER IF NOT EXISTS perfumes_counters_ai AFTER INSERT ON perfumes BEGIN
+        UPDATE perfumes SET remaining = COALESCE(new.to_decant, 0), order_count = 0,
+            selling_price = 0, extra_costs = 0, balance = -COALESCE(new.purchase_price, 0)
+        WHERE id = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS perfumes_counters_decant AFTER UPDATE OF to_decant ON perfumes BEGIN
+        UPDATE perfumes SET remaining = ROUND(
+            COALESCE(remaining, 0) + COALESCE(new.to_decant, 0) - COALESCE(old.to_decant, 0), 6)
+        WHERE id = new.id;
+    END""",
+    # bilans = sprzedaż - cena zakupu - koszty (jak Perfume.compute_balance)
+    """CREATE TRIGGER IF NOT EXISTS perfumes_counters_balance
+    AFTER UPDATE OF selling_price, extra_costs, purchase_price ON perfumes BEGIN
+        UPDATE perfumes SET balance = ROUND(COALESCE(new.selling_price, 0)
+            - COALESCE(new.purchase_price, 0) - COALESCE(new.extra_costs, 0), 6)
+        WHERE id = new.id;
+    END""",
+]
+
+
+def expected_counters(perfume, stats):
+    """Wartości liczników wyliczone od zera z order_items."""
+    return {
+        "remaining": (perfume.to_decant or 0) - stats.used_ml,
+        "order_count": stats.orders_cnt,
+        "selling_price": stats.sales_sum,
+        "extra_costs": stats.extra,
+        "balance": stats.balance(perfume.purchase_price),
+    }
+
+
+def find_drift(session, perfume_ids=None):
+    """{perfume_id: {kolumna: (zapisane, oczekiwane)}} dla rozjechanych liczników."""
+    q = session.query(Perfume.id, Perfume.to_decant, Perfume.purchase_price,
+                      *[getattr(Perfume, c) for c in COUNTER_COLUMNS])
+    if perfume_ids is not None:
+        q = q.filter(Perfume.id.in_(list(perfume_ids)))
+    rows = q.all()
+    stats = compute_stats(session, None if perfume_ids is None else [r.id for r in rows])
+
+    drift = {}
+    for row in rows:
+        expected = expected_counters(row, stats.get(row.id, EMPTY_STATS))
+        wrong = {
+            col: (getattr(row, col), value) for col, value in expected.items()
+            if getattr(row, col) is None or abs(getattr(row, col) - value) > TOLERANCE
+        }
+        if wrong:
+            drift[row.id] = wrong
+    return drift
+
+
+def rebuild_counters(session, perfume_ids=None):
+    """Naprawia rozjechane liczniki; zwraca id poprawionych perfum."""
+    drift = find_drift(session, perfume_ids)
+    mark_changed(session, perfume_ids=drift)
+    session.bulk_update_mappings(Perfume, [
+        {"id": pid, **{col: expected for col, (_, expected) in wrong.items()}}
+        for pid, wrong in drift.items()
+    ])
+    return list(drift)
+
+
+def ensure_perfume_counters(conn):
+    """Triggery liczników; przy pierwszym utworzeniu przelicza wszystkie perfumy."""
+    exists = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'order_items_counters_ai'"
+    )).first()
+    for ddl in PERFUME_COUNTERS_DDL:
+        conn.execute(text(ddl))
+    if not exists:
+        with OrmSession(bind=conn) as session:
+            rebuild_counters(session)
+            session.commit()  # w transakcji conn – zatwierdzi ją engine.begin()
@@ -0,0 +1,169 @@
+# models/schema.py
+"""Wersjonowane migracje schematu.
+
+Numer ostatniej wykonanej migracji jest zapisany w tabeli ``schema_version``;
+przy starcie wykonywane są tylko nowsze, każda w osobnej transakcji. Nowa
+zmiana schematu = nowa pozycja na końcu ``MIGRATIONS`` (numerów nie zmieniamy).
+
+Ręczne uruchomienie::
+
+    python -m models.schema           # migracje
+    python -m models.schema --status  # wersja bazy i lista migracji
+"""
+
+import sys
+from datetime import datetime
+
+from sqlalchemy import inspect, text, or_
+from sqlalchemy.orm import Session as OrmSession
+
+from models.database import Base, engine, query_log
+from models.order import Order
+from models.note import ensure_note_vocabulary
+from models.image import ensure_image_store
+from models.search_index import ensure_perfumes_fts, ensure_orders_search, order_search_text
+from models.perfume_counters import ensure_perfume_counters
+
+ORPHANED_ITEMS_TABLE = "order_items_orphaned"
+
+SCHEMA_VERSION_DDL = """CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    description TEXT NOT NULL,
+    applied_at TEXT NOT NULL
+)"""
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# KROKI MIGRACJI
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _add_missing_columns(conn):
+    """ALTER TABLE ADD COLUMN dla kolumn modeli, których brak w bazie."""
+    for table in Base.metadata.sorted_tables:
+        existing = {c["name"] for c in inspect(conn).get_columns(table.name)}
+        for col in table.columns:
+            if col.name not in existing:
+                col_type = col.type.compile(dialect=conn.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{col.name}" {col_type}'))
+
+
+def _create_indexes(conn):
+    """Indeksy zadeklarowane w modelach – create_all pomija je w istniejących tabelach.
+
+    Gorące ścieżki: order_items.order_id (pozycje zamówień), order_items.perfume_id
+    (statystyki perfum), orders.sale_date (zakres dat i sortowanie listy), perfumes.status.
+    """
+    # po nazwach z sqlite_master – checkfirst nie rozpoznaje indeksów na wyrażeniach
+    existing = {name for name, in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(conn)
+
+
+def _backfill_orders(conn):
+    """Uzupełnia etap i tekst wyszukiwania zamówień zapisanych przed ich dodaniem."""
+    with OrmSession(bind=conn) as session:
+        orders = session.query(Order).filter(
+            or_(Order.stage.is_(None), Order.search_text.is_(None))
+        ).all()
+        if orders:
+            session.bulk_update_mappings(Order, [
+                {"id": o.id, "stage": o.compute_stage(), "search_text": order_search_text(o)}
+                for o in orders
+            ])
+        session.commit()  # w transakcji conn – zatwierdzi ją engine.begin()
+
+
+def _move_orphaned_items(conn):
+    """Pozycje wskazujące nieistniejące zamówienie lub perfumy → ``order_items_orphaned``.
+
+    Starsze bazy działały bez kluczy obcych, więc usunięcie perfum lub zamówienia
+    mogło zostawić takie pozycje; okno zamówienia podmieniłoby brakujące perfumy
+    na pierwsze z listy. Pozycje są przenoszone (nie giną) i wypisywane w dzienniku.
+    """
+    orphaned = ("(order_id IS NOT NULL AND order_id NOT IN (SELECT id FROM orders))"
+                " OR (perfume_id IS NOT NULL AND perfume_id NOT IN (SELECT id FROM perfumes))")
+    rows = conn.execute(text(
+        f"SELECT id, order_id, perfume_id, quantity_ml, partial_sum FROM order_items WHERE {orphaned}"
+    )).all()
+    if not rows:
+        return
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {ORPHANED_ITEMS_TABLE} AS SELECT * FROM order_items WHERE 0"))
+    conn.execute(text(f"INSERT INTO {ORPHANED_ITEMS_TABLE} SELECT * FROM order_items WHERE {orphaned}"))
+    conn.execute(text(f"DELETE FROM order_items WHERE {orphaned}"))
+    for item_id, order_id, perfume_id, quantity_ml, partial_sum in rows:
+        query_log.warning(
+            "Pozycja %s (zamówienie %s, perfumy %s, %s ml, %s zł) bez zamówienia lub perfum"
+            " – przeniesiona do %s", item_id, order_id, perfume_id, quantity_ml, partial_sum,
+            ORPHANED_ITEMS_TABLE,
+        )
+
+
+def _split_sale_date_index(conn):
+    """ix_orders_sale_date był indeksem na coalesce(sale_date, '') – filtry zakresu dat
+    (eksport) porównują gołą kolumnę i go nie używały. Teraz to zwykły indeks kolumny,
+    a sortowanie listy ma ix_orders_sale_date_sort."""
+    sql = conn.execute(text(
+        "SELECT sql FROM sqlite_master WHERE type = 'index' AND name = 'ix_orders_sale_date'"
+    )).scalar()
+    if sql and "coalesce" in sql.lower():
+        conn.execute(text("DROP INDEX ix_orders_sale_date"))
+    _create_indexes(conn)
+
+
+# (numer, opis, krok(conn)) – tylko dopisywać na końcu
+MIGRATIONS = [
+    (1, "brakujące kolumny (dane kupującego, etap, is_flask/is_split pozycji…)", _add_missing_columns),
+    (2, "indeksy order_items.order_id/perfume_id, orders.sale_date, perfumes.status", _create_indexes),
+    (3, "etap i tekst wyszukiwania starszych zamówień", _backfill_orders),
+    (4, "indeks pełnotekstowy perfum (perfumes_fts)", ensure_perfumes_fts),
+    (5, "indeks wyszukiwania kupujących (orders_search)", ensure_orders_search),
+    (6, "słownik nut i powiązania perfume_notes", ensure_note_vocabulary),
+    (7, "zdjęcia przeniesione do perfume_images", ensure_image_store),
+    (8, "liczniki sprzedaży perfum utrzymywane triggerami", ensure_perfume_counters),
+    (9, "pozycje bez zamówienia lub perfum przeniesione do order_items_orphaned", _move_orphaned_items),
+    (10, "indeks orders.sale_date dla zakresu dat, osobny indeks sortowania", _split_sale_date_index),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# URUCHAMIANIE
+# ─────────────────────────────────────────────────────────────────────────────
+
+def schema_version(conn) -> int:
+    conn.execute(text(SCHEMA_VERSION_DDL))
+    return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar()
+
+
+def upgrade_schema(bind=None) -> int:
+    """Tworzy brakujące tabele i wykonuje zaległe migracje; zwraca wersję bazy."""
+    bind = bind or engine
+    Base.metadata.create_all(bind)  # nowe tabele; istniejących nie zmienia
+    with bind.begin() as conn:
+        version = schema_version(conn)
+
+    for number, description, step in MIGRATIONS:
+        if number <= version:
+            continue
+        with bind.begin() as conn:
+            step(conn)
+            conn.execute(
+                text("INSERT INTO schema_version (version, description, applied_at) VALUES (:v, :d, :t)"),
+                {"v": number, "d": description, "t": datetime.now().isoformat(timespec="seconds")},
+            )
+        version = number
+    return version
+
+
+if __name__ == "__main__":
+    if "--status" in sys.argv[1:]:
+        with engine.begin() as conn:
+            current = schema_version(conn)
+        print(f"Wersja bazy: {current} (najnowsza: {LATEST_VERSION})")
+        for number, description, _ in MIGRATIONS:
+            print(f"  [{'x' if number <= current else ' '}] {number}. {description}")
+    else:
+        print(f"Schemat bazy jest aktualny (wersja {upgrade_schema()}).")
@@ -0,0 +1,176 @@
+# models/search_index.py
+"""Indeksy wyszukiwania (SQLite FTS5).
+
+- ``perfumes_fts`` – marka, nazwa i nuty perfum,
+- ``orders_search`` – dane kontaktowe kupującego (trigramy → wyszukiwanie
+  fragmentów tekstu), po znormalizowanej kolumnie ``orders.search_text``.
+
+Oba są indeksami typu external content synchronizowanymi triggerami –
+działają także dla zapisów spoza ORM.
+
+Przebudowa istniejącej bazy::
+
+    python -m models.search_index --rebuild
+"""
+
+import re
+import sys
+import unicodedata
+
+from sqlalchemy import text, table, column, select, Integer
+
+from models.database import engine
+
+PERFUMES_FTS_COLUMNS = ("brand", "name", "top_notes", "heart_notes", "base_notes")
+
+_cols = ", ".join(PERFUMES_FTS_COLUMNS)
+_new_cols = ", ".join(f"new.{c}" for c in PERFUMES_FTS_COLUMNS)
+_old_cols = ", ".join(f"old.{c}" for c in PERFUMES_FTS_COLUMNS)
+
+PERFUMES_FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS perfumes_fts USING fts5(
+        {_cols},
+        content='perfumes', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS perfumes_fts_ai AFTER INSERT ON perfumes BEGIN
+        INSERT INTO perfumes_fts(rowid, {_cols}) VALUES (new.id, {_new_cols});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS perfumes_fts_ad AFTER DELETE ON perfumes BEGIN
+        INSERT INTO perfumes_fts(perfumes_fts, rowid, {_cols}) VALUES ('delete', old.id, {_old_cols});
+    END""",
+    # tylko kolumny tekstowe – aktualizacje liczników nie ruszają indeksu
+    f"""CREATE TRIGGER IF NOT EXISTS perfumes_fts_au AFTER UPDATE OF {_cols} ON perfumes BEGIN
+        INSERT INTO perfumes_fts(perfumes_fts, rowid, {_cols}) VALUES ('delete', old.id, {_old_cols});
+        INSERT INTO perfumes_fts(rowid, {_cols}) VALUES (new.id, {_new_cols});
+    END""",
+]
+
+ORDERS_SEARCH_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS orders_search USING fts5(
+        search_text, content='orders', content_rowid='id', tokenize='trigram'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS orders_search_ai AFTER INSERT ON orders BEGIN
+        INSERT INTO orders_search(rowid, search_text) VALUES (new.id, new.search_text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS orders_search_ad AFTER DELETE ON orders BEGIN
+        INSERT INTO orders_search(orders_search, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS orders_search_au AFTER UPDATE OF search_text ON orders BEGIN
+        INSERT INTO orders_search(orders_search, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+        INSERT INTO orders_search(rowid, search_text) VALUES (new.id, new.search_text);
+    END""",
+]
+
+_orders_search = table("orders_search", column("rowid", Integer), column("orders_search"))
+
+# trigramy – krótsze zapytania szukamy zwykłym LIKE po kolumnie
+TRIGRAM_MIN_LEN = 3
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+# litery, których NFKD nie rozkłada na literę bazową + znak diakrytyczny
+_FOLD_EXTRA = str.maketrans({"ł": "l", "đ": "d", "ø": "o", "ß": "ss", "æ": "ae", "œ": "oe"})
+
+
+def fold_text(value) -> str:
+    """Małe litery bez znaków diakrytycznych: "Łódź" → "lodz"."""
+    value = (value or "").casefold().translate(_FOLD_EXTRA)
+    decomposed = unicodedata.normalize("NFKD", value)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def order_search_text(order) -> str:
+    """Znormalizowany tekst wszystkich pól kontaktowych zamówienia."""
+    full_name = f"{order.first_name or ''} {order.last_name or ''}".strip()
+    phone_digits = "".join(ch for ch in (order.phone or "") if ch.isdigit())
+    parts = [order.name, order.buyer, full_name, order.email, order.phone, phone_digits]
+    return " | ".join(fold_text(p) for p in parts if p)
+
+
+def ensure_perfumes_fts(conn):
+    """Tworzy indeks i triggery; świeżo utworzony indeks od razu wypełnia."""
+    exists = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'perfumes_fts'"
+    )).first()
+    for ddl in PERFUMES_FTS_DDL:
+        conn.execute(text(ddl))
+    if not exists:
+        rebuild_perfumes_fts(conn)
+
+
+def rebuild_perfumes_fts(conn):
+    conn.execute(text("INSERT INTO perfumes_fts(perfumes_fts) VALUES ('rebuild')"))
+
+
+def ensure_orders_search(conn):
+    exists = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'orders_search'"
+    )).first()
+    for ddl in ORDERS_SEARCH_DDL:
+        conn.execute(text(ddl))
+    if not exists:
+        rebuild_orders_search(conn)
+
+
+def rebuild_orders_search(conn):
+    conn.execute(text("INSERT INTO orders_search(orders_search) VALUES ('rebuild')"))
+
+
+def build_fts_query(search_text: str):
+    """Zamienia "wanilia, czarna porz" na zapytanie FTS5.
+
+    Słowa kluczowe rozdzielone przecinkami są łączone przez AND, a każde
+    słowo jest dopasowywane jako prefiks. Zwraca None dla pustego tekstu.
+    """
+    terms = []
+    for keyword in search_text.split(","):
+        tokens = _TOKEN_RE.findall(keyword.lower())
+        terms.extend(f'"{t}"*' for t in tokens)
+    return " AND ".join(terms) or None
+
+
+def search_perfumes(session, search_text: str):
+    """Zwraca [(perfume_id, ranking)] od najlepiej dopasowanych (bm25).
+
+    Dla pustego zapytania zwraca None – brak filtra.
+    """
+    query = build_fts_query(search_text)
+    if query is None:
+        return None
+    rows = session.execute(
+        text("SELECT rowid, bm25(perfumes_fts) AS rank FROM perfumes_fts "
+             "WHERE perfumes_fts MATCH :q ORDER BY rank"),
+        {"q": query},
+    )
+    return [(pid, rank) for pid, rank in rows]
+
+
+def buyer_search_clause(query: str):
+    """Warunek WHERE dla wyszukiwarki kupującego albo None dla pustego tekstu.
+
+    Bez rozróżniania wielkości liter i znaków diakrytycznych ("lodz" → "Łódź");
+    dopasowuje dowolny fragment imienia, nazwiska, nazwy FB, e-maila i telefonu.
+    """
+    from models.order import Order
+    folded = " ".join(fold_text(query).split())
+    if not folded:
+        return None
+    if len(folded) < TRIGRAM_MIN_LEN:
+        escaped = folded.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return Order.search_text.like(f"%{escaped}%", escape="\\")
+    phrase = '"' + folded.replace('"', '""') + '"'
+    return Order.id.in_(
+        select(_orders_search.c.rowid).where(_orders_search.c.orders_search.op("MATCH")(phrase))
+    )
+
+
+if __name__ == "__main__":
+    if "--rebuild" in sys.argv[1:]:
+        with engine.begin() as conn:
+            ensure_perfumes_fts(conn)
+            rebuild_perfumes_fts(conn)
+            ensure_orders_search(conn)
+            rebuild_orders_search(conn)
+        print("Indeksy wyszukiwania zostały przebudowane.")
+    else:
+        print("Użycie: python -m models.search_index --rebuild")
@@ -0,0 +1,75 @@
+# models/stock_stats.py
+
+from dataclasses import dataclass
+
+from sqlalchemy import func, case
+
+from models.order_item import OrderItem
+
+DECANT_COST = 4.0          # doliczane do sprzedaży za każdą płatną pozycję
+EXTRA_COST_PER_ORDER = 3.0  # koszty dodatkowe (koperta itp.) za płatną pozycję
+
+# SQLite ma limit parametrów w jednym zapytaniu – większe zbiory dzielimy
+_IN_CHUNK = 500
+
+
+@dataclass(frozen=True)
+class PerfumeStats:
+    """Statystyki sprzedaży jednych perfum wyliczone z order_items."""
+    used_ml: float = 0.0
+    orders_cnt: int = 0
+    sales_sum: float = 0.0   # wartość płatnych pozycji + DECANT_COST za każdą
+    extra: float = 0.0       # koszty dodatkowe
+
+    def remaining(self, to_decant) -> float:
+        return max((to_decant or 0) - self.used_ml, 0)
+
+    def balance(self, purchase_price) -> float:
+        return self.sales_sum - (purchase_price or 0) - self.extra
+
+
+EMPTY_STATS = PerfumeStats()
+
+
+def stats_query(session):
+    """(perfume_id, ml, liczba płatnych pozycji, wartość płatnych pozycji) – GROUP BY perfume_id."""
+    paid = OrderItem.price_per_ml > 0
+    return (
+        session.query(
+            OrderItem.perfume_id,
+            func.coalesce(func.sum(OrderItem.quantity_ml), 0.0),
+            func.count(case((paid, 1))),
+            func.coalesce(func.sum(
+                case((paid, OrderItem.quantity_ml * OrderItem.price_per_ml), else_=0.0)
+            ), 0.0),
+        )
+        .group_by(OrderItem.perfume_id)
+    )
+
+
+def compute_stats(session, perfume_ids=None) -> dict:
+    """Zwraca {perfume_id: PerfumeStats} policzone jednym GROUP BY.
+
+    Bez ``perfume_ids`` liczy dla wszystkich perfum; z podanym zbiorem
+    id – tylko dla nich (np. odświeżenie jednego wiersza). Perfumy bez
+    zamówień nie pojawiają się w wyniku – użyj ``stats.get(pid, EMPTY_STATS)``.
+    """
+    if perfume_ids is None:
+        rows = stats_query(session).all()
+    else:
+        ids = list(set(perfume_ids))
+        rows = []
+        for i in range(0, len(ids), _IN_CHUNK):
+            chunk = ids[i:i + _IN_CHUNK]
+            rows.extend(stats_query(session).filter(OrderItem.perfume_id.in_(chunk)).all())
+
+    result = {}
+    for pid, used_ml, cnt, paid_sum in rows:
+        cnt = int(cnt or 0)
+        result[pid] = PerfumeStats(
+            used_ml=float(used_ml or 0),
+            orders_cnt=cnt,
+            sales_sum=float(paid_sum or 0) + cnt * DECANT_COST,
+            extra=cnt * EXTRA_COST_PER_ORDER,
+        )
+    return result
@@ -0,0 +1,299 @@
+# services/export.py
+"""Eksport perfum, zamówień i pozycji zamówień do CSV / XLSX.
+
+Wiersze są czytane kursorem porcjami (``yield_per``) i od razu dopisywane do
+pliku (``csv.writer``, skoroszyt openpyxl w trybie ``write_only``) – zużycie
+pamięci nie zależy od długości historii.
+
+XLSX wymaga pakietu ``openpyxl`` (opcjonalny, importowany dopiero przy
+eksporcie). CSV jest zapisywany w UTF-8 z BOM, ze średnikiem i przecinkiem
+dziesiętnym – tak, jak go otwiera polski Excel.
+
+Bez interfejsu::
+
+    python -m services.export orders zamowienia.xlsx --from 2024-01-01 --to 2024-12-31
+    python -m services.export sales sprzedaz.csv --status Zakończone
+"""
+
+import csv
+import os
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import select, func
+
+from models.order import Order, STAGES
+from models.order_item import OrderItem
+from models.perfume import Perfume
+
+FETCH_SIZE = 1000
+CSV_DELIMITER = ";"
+CSV_DECIMAL = ","
+FORMATS = ("csv", "xlsx")
+PERFUME_STATUSES = ["Dostępny", "Niedostępny"]
+
+
+class ExportCancelled(Exception):
+    """Eksport przerwany przez użytkownika."""
+
+
+@contextmanager
+def replacing(path):
+    """Ścieżka pliku tymczasowego obok ``path``; po udanym zapisie zastępuje on ``path``.
+
+    Przerwany lub nieudany eksport usuwa tylko plik tymczasowy – plik, który
+    użytkownik wybrał do nadpisania, zostaje nietknięty.
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    stem, ext = os.path.splitext(name)
+    temp_path = os.path.join(directory, f".{stem}.{uuid.uuid4().hex[:8]}.tmp{ext}")
+    try:
+        yield temp_path
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+@dataclass(frozen=True)
+class ExportFilter:
+    """Zakres eksportu; daty dotyczą daty sprzedaży zamówienia (obie włącznie)."""
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    status: Optional[str] = None  # status perfum albo etap zamówienia
+
+
+class Dataset:
+    """Zestaw kolumn do eksportu: (nagłówek, wyrażenie) i sposób filtrowania."""
+
+    __slots__ = ("key", "title", "columns", "statuses", "has_dates", "_from", "_status_col")
+
+    def __init__(self, key, title, columns, statuses, select_from, status_col, has_dates=True):
+        self.key = key
+        self.title = title
+        self.columns = columns
+        self.statuses = statuses
+        self.has_dates = has_dates
+        self._from = select_from
+        self._status_col = status_col
+
+    @property
+    def headers(self):
+        return [header for header, _ in self.columns]
+
+    def statement(self, flt=ExportFilter()):
+        stmt = self._from(select(*[col for _, col in self.columns]))
+        if flt.status:
+            stmt = stmt.where(self._status_col == flt.status)
+        if self.has_dates and flt.date_from:
+            stmt = stmt.where(Order.sale_date >= flt.date_from)
+        if self.has_dates and flt.date_to:
+            stmt = stmt.where(Order.sale_date <= flt.date_to)
+        return stmt
+
+
+_ORDER_COLUMNS = [
+    ("Nr zamówienia", Order.id),
+    ("Nazwa FB", func.coalesce(Order.name, Order.buyer)),
+    ("Imię", Order.first_name),
+    ("Nazwisko", Order.last_name),
+    ("E-mail", Order.email),
+    ("Telefon", Order.phone),
+    ("Etap", Order.stage),
+    ("Data sprzedaży", Order.sale_date),
+]
+
+DATASETS = {
+    dataset.key: dataset for dataset in [
+        Dataset(
+            "perfumes", "Perfumy",
+            [
+                ("Id", Perfume.id),
+                ("Marka", Perfume.brand),
+                ("Nazwa", Perfume.name),
+                ("Status", Perfume.status),
+                ("Do odlania [ml]", Perfume.to_decant),
+                ("Pozostało [ml]", Perfume.available_ml),
+                ("Cena/ml [zł]", Perfume.price_per_ml),
+                ("Cena zakupu [zł]", Perfume.purchase_price),
+                ("Liczba zamówień", Perfume.order_count),
+                ("Sprzedaż [zł]", Perfume.selling_price),
+                ("Koszty dodatkowe [zł]", Perfume.extra_costs),
+                ("Bilans [zł]", Perfume.balance),
+                ("Rozbiórka", Perfume.is_split),
+                ("Nuty głowy", Perfume.top_notes),
+                ("Nuty serca", Perfume.heart_notes),
+                ("Nuty bazy", Perfume.base_notes),
+                ("Fragrantica", Perfume.fragrantica_url),
+            ],
+            PERFUME_STATUSES,
+            lambda stmt: stmt.order_by(Perfume.brand, Perfume.name, Perfume.id),
+            Perfume.status,
+            has_dates=False,
+        ),
+        Dataset(
+            "orders", "Zamówienia",
+            _ORDER_COLUMNS + [
+                ("Wysyłka [zł]", Order.shipping),
+                ("Suma [zł]", Order.total),
+                ("Rozbiórka", Order.is_split),
+                ("Data potwierdzenia", Order.confirmation_date),
+                ("Uwagi", Order.notes),
+            ],
+            STAGES,
+            lambda stmt: stmt.order_by(Order.id),
+            Order.stage,
+        ),
+        Dataset(
+            "order_items", "Pozycje zamówień",
+            [
+                ("Id", OrderItem.id),
+                ("Nr zamówienia", OrderItem.order_id),
+                ("Id perfum", OrderItem.perfume_id),
+                ("Ilość [ml]", OrderItem.quantity_ml),
+                ("Cena/ml [zł]", OrderItem.price_per_ml),
+                ("Wartość [zł]", OrderItem.partial_sum),
+                ("Flakon", OrderItem.is_flask),
+                ("Rozbiórka", OrderItem.is_split),
+            ],
+            STAGES,
+            lambda stmt: stmt.join(Order, OrderItem.order_id == Order.id).order_by(OrderItem.id),
+            Order.stage,
+        ),
+        Dataset(
+            "sales", "Sprzedaż (pozycje z zamówieniem i perfumami)",
+            _ORDER_COLUMNS + [
+                ("Marka", Perfume.brand),
+                ("Perfumy", Perfume.name),
+                ("Ilość [ml]", OrderItem.quantity_ml),
+                ("Cena/ml [zł]", OrderItem.price_per_ml),
+                ("Wartość [zł]", OrderItem.partial_sum),
+                ("Flakon", OrderItem.is_flask),
+                ("Rozbiórka", OrderItem.is_split),
+            ],
+            STAGES,
+            lambda stmt: stmt.select_from(OrderItem)
+            .join(Order, OrderItem.order_id == Order.id)
+            .outerjoin(Perfume, OrderItem.perfume_id == Perfume.id)
+            .order_by(OrderItem.order_id, OrderItem.id),
+            Order.stage,
+        ),
+    ]
+}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# ZAPIS
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _cell(value):
+    if isinstance(value, bool):
+        return "tak" if value else "nie"
+    return value
+
+
+class _CsvWriter:
+    def __init__(self, path):
+        self._file = open(path, "w", encoding="utf-8-sig", newline="")
+        self._writer = csv.writer(self._file, delimiter=CSV_DELIMITER)
+
+    def write(self, row):
+        self._writer.writerow(self._text(v) for v in row)
+
+    @staticmethod
+    def _text(value):
+        if value is None:
+            return ""
+        if isinstance(value, date):
+            return value.isoformat()
+        if isinstance(value, float):
+            return repr(value).replace(".", CSV_DECIMAL)
+        return value
+
+    def close(self):
+        self._file.close()
+
+
+class _XlsxWriter:
+    def __init__(self, path, sheet_title):
+        try:
+            from openpyxl import Workbook
+        except ImportError:
+            raise RuntimeError("Eksport do XLSX wymaga pakietu openpyxl (pip install openpyxl).") from None
+        self._path = path
+        self._book = Workbook(write_only=True)  # wiersze trafiają do pliku tymczasowego, nie do pamięci
+        self._sheet = self._book.create_sheet(sheet_title[:31])
+
+    def write(self, row):
+        self._sheet.append(list(row))
+
+    def close(self):
+        self._book.save(self._path)
+
+
+def format_for(path):
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    if ext not in FORMATS:
+        raise ValueError(f"Nieobsługiwany format pliku: {path} (csv lub xlsx)")
+    return ext
+
+
+def count_rows(session, dataset, flt=ExportFilter()):
+    stmt = dataset.statement(flt).order_by(None)
+    return session.execute(select(func.count()).select_from(stmt.subquery())).scalar()
+
+
+def export_dataset(path, session, dataset_key, flt=ExportFilter(), progress=None, is_cancelled=None):
+    """Zapisuje zestaw ``dataset_key`` do ``path`` (format wg rozszerzenia); zwraca liczbę wierszy.
+
+    ``progress(zrobione, wszystkie)`` po każdej porcji; ``is_cancelled()`` zwracające
+    True przerywa eksport wyjątkiem ExportCancelled. Wiersze trafiają do pliku
+    tymczasowego (``replacing``) – przerwany eksport nie zmienia istniejącego ``path``.
+    """
+    dataset = DATASETS[dataset_key]
+    fmt = format_for(path)
+    total = count_rows(session, dataset, flt)
+    done = 0
+    with replacing(path) as temp_path:
+        writer = _CsvWriter(temp_path) if fmt == "csv" else _XlsxWriter(temp_path, dataset.title)
+        try:
+            writer.write(dataset.headers)
+            result = session.execute(dataset.statement(flt).execution_options(yield_per=FETCH_SIZE))
+            for rows in result.partitions():
+                for row in rows:
+                    writer.write(_cell(v) for v in row)
+                done += len(rows)
+                if is_cancelled and is_cancelled():
+                    raise ExportCancelled()
+                if progress:
+                    progress(done, total)
+        finally:
+            writer.close()
+    return done
+
+
+def _parse_date(value):
+    return date.fromisoformat(value) if value else None
+
+
+if __name__ == "__main__":
+    import argparse
+    from models.database import Session
+
+    parser = argparse.ArgumentParser(description="Eksport danych do CSV / XLSX.")
+    parser.add_argument("dataset", choices=list(DATASETS))
+    parser.add_argument("path", help="plik .csv lub .xlsx")
+    parser.add_argument("--from", dest="date_from", type=_parse_date, help="data sprzedaży od (RRRR-MM-DD)")
+    parser.add_argument("--to", dest="date_to", type=_parse_date, help="data sprzedaży do (RRRR-MM-DD)")
+    parser.add_argument("--status", help="status perfum albo etap zamówienia")
+    args = parser.parse_args()
+
+    count = export_dataset(args.path, Session(), args.dataset,
+                           ExportFilter(args.date_from, args.date_to, args.status))
+    print(f"Zapisano {count} wierszy do {args.path}.")
@@ -0,0 +1,184 @@
+# services/order_lines.py
+"""Pozycje zamówienia w trakcie edycji – jedno źródło danych dla okna zamówienia.
+
+``OrderLines`` trzyma lekkie rekordy ``OrderLine`` i sumy bieżące (wartość
+pozycji płatnych, ich liczbę, wysyłkę). Każda zmiana pozycji odejmuje jej stary
+wkład i dodaje nowy, więc suma zamówienia nie wymaga przeliczania wszystkich
+wierszy. Zapis, wiadomość dla kupującego i etykieta sumy czytają z tego modelu.
+
+Zapis edytowanego zamówienia (``sync_order_items``) porównuje pozycje z tymi w
+bazie po ``item_id``: niezmienione zostają nietknięte, zmienione dostają UPDATE
+tylko zmienionych kolumn, nowe – INSERT, usunięte – DELETE. Id pozycji się nie
+zmieniają, a triggery liczników perfum działają tylko dla faktycznych zmian.
+"""
+
+from models.database import current_action, query_log
+from models.order_item import OrderItem
+
+ORDER_VIAL_COST = 4.0
+SHIPPING_OPTIONS = {"InPost": 12.0, "DPD": 10.0, "Własna etykieta": 0.0}
+
+
+def shipping_cost(key):
+    return 0.0 if key == "Własna etykieta" else SHIPPING_OPTIONS.get(key, 0.0)
+
+
+class OrderLine:
+    """Jedna pozycja: perfumy, ilość, cena za ml i flagi; ``item_id`` – zapisana pozycja albo None."""
+    __slots__ = ("item_id", "perfume_id", "quantity_ml", "price_per_ml", "is_gratis", "is_flask", "is_split")
+
+    def __init__(self, perfume_id=None, quantity_ml=0.0, price_per_ml=0.0,
+                 is_gratis=False, is_flask=False, is_split=False, item_id=None):
+        self.item_id = item_id
+        self.perfume_id = perfume_id
+        self.quantity_ml = quantity_ml
+        self.price_per_ml = 0.0 if is_gratis else price_per_ml
+        self.is_gratis = is_gratis
+        self.is_flask = is_flask
+        self.is_split = is_split
+
+    @property
+    def partial_sum(self):
+        return 0.0 if self.is_gratis else round(self.price_per_ml * self.quantity_ml, 2)
+
+    @property
+    def is_paid(self):
+        return not self.is_gratis
+
+    def item_values(self):
+        """Kolumny ``OrderItem`` odpowiadające tej pozycji."""
+        return {
+            "perfume_id": self.perfume_id,
+            "quantity_ml": self.quantity_ml,
+            "price_per_ml": self.price_per_ml,
+            "partial_sum": self.partial_sum,
+            "is_flask": bool(self.is_flask),
+            "is_split": bool(self.is_split),
+        }
+
+
+class OrderLines:
+    """Lista pozycji (indeks = wiersz tabeli) z sumami aktualizowanymi przy każdej zmianie."""
+
+    def __init__(self, shipping_key=None):
+        self._lines = []
+        self._paid_sum = 0.0
+        self._paid_count = 0
+        self._split_count = 0
+        self.shipping_key = shipping_key
+
+    def __len__(self):
+        return len(self._lines)
+
+    def __iter__(self):
+        return iter(self._lines)
+
+    def __getitem__(self, row):
+        return self._lines[row]
+
+    def append(self, line):
+        self._lines.append(line)
+        self._count(line, 1)
+        return line
+
+    def remove(self, row):
+        self._count(self._lines.pop(row), -1)
+
+    def update(self, row, **changes):
+        """Zmienia pola pozycji ``row`` i koryguje sumy o różnicę; zwraca pozycję."""
+        line = self._lines[row]
+        self._count(line, -1)
+        for field, value in changes.items():
+            setattr(line, field, value)
+        if line.is_gratis:
+            line.price_per_ml = 0.0
+        self._count(line, 1)
+        return line
+
+    def _count(self, line, sign):
+        if line.is_paid:
+            self._paid_sum += sign * line.partial_sum
+            self._paid_count += sign
+        if line.is_split:
+            self._split_count += sign
+
+    @property
+    def paid_count(self):
+        return self._paid_count
+
+    @property
+    def vial_cost(self):
+        return self._paid_count * ORDER_VIAL_COST
+
+    @property
+    def shipping_cost(self):
+        return shipping_cost(self.shipping_key)
+
+    @property
+    def items_sum(self):
+        """Wartość pozycji płatnych (bez fiolek i wysyłki)."""
+        return round(self._paid_sum, 2)
+
+    @property
+    def total(self):
+        return round(self._paid_sum + self.vial_cost + self.shipping_cost, 2)
+
+    @property
+    def is_split(self):
+        return self._split_count > 0
+
+    def has_paid_line(self):
+        """Czy choć jedna pozycja jest płatna i ma cenę (zamówienie nie może być samym gratisem)."""
+        return any(line.is_paid and line.price_per_ml > 0 for line in self._lines)
+
+
+class ItemChanges:
+    """Liczba pozycji dodanych, zmienionych, usuniętych i pozostawionych bez zmian."""
+    __slots__ = ("inserted", "updated", "deleted", "unchanged")
+
+    def __init__(self):
+        self.inserted = 0
+        self.updated = 0
+        self.deleted = 0
+        self.unchanged = 0
+
+    @property
+    def affected(self):
+        return self.inserted + self.updated + self.deleted
+
+    def summary(self):
+        return (f"pozycje: dodane {self.inserted}, zmienione {self.updated}, "
+                f"usunięte {self.deleted}, bez zmian {self.unchanged}")
+
+
+def sync_order_items(order, lines):
+    """Dopasowuje ``order.items`` do ``lines`` samymi różnicami; zapis przy flush/commit sesji.
+
+    Zwraca ItemChanges i dopisuje je do dziennika zapytań bieżącej akcji.
+    """
+    existing = {item.id: item for item in order.items if item.id is not None}
+    changes = ItemChanges()
+    for line in lines:
+        values = line.item_values()
+        item = existing.pop(line.item_id, None) if line.item_id is not None else None
+        if item is None:
+            order.items.append(OrderItem(**values))
+            changes.inserted += 1
+            continue
+        changed = {field: value for field, value in values.items() if getattr(item, field) != value}
+        for field, value in changed.items():
+            setattr(item, field, value)
+        if changed:
+            changes.updated += 1
+        else:
+            changes.unchanged += 1
+    for item in existing.values():
+        order.items.remove(item)  # delete-orphan – DELETE przy flush
+        changes.deleted += 1
+
+    action = current_action()
+    query_log.info("%s (zamówienie %s): %s",
+                   action.name if action else "Zapis pozycji", order.id, changes.summary())
+    if action is not None:
+        action.add_rows(changes.affected)
+    return changes
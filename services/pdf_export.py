@@ -0,0 +1,165 @@
+# services/pdf_export.py
+"""Katalog perfum w PDF, składany strona po stronie.
+
+Wiersze są czytane strumieniowo (``yield_per``) z liczników w tabeli perfum.
+Jeden element dokumentu (``_CatalogTable``) przy każdym podziale strony
+pobiera tyle wierszy, ile się na niej mieści, i oddaje je jako zwykłą tabelę
+z nagłówkiem – w pamięci jest tylko bieżąca strona, nie cała lista wierszy.
+"""
+
+import os
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import Flowable, SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+from models.perfume import Perfume
+from services.export import ExportCancelled, replacing
+
+FONT_NAME = "DejaVuSans"
+FALLBACK_FONT = "Helvetica"  # wbudowana w reportlab, bez polskich znaków
+BUNDLED_FONT = os.path.join(os.path.dirname(os.path.dirname(__file__)), "ui", "DejaVuSans.ttf")
+
+EXPORT_COLUMNS = [
+    ("Marka", "brand"),
+    ("Nazwa", "name"),
+    ("Cena/ml [zł]", "price_per_ml"),
+    ("Pozostało [ml]", "remaining_ml"),
+    ("Link do Fragrantici", "fragrantica_url"),
+]
+COL_WIDTHS = [90, 170, 85, 90, 210]
+PROGRESS_ROWS = 200  # co tyle wierszy postęp i sprawdzenie przerwania
+FETCH_SIZE = 500
+
+
+@lru_cache(maxsize=None)
+def register_pdf_font():
+    """Rejestruje czcionkę z polskimi znakami (raz na proces); zwraca jej nazwę."""
+    font_path = BUNDLED_FONT if os.path.isfile(BUNDLED_FONT) else _find_system_font()
+    if not font_path:
+        return FALLBACK_FONT
+    pdfmetrics.registerFont(TTFont(FONT_NAME, font_path))
+    return FONT_NAME
+
+
+def _find_system_font():
+    # przeszukuje cały system plików – tylko, gdy brak czcionki przy aplikacji
+    try:
+        import matplotlib.font_manager as fm
+    except ImportError:
+        return None
+    return next((f for f in fm.findSystemFonts() if "DejaVuSans" in os.path.basename(f)), None)
+
+
+def catalog_query(session):
+    """Kolumny katalogu – bez obiektów ORM (liczniki mogły zmienić triggery)."""
+    return session.query(
+        Perfume.brand, Perfume.name, Perfume.price_per_ml, Perfume.available_ml.label("remaining"), Perfume.fragrantica_url,
+    ).order_by(Perfume.brand.asc(), Perfume.name.asc())
+
+
+def _format_ml(value):
+    return str(int(value)) if float(value).is_integer() else f"{value:.2f}"
+
+
+class _CatalogTable(Flowable):
+    """Tabela z wierszy czytanych strumieniowo, dzielona na strony przez ``split``.
+
+    Wysokość całości nie jest znana, więc ``wrap`` zgłasza więcej niż dostępne
+    miejsce i reportlab prosi o podział: ``split`` mierzy kolejne wiersze i oddaje
+    stronę jako ``Table`` z nagłówkiem oraz nowy _CatalogTable z resztą strumienia.
+    """
+
+    def __init__(self, header, rows, col_widths, style, pending=None):
+        super().__init__()
+        self._header = header
+        self._rows = rows  # iterator wierszy (listy komórek)
+        self._col_widths = col_widths
+        self._style = style
+        self._pending = pending  # wiersz pobrany, ale jeszcze nie umieszczony na stronie
+
+    def _table(self, rows):
+        return Table([self._header] + rows, colWidths=self._col_widths, repeatRows=1, style=self._style)
+
+    def _row_height(self, row, avail_width, avail_height):
+        return Table([row], colWidths=self._col_widths, style=self._style).wrap(avail_width, avail_height)[1]
+
+    def wrap(self, avail_width, avail_height):
+        return avail_width, avail_height + 1
+
+    def split(self, avail_width, avail_height):
+        used = self._row_height(self._header, avail_width, avail_height)
+        page = []
+        row = self._pending if self._pending is not None else next(self._rows, None)
+        while row is not None:
+            used += self._row_height(row, avail_width, avail_height)
+            if used > avail_height:
+                break
+            page.append(row)
+            row = next(self._rows, None)
+        if not page and row is not None:
+            self._pending = row  # nie mieści się nawet jeden wiersz – następna ramka
+            return []
+        if row is None:
+            return [self._table(page)]
+        return [self._table(page), _CatalogTable(self._header, self._rows, self._col_widths, self._style, row)]
+
+    def draw(self):
+        pass  # rysowane są tylko tabele stron zwrócone przez split
+
+
+def write_catalog_pdf(path, session, progress=None, is_cancelled=None):
+    """Zapisuje katalog do ``path``; ``progress(zrobione, wszystkie)`` po każdej porcji.
+
+    ``is_cancelled()`` zwracające True przerywa eksport wyjątkiem ExportCancelled;
+    dokument powstaje w pliku tymczasowym, więc istniejący ``path`` zostaje wtedy nietknięty.
+    """
+    font = register_pdf_font()
+    total = session.query(Perfume.id).count()
+    styles = getSampleStyleSheet()
+    cell_style = ParagraphStyle('cell', parent=styles['Normal'], fontName=font, fontSize=10, leading=12)
+    table_style = TableStyle([
+        ('FONTNAME', (0, 0), (-1, -1), font),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
+        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+        ('GRID', (0, 0), (-1, -1), 0.3, colors.grey),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.whitesmoke, colors.lightgrey]),
+    ])
+
+    def rows():
+        done = 0
+        for row in catalog_query(session).yield_per(FETCH_SIZE):
+            yield [
+                Paragraph(escape(row.brand or ""), cell_style),
+                Paragraph(escape(row.name or ""), cell_style),
+                Paragraph(f"{row.price_per_ml or 0:.2f}", cell_style),
+                Paragraph(_format_ml(row.remaining), cell_style),
+                Paragraph(escape(row.fragrantica_url or ""), cell_style),
+            ]
+            done += 1
+            if done % PROGRESS_ROWS == 0:
+                _report(done)
+        _report(total)
+
+    def _report(done):
+        if is_cancelled and is_cancelled():
+            raise ExportCancelled()
+        if progress:
+            progress(min(done, total), total)
+
+    header = [header for header, _ in EXPORT_COLUMNS]
+    story = [
+        Paragraph("Lista perfum", styles["Title"]),
+        Spacer(1, 12),
+        _CatalogTable(header, rows(), COL_WIDTHS, table_style),
+    ]
+    with replacing(path) as temp_path:
+        doc = SimpleDocTemplate(temp_path, pagesize=landscape(A4), title="Lista perfum")
+        doc.build(story)
+    return total
@@ -0,0 +1,32 @@
+# services/perfume_counters.py
+"""Sprawdzenie i naprawa liczników sprzedaży perfum (``models/perfume_counters.py``)::
+
+    python -m services.perfume_counters --verify
+    python -m services.perfume_counters --rebuild
+"""
+
+import sys
+
+from models.database import Session
+from models.perfume_counters import find_drift, rebuild_counters
+
+
+def main(args):
+    if "--verify" in args or "--rebuild" in args:
+        session = Session()
+        drift = find_drift(session)
+        for pid, wrong in sorted(drift.items()):
+            details = ", ".join(f"{c}: {stored} → {expected:.2f}" for c, (stored, expected) in wrong.items())
+            print(f"perfumy {pid}: {details}")
+        if "--rebuild" in args:
+            rebuild_counters(session)
+            session.commit()
+            print(f"Poprawiono liczniki {len(drift)} perfum.")
+        else:
+            print(f"Rozjechane liczniki: {len(drift)} perfum.")
+    else:
+        print("Użycie: python -m services.perfume_counters --verify | --rebuild")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,242 @@
+# services/perfume_import.py
+"""Hurtowy import katalogu perfum z CSV (arkusz od dostawcy).
+
+Nagłówki po polsku (jak w eksporcie ``services/export.py``) albo nazwy pól
+``Perfume``; wielkość liter i kolejność kolumn nie mają znaczenia::
+
+    Marka;Nazwa;Do odlania [ml];Cena/ml [zł];Cena zakupu [zł];Nuty głowy;Nuty serca;Nuty bazy;Płeć;Sezony;Fragrantica
+    Dior;Sauvage;100;4,5;420;bergamota, pieprz;lawenda;ambroksan;męskie;wiosna, lato;https://…
+
+Kolumny Marka i Nazwa są wymagane (w pliku i w każdym wierszu). Perfumy o tej
+samej marce i nazwie (bez rozróżniania wielkości liter i spacji) są
+aktualizowane – tylko kolumnami danych obecnymi w pliku, niepustymi i różnymi
+od zapisanych; marka i nazwa zostają w zapisanej pisowni – pozostałe dopisywane. Błędne wiersze są pomijane i zgłaszane
+z numerem linii; poprawne trafiają do bazy w jednej transakcji. Liczniki
+i indeks wyszukiwania uzupełniają triggery, powiązania nut –
+``rebuild_note_links``, a katalog i widoki dowiadują się o zmianach
+z ``mark_changed`` (``models/changes.py``) – zapis hurtowy omija ORM.
+
+    python -m services.perfume_import dostawa.csv [--dry-run]
+"""
+
+import csv
+import io
+import sys
+
+from models.changes import mark_changed
+from models.note import rebuild_note_links, split_notes
+from models.perfume import Perfume
+
+ENCODINGS = ("utf-8-sig", "cp1250")  # Excel zapisuje CSV w UTF-8 albo w stronie kodowej Windows
+DELIMITERS = ";,\t"  # ten, którego w nagłówku jest najwięcej
+
+# nagłówek (po casefold) → pole Perfume; "gender" i "seasons" rozpisywane niżej
+HEADER_FIELDS = {
+    "marka": "brand", "brand": "brand",
+    "nazwa": "name", "name": "name",
+    "do odlania [ml]": "to_decant", "do odlania": "to_decant", "to_decant": "to_decant",
+    "cena/ml [zł]": "price_per_ml", "cena/ml": "price_per_ml", "price_per_ml": "price_per_ml",
+    "cena zakupu [zł]": "purchase_price", "cena zakupu": "purchase_price", "purchase_price": "purchase_price",
+    "nuty głowy": "top_notes", "top_notes": "top_notes",
+    "nuty serca": "heart_notes", "heart_notes": "heart_notes",
+    "nuty bazy": "base_notes", "base_notes": "base_notes",
+    "fragrantica": "fragrantica_url", "link do fragrantici": "fragrantica_url",
+    "fragrantica_url": "fragrantica_url",
+    "płeć": "gender", "gender": "gender",
+    "sezony": "seasons", "seasons": "seasons",
+}
+KEY_FIELDS = ("brand", "name")  # klucz dopasowania – przy aktualizacji nie nadpisywany
+NUMBER_FIELDS = {"to_decant": "Do odlania", "price_per_ml": "Cena/ml", "purchase_price": "Cena zakupu"}
+NOTE_FIELDS = ("top_notes", "heart_notes", "base_notes")
+IMPORTED_FIELDS = (
+    "brand", "name", *NUMBER_FIELDS, *NOTE_FIELDS, "fragrantica_url",
+    "is_feminine", "is_masculine", "is_unisex",
+    "season_spring", "season_summer", "season_autumn", "season_winter",
+)
+
+GENDERS = {
+    "damskie": "is_feminine", "damski": "is_feminine", "feminine": "is_feminine",
+    "męskie": "is_masculine", "męski": "is_masculine", "masculine": "is_masculine",
+    "unisex": "is_unisex",
+}
+SEASONS = {
+    "wiosna": "season_spring", "spring": "season_spring",
+    "lato": "season_summer", "summer": "season_summer",
+    "jesień": "season_autumn", "autumn": "season_autumn",
+    "zima": "season_winter", "winter": "season_winter",
+}
+
+
+def perfume_key(brand, name):
+    """Klucz deduplikacji: marka + nazwa bez zbędnych spacji i wielkości liter."""
+    return (" ".join((brand or "").split()).casefold(), " ".join((name or "").split()).casefold())
+
+
+class ImportReport:
+    """Wynik importu: liczby wstawionych/zaktualizowanych i błędy (linia, opis)."""
+
+    __slots__ = ("inserted", "updated", "unchanged", "errors", "perfume_ids")
+
+    def __init__(self):
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.errors = []
+        self.perfume_ids = []
+
+    def summary(self):
+        text = f"Dodano {self.inserted}, zaktualizowano {self.updated} perfum"
+        text += f" ({self.unchanged} bez zmian)." if self.unchanged else "."
+        if self.errors:
+            text += f" Pominięto {len(self.errors)} błędnych wierszy."
+        return text
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# CZYTANIE I WALIDACJA
+# ─────────────────────────────────────────────────────────────────────────────
+
+def read_csv_text(path):
+    with open(path, "rb") as f:
+        raw = f.read()
+    for encoding in ENCODINGS:
+        try:
+            return raw.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    raise ValueError("Nie rozpoznano kodowania pliku (oczekiwano UTF-8 lub Windows-1250).")
+
+
+def _number(value):
+    number = float(value.replace(" ", "").replace(",", "."))
+    if number < 0:
+        raise ValueError
+    return number
+
+
+def _flags(value, names, label):
+    """"wiosna, lato" → {"season_spring": True, "season_summer": True, …reszta False}."""
+    flags = dict.fromkeys(set(names.values()), False)
+    for word in split_notes(value.replace(";", ",").replace("/", ",")):
+        field = names.get(word.casefold())
+        if field is None:
+            raise ValueError(f"nieznana wartość „{word}” w kolumnie {label}")
+        flags[field] = True
+    return flags
+
+
+def parse_row(row):
+    """Komórki wiersza (pole → tekst) → wartości Perfume; ValueError z opisem błędu."""
+    values = {}
+    for field, raw in row.items():
+        text = (raw or "").strip()
+        if not text:
+            continue
+        if field in NUMBER_FIELDS:
+            try:
+                values[field] = _number(text)
+            except ValueError:
+                raise ValueError(f"niepoprawna liczba w kolumnie {NUMBER_FIELDS[field]}: „{text}”") from None
+        elif field == "gender":
+            values.update(_flags(text, GENDERS, "Płeć"))
+        elif field == "seasons":
+            values.update(_flags(text, SEASONS, "Sezony"))
+        elif field in NOTE_FIELDS:
+            values[field] = ", ".join(split_notes(text))
+        else:
+            values[field] = " ".join(text.split()) if field in ("brand", "name") else text
+    if not values.get("brand"):
+        raise ValueError("brak marki perfum")
+    if not values.get("name"):
+        raise ValueError("brak nazwy perfum")
+    return values
+
+
+def parse_csv(text):
+    """Zwraca (lista (linia, wartości), błędy) – bez dostępu do bazy."""
+    first_line = text.split("\n", 1)[0]
+    delimiter = max(DELIMITERS, key=first_line.count)
+    reader = csv.reader(io.StringIO(text), delimiter=delimiter)
+    header = next(reader, None)
+    if not header:
+        raise ValueError("Plik jest pusty.")
+    fields = [HEADER_FIELDS.get(h.strip().casefold()) for h in header]
+    # marka i nazwa to klucz deduplikacji – bez marki "Sauvage" nie trafiłby na "Dior / Sauvage"
+    for field, label in (("brand", "Marka"), ("name", "Nazwa")):
+        if field not in fields:
+            raise ValueError(f"Brak kolumny „{label}”.")
+
+    rows, errors = [], []
+    for cells in reader:
+        if not any(c.strip() for c in cells):
+            continue
+        line_no = reader.line_num  # ostatnia linia rekordu (komórki mogą mieć znaki nowej linii)
+        row = {f: c for f, c in zip(fields, cells) if f}
+        try:
+            rows.append((line_no, parse_row(row)))
+        except ValueError as e:
+            errors.append((line_no, str(e)))
+    return rows, errors
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# ZAPIS
+# ─────────────────────────────────────────────────────────────────────────────
+
+def import_perfumes(session, text, dry_run=False):
+    """Importuje CSV (tekst) w jednej transakcji; zwraca ImportReport."""
+    report = ImportReport()
+    rows, report.errors = parse_csv(text)
+
+    # jedno zapytanie o cały katalog – porównanie i deduplikacja w pamięci
+    existing = {
+        perfume_key(row.brand, row.name): row
+        for row in session.query(Perfume.id, *[getattr(Perfume, f) for f in IMPORTED_FIELDS])
+    }
+    inserts, updates, seen = [], [], {}
+    for line_no, values in rows:
+        key = perfume_key(values.get("brand"), values["name"])
+        if key in seen:
+            report.errors.append((line_no, f"te same perfumy co w linii {seen[key]}"))
+            continue
+        seen[key] = line_no
+        current = existing.get(key)
+        if current is None:
+            inserts.append({"status": "Dostępny", **values})
+            continue
+        changed = {f: v for f, v in values.items() if f not in KEY_FIELDS and getattr(current, f) != v}
+        if changed:
+            updates.append({"id": current.id, **changed})
+        else:
+            report.unchanged += 1
+    report.errors.sort()
+    report.inserted, report.updated = len(inserts), len(updates)
+    if dry_run:
+        return report
+
+    try:
+        session.bulk_insert_mappings(Perfume, inserts, return_defaults=True)  # nadaje id
+        session.bulk_update_mappings(Perfume, updates)
+        report.perfume_ids = [m["id"] for m in inserts] + [m["id"] for m in updates]
+        noted = [m["id"] for m in inserts + updates if any(f in m for f in NOTE_FIELDS)]
+        if noted:
+            rebuild_note_links(session, noted)
+        mark_changed(session, perfume_ids=report.perfume_ids)  # zapis hurtowy omija zdarzenia ORM
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    return report
+
+
+if __name__ == "__main__":
+    from models.database import Session
+
+    args = sys.argv[1:]
+    if not args:
+        print("Użycie: python -m services.perfume_import plik.csv [--dry-run]")
+        sys.exit(2)
+    report = import_perfumes(Session(), read_csv_text(args[0]), dry_run="--dry-run" in args)
+    for line_no, message in report.errors:
+        print(f"linia {line_no}: {message}")
+    print(("[próba] " if "--dry-run" in args else "") + report.summary())
@@ -0,0 +1,91 @@
+# services/query_plans.py
+"""Sprawdza (EXPLAIN QUERY PLAN), czy zapytania widoków korzystają z indeksów.
+
+    python -m services.query_plans    # na bieżącej bazie
+    python -m pytest -q tests         # na pustej bazie w pamięci (tests/test_query_plans.py)
+
+Kod wyjścia 1, jeśli któreś zapytanie czyta tabelę bez oczekiwanego indeksu
+(np. po zmianie wyrażenia sortowania, które przestało pasować do indeksu).
+"""
+
+import sys
+from datetime import date
+
+from sqlalchemy import select, text
+from PyQt5.QtCore import Qt
+
+from models.database import Session
+from models.order import Order
+from models.order_item import OrderItem
+from models.perfume import Perfume
+from models.stock_stats import stats_query
+from services.export import DATASETS, ExportFilter
+from ui.orders_model import OrdersQuery, page_query
+
+
+def _statement(query):
+    return query.statement if hasattr(query, "statement") else query
+
+
+def explain(session, query):
+    """Wiersze "detail" planu zapytania (ORM Query albo select)."""
+    compiled = _statement(query).compile(
+        dialect=session.get_bind().dialect, compile_kwargs={"literal_binds": True}
+    )
+    return [row[-1] for row in session.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))]
+
+
+# (opis, zapytanie(session), nazwa indeksu, który musi się pojawić w planie)
+PLAN_CHECKS = [
+    ("pozycje zamówień strony (selectinload Order.items)",
+     lambda session: select(OrderItem).where(OrderItem.order_id.in_([1, 2, 3])),
+     "ix_order_items_order_id"),
+    ("statystyki wybranych perfum",
+     lambda session: stats_query(session).filter(OrderItem.perfume_id.in_([1, 2, 3])),
+     "ix_order_items_perfume_id"),
+    ("lista zamówień sortowana po dacie sprzedaży",
+     lambda session: page_query(session, OrdersQuery(sort_col=6, sort_order=Qt.DescendingOrder)).limit(200),
+     "ix_orders_sale_date_sort"),
+    ("kolejna strona po dacie sprzedaży (keyset)",
+     lambda session: page_query(session, OrdersQuery(sort_col=6), cursor=("2024-01-01", 10)).limit(200),
+     "ix_orders_sale_date_sort"),
+    ("eksport zamówień z zakresu dat sprzedaży",
+     lambda session: DATASETS["orders"].statement(ExportFilter(date_from=date(2024, 1, 1), date_to=date(2024, 3, 31))),
+     "ix_orders_sale_date"),
+    ("perfumy dostępne do zamówienia",
+     lambda session: session.query(Perfume).filter(Perfume.status == "Dostępny"),
+     "ix_perfumes_status"),
+    ("zamówienia w wybranym etapie",
+     lambda session: session.query(Order.id).filter(Order.stage == "Zakończone"),
+     "ix_orders_stage"),
+]
+
+
+def uses_index(plan, index_name):
+    """Czy któryś krok planu czyta tabelę przez ``index_name`` (także jako indeks pokrywający)."""
+    return any(f"USING INDEX {index_name}" in detail or f"USING COVERING INDEX {index_name}" in detail
+               for detail in plan)
+
+
+def check_plans(session):
+    """Zwraca listę (opis, plan) zapytań, które nie używają oczekiwanego indeksu."""
+    failures = []
+    for description, build, index_name in PLAN_CHECKS:
+        plan = explain(session, build(session))
+        if not uses_index(plan, index_name):
+            failures.append((description, plan))
+    return failures
+
+
+if __name__ == "__main__":
+    from models.schema import upgrade_schema
+    upgrade_schema()
+    session = Session()
+    failures = check_plans(session)
+    for description, plan in failures:
+        print(f"BEZ INDEKSU: {description}")
+        for detail in plan:
+            print(f"    {detail}")
+    print("Wszystkie zapytania korzystają z indeksów." if not failures
+          else f"{len(failures)} zapytań bez oczekiwanego indeksu.")
+    sys.exit(1 if failures else 0)
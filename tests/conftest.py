@@ -0,0 +1,27 @@
+# tests/conftest.py
+"""Wspólne fixture'y: pusta baza w pamięci z aktualnym schematem.
+
+Uruchamianie z katalogu głównego repozytorium::
+
+    python -m pytest -q
+"""
+
+import os
+
+# moduły models.* tworzą przy imporcie domyślny silnik – niech nie dotyka organizer.db
+os.environ.setdefault("ORGANIZER_DB", ":memory:")
+
+import pytest  # noqa: E402
+from sqlalchemy.orm import Session as OrmSession  # noqa: E402
+
+from models.database import MEMORY, make_engine  # noqa: E402
+from models.schema import LATEST_VERSION, upgrade_schema  # noqa: E402
+
+
+@pytest.fixture
+def session():
+    engine = make_engine(MEMORY)
+    assert upgrade_schema(engine) == LATEST_VERSION
+    with OrmSession(bind=engine) as session:
+        yield session
+    engine.dispose()
@@ -0,0 +1,81 @@
+# tests/test_buyer_search.py
+"""Wyszukiwarka kupującego: migracja starszej bazy i dopasowanie bez diakrytyków."""
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session as OrmSession
+
+from models.database import MEMORY, make_engine
+from models.order import Order
+from models.schema import LATEST_VERSION, upgrade_schema
+from models.search_index import buyer_search_clause
+
+# tabela zamówień sprzed etapu, search_text i indeksu orders_search
+LEGACY_ORDERS_DDL = """CREATE TABLE orders (
+    id INTEGER NOT NULL, name VARCHAR, first_name VARCHAR, last_name VARCHAR,
+    email VARCHAR, phone VARCHAR, buyer VARCHAR, shipping FLOAT, total FLOAT,
+    sent_message BOOLEAN, received_money BOOLEAN, generated_label BOOLEAN,
+    packed BOOLEAN, sent BOOLEAN, confirmation_obtained BOOLEAN, sale_date DATE,
+    notes VARCHAR, confirmation_date DATE, is_split BOOLEAN, PRIMARY KEY (id)
+)"""
+
+LEGACY_ORDERS = [
+    {"id": 1, "name": "Łucja Żółć", "first_name": None, "last_name": None, "email": None, "phone": None, "buyer": None},
+    {"id": 2, "name": None, "first_name": "Zoë", "last_name": "Kowalska", "email": "zoe@example.com",
+     "phone": "+48 600 100 200", "buyer": None},
+    {"id": 3, "name": None, "first_name": None, "last_name": None, "email": None, "phone": None,
+     "buyer": "Anna Nowak"},
+]
+
+
+@pytest.fixture
+def legacy_session():
+    engine = make_engine(MEMORY)
+    with engine.begin() as conn:
+        conn.execute(text(LEGACY_ORDERS_DDL))
+        conn.execute(text(
+            "INSERT INTO orders (id, name, first_name, last_name, email, phone, buyer)"
+            " VALUES (:id, :name, :first_name, :last_name, :email, :phone, :buyer)"
+        ), LEGACY_ORDERS)
+    assert upgrade_schema(engine) == LATEST_VERSION
+    with OrmSession(bind=engine) as session:
+        yield session
+    engine.dispose()
+
+
+def find(session, query):
+    return sorted(oid for oid, in session.query(Order.id).filter(buyer_search_clause(query)))
+
+
+@pytest.mark.parametrize("accented, plain, expected", [
+    ("Łucja", "lucja", [1]),
+    ("ŻÓŁĆ", "zolc", [1]),
+    ("łucja żółć", "LUCJA ZOLC", [1]),
+    ("Zoë", "zoe", [2]),
+    ("żó", "zo", [1, 2]),  # krótsze niż trigram – LIKE po search_text
+])
+def test_legacy_orders_match_with_and_without_diacritics(legacy_session, accented, plain, expected):
+    assert find(legacy_session, accented) == expected
+    assert find(legacy_session, plain) == expected
+
+
+def test_legacy_orders_match_contact_fields(legacy_session):
+    assert find(legacy_session, "NOWAK") == [3]
+    assert find(legacy_session, "600100") == [2]  # telefon bez spacji
+    assert find(legacy_session, "example.com") == [2]
+
+
+def test_saved_and_edited_orders_stay_searchable(legacy_session):
+    order = Order(first_name="Józef", last_name="Wąs")
+    legacy_session.add(order)
+    legacy_session.commit()
+    assert find(legacy_session, "jozef was") == [order.id]
+
+    order.last_name = "Ślusarz"
+    legacy_session.commit()
+    assert find(legacy_session, "slusarz") == [order.id]
+    assert find(legacy_session, "jozef was") == []
+
+
+def test_empty_query_has_no_clause():
+    assert buyer_search_clause("  ") is None
@@ -0,0 +1,76 @@
+# tests/test_changes.py
+"""Zgłaszanie zatwierdzonych zmian (models/changes.py)."""
+
+import pytest
+from sqlalchemy import delete, insert, update
+
+from models.changes import ALL, REPORTED, add_change_listener, mark_changed, remove_change_listener
+from models.database import SessionFactory
+from models.order import Order
+from models.order_item import OrderItem
+from models.perfume import Perfume
+
+
+@pytest.fixture
+def published(session):
+    """Lista Changes ogłoszonych przez sesję z nasłuchem zmian (na bazie fixture ``session``)."""
+    changes = []
+    add_change_listener(changes.append)
+    yield changes
+    remove_change_listener(changes.append)
+
+
+@pytest.fixture
+def tracked(session, published):
+    with SessionFactory(bind=session.get_bind()) as tracked:
+        perfume = Perfume(brand="Dior", name="Sauvage", to_decant=100)
+        tracked.add(Order(buyer="Anna", items=[OrderItem(perfume=perfume, quantity_ml=10, price_per_ml=5)]))
+        tracked.commit()
+        published.clear()
+        yield tracked
+
+
+def test_flush_publishes_changed_ids(tracked, published):
+    perfume = tracked.query(Perfume).one()
+    perfume.name = "Sauvage Elixir"
+    tracked.commit()
+    assert [c.perfume_ids for c in published] == [{perfume.id}]
+
+
+@pytest.mark.parametrize("statement, perfume_ids, order_ids", [
+    (update(Perfume).values(status="Niedostępny"), {ALL}, set()),
+    (delete(OrderItem), {ALL}, {ALL}),
+    (update(Order).values(notes="x"), set(), {ALL}),
+    (insert(Order).values(buyer="Ewa"), set(), {ALL}),
+])
+def test_dml_statement_publishes_all(tracked, published, statement, perfume_ids, order_ids):
+    tracked.execute(statement)
+    tracked.commit()
+    assert len(published) == 1
+    assert published[0].perfume_ids == perfume_ids
+    assert published[0].order_ids == order_ids
+
+
+def test_legacy_query_delete_publishes_all(tracked, published):
+    tracked.query(OrderItem).delete()
+    tracked.commit()
+    assert published[0].perfume_ids == {ALL}
+    assert published[0].order_ids == {ALL}
+
+
+def test_reported_statement_publishes_marked_ids_only(tracked, published):
+    perfume_id = tracked.query(Perfume.id).scalar()
+    tracked.execute(
+        update(Perfume).where(Perfume.id == perfume_id).values(status="Niedostępny"),
+        execution_options={REPORTED: True},
+    )
+    mark_changed(tracked, perfume_ids=[perfume_id])
+    tracked.commit()
+    assert [c.perfume_ids for c in published] == [{perfume_id}]
+
+
+def test_rollback_drops_pending_changes(tracked, published):
+    tracked.execute(update(Perfume).values(status="Niedostępny"))
+    tracked.rollback()
+    tracked.commit()
+    assert published == []
@@ -0,0 +1,95 @@
+# tests/test_order_lines.py
+"""Zapis edytowanego zamówienia samymi różnicami (services/order_lines.py)."""
+
+import pytest
+
+from models.order import Order
+from models.order_item import OrderItem
+from models.perfume import Perfume
+from models.perfume_counters import find_drift
+from services.order_lines import OrderLine, sync_order_items
+
+
+@pytest.fixture
+def order(session):
+    dior = Perfume(brand="Dior", name="Sauvage", to_decant=100, purchase_price=200)
+    chanel = Perfume(brand="Chanel", name="Bleu", to_decant=50, purchase_price=150)
+    session.add_all([dior, chanel])
+    session.flush()
+    order = Order(buyer="Anna")
+    sync_order_items(order, [
+        OrderLine(dior.id, 10, 5.0),
+        OrderLine(chanel.id, 5, 8.0),
+        OrderLine(chanel.id, 2, 0.0, is_gratis=True),
+    ])
+    session.add(order)
+    session.commit()
+    return order
+
+
+def saved_lines(order):
+    """Pozycje zamówienia tak, jak wczytuje je okno edycji."""
+    return [
+        OrderLine(i.perfume_id, i.quantity_ml, i.price_per_ml, is_gratis=not i.price_per_ml,
+                  is_flask=i.is_flask, is_split=i.is_split, item_id=i.id)
+        for i in order.items
+    ]
+
+
+def counters(session, brand):
+    session.expire_all()
+    p = session.query(Perfume).filter_by(brand=brand).one()
+    return p.remaining, p.order_count, p.selling_price
+
+
+def item_ids(session):
+    return [item_id for item_id, in session.query(OrderItem.id).order_by(OrderItem.id)]
+
+
+def test_unchanged_lines_touch_nothing(session, order):
+    ids = item_ids(session)
+    changes = sync_order_items(order, saved_lines(order))
+    assert (changes.inserted, changes.updated, changes.deleted, changes.unchanged) == (0, 0, 0, 3)
+    assert not session.dirty
+    session.commit()
+    assert item_ids(session) == ids
+
+
+def test_quantity_edit_updates_item_in_place(session, order):
+    ids = item_ids(session)
+    lines = saved_lines(order)
+    lines[0].quantity_ml = 30
+    changes = sync_order_items(order, lines)
+    assert (changes.updated, changes.unchanged) == (1, 2)
+    session.commit()
+
+    assert item_ids(session) == ids
+    assert session.get(OrderItem, ids[0]).partial_sum == 150
+    assert counters(session, "Dior") == (70, 1, 30 * 5 + 4)
+    assert find_drift(session) == {}
+
+
+def test_perfume_swap_moves_counters(session, order):
+    dior_id = session.query(Perfume.id).filter_by(brand="Dior").scalar()
+    lines = saved_lines(order)
+    lines[1].perfume_id = dior_id  # Chanel 5 ml → Dior
+    sync_order_items(order, lines)
+    session.commit()
+
+    assert counters(session, "Dior") == (85, 2, (10 * 5 + 4) + (5 * 8 + 4))
+    assert counters(session, "Chanel") == (48, 0, 0)  # został tylko gratis
+    assert find_drift(session) == {}
+
+
+def test_removed_lines_are_deleted(session, order):
+    ids = item_ids(session)
+    lines = saved_lines(order)
+    changes = sync_order_items(order, lines[:1] + [OrderLine(lines[1].perfume_id, 1, 8.0)])
+    assert (changes.inserted, changes.deleted, changes.unchanged) == (1, 2, 1)
+    session.commit()
+
+    remaining_ids = item_ids(session)
+    assert remaining_ids[0] == ids[0] and ids[1] not in remaining_ids and ids[2] not in remaining_ids
+    assert counters(session, "Chanel") == (49, 1, 1 * 8 + 4)
+    assert counters(session, "Dior") == (90, 1, 10 * 5 + 4)
+    assert find_drift(session) == {}
@@ -0,0 +1,129 @@
+# tests/test_perfume_counters.py
+"""Liczniki sprzedaży perfum utrzymywane triggerami (models/perfume_counters.py)."""
+
+import pytest
+from sqlalchemy import text
+
+from models.order import Order
+from models.order_item import OrderItem
+from models.perfume import Perfume
+from models.perfume_counters import COUNTER_COLUMNS, find_drift, rebuild_counters
+from models.stock_stats import DECANT_COST, EXTRA_COST_PER_ORDER
+
+
+def counters(session, perfume_id):
+    session.flush()
+    row = session.query(*[getattr(Perfume, c) for c in COUNTER_COLUMNS]).filter(Perfume.id == perfume_id).one()
+    return row._asdict()
+
+
+def expected(to_decant, purchase_price, used_ml, paid):
+    """paid = [(ml, cena/ml)] płatnych pozycji."""
+    sales = sum(ml * price + DECANT_COST for ml, price in paid)
+    extra = len(paid) * EXTRA_COST_PER_ORDER
+    return {
+        "remaining": to_decant - used_ml,
+        "order_count": len(paid),
+        "selling_price": pytest.approx(sales),
+        "extra_costs": pytest.approx(extra),
+        "balance": pytest.approx(sales - purchase_price - extra),
+    }
+
+
+@pytest.fixture
+def perfumes(session):
+    first = Perfume(brand="Dior", name="Sauvage", to_decant=100, purchase_price=200)
+    second = Perfume(brand="Chanel", name="Bleu", to_decant=50, purchase_price=150)
+    session.add_all([first, second])
+    session.flush()
+    return first.id, second.id
+
+
+def test_new_perfume_starts_without_sales(session, perfumes):
+    first, _ = perfumes
+    assert counters(session, first) == expected(100, 200, 0, [])
+
+
+def test_insert_counts_paid_items_only(session, perfumes):
+    first, _ = perfumes
+    session.add(Order(buyer="Anna", items=[
+        OrderItem(perfume_id=first, quantity_ml=10, price_per_ml=5),
+        OrderItem(perfume_id=first, quantity_ml=2, price_per_ml=0),  # gratis
+    ]))
+    assert counters(session, first) == expected(100, 200, 12, [(10, 5)])
+    assert find_drift(session) == {}
+
+
+def test_update_quantity_and_perfume(session, perfumes):
+    first, second = perfumes
+    item = OrderItem(perfume_id=first, quantity_ml=10, price_per_ml=5)
+    session.add(Order(buyer="Anna", items=[item]))
+    session.flush()
+
+    item.quantity_ml = 20
+    assert counters(session, first) == expected(100, 200, 20, [(20, 5)])
+
+    item.perfume_id = second
+    assert counters(session, first) == expected(100, 200, 0, [])
+    assert counters(session, second) == expected(50, 150, 20, [(20, 5)])
+    assert find_drift(session) == {}
+
+
+def test_delete_item_and_order_cascade(session, perfumes):
+    first, second = perfumes
+    order = Order(buyer="Anna", items=[
+        OrderItem(perfume_id=first, quantity_ml=10, price_per_ml=5),
+        OrderItem(perfume_id=second, quantity_ml=5, price_per_ml=8),
+    ])
+    session.add(order)
+    session.flush()
+
+    order.items.remove(order.items[0])  # delete-orphan
+    assert counters(session, first) == expected(100, 200, 0, [])
+    assert counters(session, second) == expected(50, 150, 5, [(5, 8)])
+
+    session.delete(order)
+    assert counters(session, second) == expected(50, 150, 0, [])
+    assert session.query(OrderItem).count() == 0
+    assert find_drift(session) == {}
+
+
+def test_to_decant_and_purchase_price_changes(session, perfumes):
+    first, _ = perfumes
+    session.add(Order(buyer="Anna", items=[OrderItem(perfume_id=first, quantity_ml=10, price_per_ml=5)]))
+    perfume = session.get(Perfume, first)
+    perfume.to_decant = 120
+    perfume.purchase_price = 250
+    assert counters(session, first) == expected(120, 250, 10, [(10, 5)])
+    assert find_drift(session) == {}
+
+
+def test_rebuild_repairs_drift(session, perfumes):
+    first, second = perfumes
+    session.add(Order(buyer="Anna", items=[OrderItem(perfume_id=first, quantity_ml=10, price_per_ml=5)]))
+    session.flush()
+    session.execute(text("UPDATE perfumes SET order_count = 7, remaining = 1 WHERE id = :id"), {"id": first})
+
+    drift = find_drift(session)
+    assert set(drift) == {first}
+    assert set(drift[first]) == {"remaining", "order_count"}
+
+    assert rebuild_counters(session) == [first]
+    assert find_drift(session) == {}
+    assert counters(session, first) == expected(100, 200, 10, [(10, 5)])
+
+
+def test_oversold_remaining_is_stored_signed_and_read_clamped(session, perfumes):
+    _, second = perfumes
+    order = Order(buyer="Anna", items=[OrderItem(perfume_id=second, quantity_ml=60, price_per_ml=5)])
+    session.add(order)
+    assert counters(session, second)["remaining"] == -10
+    assert session.query(Perfume.available_ml).filter(Perfume.id == second).scalar() == 0
+    perfume = session.get(Perfume, second)
+    session.refresh(perfume)
+    assert perfume.available_ml == 0
+
+    # po usunięciu pozycji stan wraca dokładnie do to_decant
+    session.delete(order)
+    assert counters(session, second)["remaining"] == 50
+    assert session.query(Perfume.available_ml).filter(Perfume.id == second).scalar() == 50
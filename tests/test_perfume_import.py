@@ -0,0 +1,57 @@
+# tests/test_perfume_import.py
+"""Import katalogu perfum z CSV (services/perfume_import.py)."""
+
+from models.perfume import Perfume
+from services.perfume_import import import_perfumes
+
+CATALOG = """Marka;Nazwa;Do odlania [ml];Cena/ml [zł];Nuty głowy
+Dior;Sauvage;100;4,5;bergamota, pieprz
+Chanel;Bleu de Chanel;50;6;grejpfrut
+"""
+
+
+def perfumes(session):
+    return {
+        (p.brand, p.name): (p.to_decant, p.price_per_ml, p.top_notes)
+        for p in session.query(Perfume).order_by(Perfume.id)
+    }
+
+
+def test_import_inserts_new_perfumes(session):
+    report = import_perfumes(session, CATALOG)
+    assert (report.inserted, report.updated, report.errors) == (2, 0, [])
+    assert perfumes(session) == {
+        ("Dior", "Sauvage"): (100, 4.5, "bergamota, pieprz"),
+        ("Chanel", "Bleu de Chanel"): (50, 6, "grejpfrut"),
+    }
+
+
+def test_reimport_of_same_file_changes_nothing(session):
+    import_perfumes(session, CATALOG)
+    before = perfumes(session)
+    report = import_perfumes(session, CATALOG)
+    assert (report.inserted, report.updated, report.unchanged) == (0, 0, 2)
+    assert report.perfume_ids == []
+    assert perfumes(session) == before
+
+
+def test_matched_row_keeps_stored_brand_and_name(session):
+    import_perfumes(session, CATALOG)
+    report = import_perfumes(session, "Marka;Nazwa;Do odlania [ml]\ndior;  SAUVAGE ;6\n")
+    assert (report.inserted, report.updated) == (0, 1)
+    session.expire_all()
+    assert perfumes(session)[("Dior", "Sauvage")] == (6, 4.5, "bergamota, pieprz")
+    assert session.query(Perfume).count() == 2
+
+
+def test_matched_row_with_only_other_casing_is_unchanged(session):
+    import_perfumes(session, CATALOG)
+    report = import_perfumes(session, "Marka;Nazwa\nDIOR;sauvage\n")
+    assert (report.inserted, report.updated, report.unchanged) == (0, 0, 1)
+
+
+def test_duplicate_rows_in_file_are_reported(session):
+    report = import_perfumes(session, "Marka;Nazwa;Do odlania [ml]\nDior;Sauvage;10\ndior;sauvage;20\n")
+    assert report.inserted == 1
+    assert report.errors == [(3, "te same perfumy co w linii 2")]
+    assert perfumes(session) == {("Dior", "Sauvage"): (10, None, None)}
@@ -0,0 +1,17 @@
+# tests/test_query_plans.py
+"""Zapytania widoków muszą korzystać z indeksów (EXPLAIN QUERY PLAN)."""
+
+import pytest
+
+from services.query_plans import PLAN_CHECKS, explain, uses_index
+
+
+@pytest.mark.parametrize(
+    "build, index_name",
+    [(build, index_name) for _, build, index_name in PLAN_CHECKS],
+    ids=[description for description, _, _ in PLAN_CHECKS],
+)
+def test_view_query_uses_index(session, build, index_name):
+    plan = explain(session, build(session))
+    assert uses_index(plan, index_name), plan
+
@@ -7,14 +7,12 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtGui import QFont, QDoubleValidator
 from PyQt5.QtCore import QDate, Qt, QTimer
-from models.database import Session
-from models.perfume import Perfume
-from models.order_item import OrderItem
+from models.database import Session, track_action
 from models.order import Order
 from ui.message_popup import MessagePopup
+from ui.perfume_picker import PerfumePickerModel, PerfumeCombo, load_picker_entries
+from services.order_lines import OrderLine, OrderLines, sync_order_items, ORDER_VIAL_COST, SHIPPING_OPTIONS
 
-ORDER_VIAL_COST = 4.0
-SHIPPING_OPTIONS = {"InPost": 12.0, "DPD": 10.0, "Własna etykieta": 0.0}
 ML_OPTIONS = [3, 5, 10, 15, 20, 30]
 
 class AddOrderDialog(QDialog):
@@ -22,6 +20,7 @@ class AddOrderDialog(QDialog):
         super().__init__(parent)
         self.session = Session()
         self.order_to_edit = order_to_edit
+        self.lines = OrderLines()  # dane pozycji – tabela tylko je wyświetla
         self.setWindowTitle("Nowe zamówienie" if not order_to_edit else "Edytuj zamówienie")
         self.resize(1000, 700)
         
@@ -167,8 +166,9 @@ class AddOrderDialog(QDialog):
         layout.addLayout(action_layout)
         
         # === INICJALIZACJA ===
-        self._perfume_cache = self.session.query(Perfume).filter(Perfume.status == "Dostępny").all()  
-        self.items_table.cellChanged.connect(lambda r, c: self.update_price_for_row(r))
+        # perfumy z edytowanego zamówienia zostają na liście, nawet gdy już niedostępne
+        order_perfume_ids = [oi.perfume_id for oi in order_to_edit.items] if order_to_edit else []
+        self.picker = PerfumePickerModel(load_picker_entries(self.session, order_perfume_ids), self)
         self._pending_checkbox_states = []
         
         if self.order_to_edit:
@@ -177,33 +177,20 @@ class AddOrderDialog(QDialog):
             QTimer.singleShot(0, lambda: self.add_item_row(default_ml=5))
 
     def get_perfume_id_from_combo(self, combo):
-        """Bezpieczne pobieranie ID perfumy z QComboBox"""
-        if combo is None:
+        """Bezpieczne pobieranie ID perfumy z pola wyboru"""
+        if not isinstance(combo, PerfumeCombo):
             return None
-        
-        pid = combo.currentData()
-        if pid is not None:
-            return pid
-        
-        current_index = combo.currentIndex()
-        if 0 <= current_index < len(self._perfume_cache):
-            return self._perfume_cache[current_index].id
-        return None
+        return combo.perfume_id()
 
-    def add_item_row(self, perfume_obj=None, is_gratis=False, default_ml=5):
+    def add_item_row(self, perfume_obj=None, is_gratis=False, default_ml=5, item_id=None):
         row = self.items_table.rowCount()
         self.items_table.insertRow(row)
+        self.lines.append(OrderLine(quantity_ml=float(default_ml), is_gratis=is_gratis, item_id=item_id))
         
         # COMBO PERFUM
-        combo = QComboBox()
+        combo = PerfumeCombo(self.picker)
         combo.setFont(self.font())
-        for p in self._perfume_cache:
-            combo.addItem(f"{p.brand} {p.name}", p.id)
-        
-        if perfume_obj:
-            idx = next((i for i, p in enumerate(self._perfume_cache) if p.id == perfume_obj.id), 0)
-            combo.setCurrentIndex(idx)
-        elif self._perfume_cache:
+        if not (perfume_obj and combo.set_perfume_id(perfume_obj.id)) and self.picker.rowCount():
             combo.setCurrentIndex(0)
             
         combo.currentIndexChanged.connect(partial(self.update_price_for_row, row))
@@ -228,11 +215,6 @@ class AddOrderDialog(QDialog):
         part_item.setFlags(part_item.flags() & ~Qt.ItemIsEditable)
         self.items_table.setItem(row, 3, part_item)
         
-        # FLAGA GRATIS (hidden)
-        flag_item = QTableWidgetItem("1" if is_gratis else "0")
-        flag_item.setFlags(flag_item.flags() & ~Qt.ItemIsEditable)
-        self.items_table.setItem(row, 4, flag_item)
-        
         # CHECKBOXY
         if not is_gratis:
             # Flakon
@@ -270,33 +252,44 @@ class AddOrderDialog(QDialog):
         
         self.items_table.setCellWidget(row, 8, QWidget())
         
-        QTimer.singleShot(0, lambda: self.update_price_for_row(row))
+        self.update_price_for_row(row)
 
     def delete_item_row(self, row):
         self.items_table.removeRow(row)
+        self.lines.remove(row)
         
-        # Aktualizuj callbacki po usunięciu
-        for r in range(self.items_table.rowCount()):
+        # Aktualizuj callbacki po usunięciu – wiersze poniżej przesunęły się o jeden
+        for r in range(row, self.items_table.rowCount()):
+            combo = self.items_table.cellWidget(r, 0)
+            if isinstance(combo, QComboBox):
+                self._reconnect(combo.currentIndexChanged, partial(self.update_price_for_row, r))
+            
+            qty_widget = self.items_table.cellWidget(r, 1)
+            if isinstance(qty_widget, QComboBox):
+                self._reconnect(qty_widget.currentIndexChanged, partial(self.update_price_for_row, r))
+            elif isinstance(qty_widget, QLineEdit):
+                self._reconnect(qty_widget.editingFinished, partial(self.update_price_for_row, r))
+            
             widget = self.items_table.cellWidget(r, 7)
             if isinstance(widget, QPushButton):
-                try: widget.clicked.disconnect()
-                except Exception: pass
-                widget.clicked.connect(partial(self.delete_item_row, r))
+                self._reconnect(widget.clicked, partial(self.delete_item_row, r))
             
             flask_checkbox = self.get_flask_checkbox(r)
             if flask_checkbox:
-                try: flask_checkbox.stateChanged.disconnect()
-                except Exception: pass
-                flask_checkbox.stateChanged.connect(partial(self.on_flask_checkbox_changed, r))
+                self._reconnect(flask_checkbox.stateChanged, partial(self.on_flask_checkbox_changed, r))
             
             split_checkbox = self.get_split_checkbox(r)
             if split_checkbox:
-                try: split_checkbox.stateChanged.disconnect()
-                except Exception: pass
-                split_checkbox.stateChanged.connect(partial(self.on_split_checkbox_changed, r))
+                self._reconnect(split_checkbox.stateChanged, partial(self.on_split_checkbox_changed, r))
         
         self.recalculate_total()
 
+    @staticmethod
+    def _reconnect(signal, slot):
+        try: signal.disconnect()
+        except Exception: pass
+        signal.connect(slot)
+
     def get_flask_checkbox(self, row):
         widget = self.items_table.cellWidget(row, 5)
         if widget:
@@ -311,15 +304,8 @@ class AddOrderDialog(QDialog):
                 return cb
         return None
 
-    def get_flask_checkbox_state(self, row):
-        cb = self.get_flask_checkbox(row)
-        return cb and cb.isChecked()
-
-    def get_split_checkbox_state(self, row):
-        cb = self.get_split_checkbox(row)
-        return cb and cb.isChecked()
-
     def on_flask_checkbox_changed(self, row, state):
+        self.lines.update(row, is_flask=state == Qt.Checked)
         qty_widget = self.items_table.cellWidget(row, 1)
         
         if state == Qt.Checked:
@@ -336,8 +322,7 @@ class AddOrderDialog(QDialog):
             line_edit.setValidator(QDoubleValidator(0.01, 10000.0, 2))
             
             combo = self.items_table.cellWidget(row, 0)
-            pid = self.get_perfume_id_from_combo(combo)
-            perfume = next((p for p in self._perfume_cache if p.id == pid), None)
+            perfume = self.picker.entry(self.get_perfume_id_from_combo(combo))
             
             if perfume is not None:
                 line_edit.setText(str(perfume.to_decant or ''))
@@ -369,76 +354,51 @@ class AddOrderDialog(QDialog):
         self.update_price_for_row(row)
 
     def on_split_checkbox_changed(self, row, state):
-        pass
+        self.lines.update(row, is_split=state == Qt.Checked)
 
     def update_price_for_row(self, row):
-        flag_item = self.items_table.item(row, 4)
-        is_gratis = (flag_item.text() == "1") if flag_item else False
-        
+        """Przenosi wybór z widżetów wiersza do modelu pozycji i odświeża jego komórki."""
+        if not 0 <= row < len(self.lines):
+            return
         combo = self.items_table.cellWidget(row, 0)
         pid = self.get_perfume_id_from_combo(combo)
-        perfume = next((p for p in self._perfume_cache if p.id == pid), None)
+        perfume = self.picker.entry(pid)
+        price_ml = 0.0 if perfume is None else round(perfume.price_per_ml or 0.0, 2)
+        line = self.lines.update(row, perfume_id=pid, quantity_ml=self.get_quantity(row), price_per_ml=price_ml)
         
+        self._set_readonly_text(row, 2, f"{line.price_per_ml:.2f}")
+        self._set_readonly_text(row, 3, f"{line.partial_sum:.2f}")
+        self.recalculate_total()
+
+    def get_quantity(self, row):
         qty_widget = self.items_table.cellWidget(row, 1)
-        if qty_widget is None:
-            qty = 0
-        elif isinstance(qty_widget, QComboBox):
-            qty = qty_widget.currentData() or 0
-        elif isinstance(qty_widget, QLineEdit):
+        if isinstance(qty_widget, QComboBox):
+            return float(qty_widget.currentData() or 0)
+        if isinstance(qty_widget, QLineEdit):
             try:
-                qty = float(qty_widget.text())
+                return float(qty_widget.text())
             except ValueError:
-                qty = 0
-        else:
-            qty = 0
-        
-        price_ml = 0.0 if is_gratis or perfume is None else (perfume.price_per_ml or 0.0)
-        partial_sum = 0.0 if is_gratis else price_ml * qty
-        
-        price_item = self.items_table.item(row, 2)
-        if price_item is None:
-            price_item = QTableWidgetItem()
-            price_item.setFlags(price_item.flags() & ~Qt.ItemIsEditable)
-            self.items_table.setItem(row, 2, price_item)
-        price_item.setText(f"{price_ml:.2f}")
-        
-        part_item = self.items_table.item(row, 3)
-        if part_item is None:
-            part_item = QTableWidgetItem()
-            part_item.setFlags(part_item.flags() & ~Qt.ItemIsEditable)
-            self.items_table.setItem(row, 3, part_item)
-        part_item.setText(f"{partial_sum:.2f}")
-        
-        self.recalculate_total()
+                return 0.0
+        return 0.0
+
+    def _set_readonly_text(self, row, column, text):
+        item = self.items_table.item(row, column)
+        if item is None:
+            item = QTableWidgetItem()
+            item.setFlags(item.flags() & ~Qt.ItemIsEditable)
+            self.items_table.setItem(row, column, item)
+        item.setText(text)
 
     def recalculate_total(self):
-        total = 0.0
-        count_paid = 0
-        
-        for r in range(self.items_table.rowCount()):
-            flag_item = self.items_table.item(r, 4)
-            is_gratis = (flag_item.text() == "1") if flag_item else False
-            
-            if is_gratis:
-                continue
-            
-            part_item = self.items_table.item(r, 3)
-            if part_item:
-                part = float(part_item.text().replace(",", "."))
-                total += part
-                count_paid += 1
-        
-        ship_key = self.shipping_combo.currentData()
-        ship_cost = 0.0 if ship_key == "Własna etykieta" else SHIPPING_OPTIONS.get(ship_key, 0.0)
-        total += ship_cost + count_paid * ORDER_VIAL_COST
-        
-        self.total_label.setText(f"Suma do zapłaty: {total:.2f} zł")
+        """Suma pochodzi z modelu pozycji – tu tylko wysyłka i etykieta."""
+        self.lines.shipping_key = self.shipping_combo.currentData()
+        self.total_label.setText(f"Suma do zapłaty: {self.lines.total:.2f} zł")
 
     def add_gratis_row(self):
-        names = [f"{p.brand} {p.name}" for p in self._perfume_cache]
+        names = self.picker.labels()
         idx, ok = QInputDialog.getItem(self, "Gratis", "Wybierz perfumy:", names, 0, False)
         if ok:
-            p = self._perfume_cache[names.index(idx)]
+            p = self.picker.entry(self.picker.id_at(names.index(idx)))
             self.add_item_row(perfume_obj=p, is_gratis=True, default_ml=3)
 
     def fill_with_order(self, order: Order):
@@ -486,16 +446,16 @@ class AddOrderDialog(QDialog):
         
         # Wczytaj pozycje zamówienia
         self.items_table.setRowCount(0)
-        items = self.session.query(OrderItem).filter_by(order_id=order.id).all()
+        items = order.items
         
         self._pending_checkbox_states = []
         
         for i, oi in enumerate(items):
-            p = next((x for x in self._perfume_cache if x.id == oi.perfume_id), None)
+            p = self.picker.entry(oi.perfume_id)
             is_gratis = (oi.price_per_ml == 0)
             
-            QTimer.singleShot(0, lambda row=i, perfume=p, gratis=is_gratis, qty=int(round(oi.quantity_ml)):
-                self.add_item_row(perfume_obj=perfume, is_gratis=gratis, default_ml=qty))
+            QTimer.singleShot(0, lambda row=i, perfume=p, gratis=is_gratis, qty=int(round(oi.quantity_ml)), item_id=oi.id:
+                self.add_item_row(perfume_obj=perfume, is_gratis=gratis, default_ml=qty, item_id=item_id))
             
             if not is_gratis:
                 flask_state = bool(getattr(oi, "is_flask", False))
@@ -503,7 +463,8 @@ class AddOrderDialog(QDialog):
                 self._pending_checkbox_states.append({
                     'row': i,
                     'flask_state': flask_state,
-                    'split_state': split_state
+                    'split_state': split_state,
+                    'quantity': oi.quantity_ml
                 })
         
         QTimer.singleShot(100, self.apply_pending_checkbox_states)
@@ -519,6 +480,12 @@ class AddOrderDialog(QDialog):
             if flask_checkbox:
                 flask_checkbox.setChecked(flask_state)
             
+            # flakon: zapisana ilość zamiast domyślnej "do odlania" z perfum
+            qty_widget = self.items_table.cellWidget(row, 1)
+            if flask_state and isinstance(qty_widget, QLineEdit):
+                qty_widget.setText(f"{state_data['quantity']:g}")
+                self.update_price_for_row(row)
+            
             split_checkbox = self.get_split_checkbox(row)
             if split_checkbox:
                 split_checkbox.setChecked(split_state)
@@ -531,15 +498,7 @@ class AddOrderDialog(QDialog):
             return
         
         # Sprawdź czy jest przynajmniej jedna pozycja płatna
-        has_paid_item = False
-        for r in range(self.items_table.rowCount()):
-            flag_item = self.items_table.item(r, 4)
-            price_item = self.items_table.item(r, 2)
-            if flag_item and price_item and flag_item.text() == "0" and float(price_item.text()) > 0:
-                has_paid_item = True
-                break
-        
-        if not has_paid_item:
+        if not self.lines.has_paid_line():
             QMessageBox.warning(self, "Błąd", "Przynajmniej jedna pozycja musi być płatna!")
             return
         
@@ -549,6 +508,14 @@ class AddOrderDialog(QDialog):
             QMessageBox.warning(self, "Błąd", "Wprowadź nazwę profilu (FB)!")
             return
         
+        with track_action("Zapis zamówienia"):
+            saved = self._store_order(name)
+        if saved:
+            QMessageBox.information(self, "Sukces", "Zamówienie zapisane.")
+            self.accept()
+
+    def _store_order(self, name):
+        """Zapisuje formularz w bazie; True, jeśli się udało."""
         order = self.order_to_edit or Order()
         new_order = not self.order_to_edit
         
@@ -569,9 +536,8 @@ class AddOrderDialog(QDialog):
         
         order.notes = self.notes_input.toPlainText().strip()
         
-        ship_key = self.shipping_combo.currentData()
-        order.shipping = 0.0 if ship_key == "Własna etykieta" else SHIPPING_OPTIONS.get(ship_key, 0.0)
-        order.total = float(self.total_label.text().split(":")[1].split()[0].replace(",", "."))
+        order.shipping = self.lines.shipping_cost
+        order.total = self.lines.total
         
         order.sent_message = self.cb_msg.isChecked()
         order.received_money = self.cb_money.isChecked()
@@ -589,119 +555,45 @@ class AddOrderDialog(QDialog):
             self.confirmation_date = None
         order.confirmation_date = self.confirmation_date
         
-        is_split = any([
-            self.get_split_checkbox_state(r)
-            for r in range(self.items_table.rowCount())
-        ])
-        order.is_split = is_split
+        order.is_split = self.lines.is_split
         
         try:
-            if self.order_to_edit:
-                self.session.query(OrderItem).filter_by(order_id=order.id).delete()
-            
-            for r in range(self.items_table.rowCount()):
-                flag_item = self.items_table.item(r, 4)
-                is_gratis = (flag_item.text() == "1") if flag_item else False
-                
-                combo = self.items_table.cellWidget(r, 0)
-                pid = self.get_perfume_id_from_combo(combo)
-                
-                if pid is None:
+            for r, line in enumerate(self.lines):
+                if line.perfume_id is None:
                     QMessageBox.warning(self, "Błąd", f"Nie można zapisać pozycji w wierszu {r+1} - nie wybrano perfum.")
                     self.session.rollback()
-                    return
-                
-                qty_widget = self.items_table.cellWidget(r, 1)
-                if isinstance(qty_widget, QComboBox):
-                    qty = qty_widget.currentData() or 0
-                elif isinstance(qty_widget, QLineEdit):
-                    try:
-                        qty = float(qty_widget.text())
-                    except ValueError:
-                        qty = 0
-                else:
-                    qty = 0
-                
-                price_item = self.items_table.item(r, 2)
-                part_item = self.items_table.item(r, 3)
-                
-                price = 0.0 if (is_gratis or not price_item) else float(price_item.text().replace(",", "."))
-                part = 0.0 if (is_gratis or not part_item) else float(part_item.text().replace(",", "."))
-                
-                is_flask = self.get_flask_checkbox_state(r)
-                is_split_poz = self.get_split_checkbox_state(r)
-                
-                oi = OrderItem(
-                    order_id=order.id,
-                    perfume_id=pid,
-                    quantity_ml=qty,
-                    price_per_ml=price,
-                    partial_sum=part,
-                    is_flask=is_flask,
-                    is_split=is_split_poz
-                )
-                self.session.add(oi)
+                    return False
             
+            # tylko różnice względem zapisanych pozycji, w jednej transakcji
+            sync_order_items(order, self.lines)
             self.session.commit()
-            QMessageBox.information(self, "Sukces", "Zamówienie zapisane.")
-            self.accept()
+            return True
             
         except Exception as e:
             self.session.rollback()
             QMessageBox.critical(self, "Błąd zapisu", str(e))
+            return False
 
     def generate_message_popup(self):
         def fmt(v):
             return f"{int(v)}" if float(v).is_integer() else f"{v:.2f}".replace(".", ",")
         
-        perfume_map = {p.id: p for p in self._perfume_cache}
         items_summary = []
-        count_paid = 0
-        total = 0.0
-        
-        for r in range(self.items_table.rowCount()):
-            flag_item = self.items_table.item(r, 4)
-            if flag_item and flag_item.text() == "1":
-                continue
-            
-            combo = self.items_table.cellWidget(r, 0)
-            pid = self.get_perfume_id_from_combo(combo)
-            
-            qty_widget = self.items_table.cellWidget(r, 1)
-            if isinstance(qty_widget, QComboBox):
-                qty = qty_widget.currentData()
-            elif isinstance(qty_widget, QLineEdit):
-                try:
-                    qty = float(qty_widget.text())
-                except ValueError:
-                    qty = 0
-            else:
-                qty = 0
-            
-            price_item = self.items_table.item(r, 2)
-            part_item = self.items_table.item(r, 3)
-            
-            if not price_item or not part_item or pid is None:
+        for line in self.lines:
+            p = self.picker.entry(line.perfume_id)
+            if line.is_gratis or p is None:
                 continue
-            
-            price = float(price_item.text().replace(",", "."))
-            part = float(part_item.text().replace(",", "."))
-            
-            p = perfume_map.get(pid)
-            if not p:
-                continue
-            
-            items_summary.append(f"{p.brand} {p.name} -> {fmt(qty)} x {fmt(price)} = {fmt(part)}zł")
-            total += part
-            count_paid += 1
+            items_summary.append(
+                f"{p.brand} {p.name} -> {fmt(line.quantity_ml)} x {fmt(line.price_per_ml)} = {fmt(line.partial_sum)}zł"
+            )
         
-        vial_sum = count_paid * ORDER_VIAL_COST
-        total += vial_sum
+        count_paid = self.lines.paid_count
+        vial_sum = self.lines.vial_cost
         
-        delivery_key = self.shipping_combo.currentData()
+        delivery_key = self.lines.shipping_key
         is_wlasna_etykieta = delivery_key == "Własna etykieta"
-        delivery_cost = 0.0 if is_wlasna_etykieta else SHIPPING_OPTIONS.get(delivery_key, 0.0)
-        total_with = total + delivery_cost
+        delivery_cost = self.lines.shipping_cost
+        total_with = self.lines.total
         
         msg = "Podsumowanie:\n" + "\n".join(items_summary)
         if count_paid:
@@ -1,13 +1,15 @@
 # ui/add_perfume_dialog.py
 
-import base64
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
     QDoubleSpinBox, QPushButton, QMessageBox, QComboBox, QCheckBox,
-    QListWidget, QListWidgetItem, QFileDialog
+    QListWidget, QListWidgetItem, QFileDialog, QCompleter
 )
 from PyQt5.QtGui import QPixmap, QFont, QDoubleValidator
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QStringListModel
+from models.database import Session
+from models.note import note_vocabulary, normalize_note
+from models.image import store_image
 
 class AddPerfumeDialog(QDialog):
     def __init__(self, parent=None):
@@ -18,7 +20,7 @@ class AddPerfumeDialog(QDialog):
         base_font.setPointSize(9)
         self.setFont(base_font)
 
-        self.image_data: str = ""
+        self.image_bytes = None  # wybrany plik obrazu (zapisywany do perfume_images)
 
         main_layout = QVBoxLayout(self)
         content_layout = QHBoxLayout()
@@ -130,7 +132,10 @@ class AddPerfumeDialog(QDialog):
 
         left_col.addStretch()
 
-        # PRAWA KOLUMNA – nuty zapachowe
+        # PRAWA KOLUMNA – nuty zapachowe (podpowiedzi ze słownika nut)
+        vocabulary = note_vocabulary(Session())
+        self._vocab_model = QStringListModel(vocabulary, self)
+        self._vocab_by_key = {normalize_note(n): n for n in vocabulary}
         right_col = QVBoxLayout()
         content_layout.addLayout(right_col, 1)
 
@@ -163,6 +168,10 @@ class AddPerfumeDialog(QDialog):
         row = QHBoxLayout()
         note_input = QLineEdit()
         note_input.setPlaceholderText("Dodaj nutę…")
+        completer = QCompleter(self._vocab_model, note_input)
+        completer.setCaseSensitivity(Qt.CaseInsensitive)
+        completer.setFilterMode(Qt.MatchContains)
+        note_input.setCompleter(completer)
         add_btn = QPushButton("+")
         add_btn.setFocusPolicy(Qt.NoFocus)  # brak focusu na przycisku "+"
         row.addWidget(note_input)
@@ -174,6 +183,8 @@ class AddPerfumeDialog(QDialog):
         def add_note():
             text = note_input.text().strip()
             if text:
+                # nuta znana ze słownika – zapisz ją w kanonicznej pisowni
+                text = self._vocab_by_key.get(normalize_note(text), text)
                 notes_list.addItem(QListWidgetItem(text))
                 note_input.clear()
 
@@ -201,9 +212,10 @@ class AddPerfumeDialog(QDialog):
             pix.loadFromData(data)
             thumb = pix.scaled(100, 130, Qt.KeepAspectRatio, Qt.SmoothTransformation)
             self.img_label.setPixmap(thumb)
-            self.image_data = base64.b64encode(data).decode()
+            self.image_bytes = data
 
-    def get_data(self) -> dict:
+    def get_data(self, session) -> dict:
+        """Pola perfum; nowy obraz trafia do ``session`` – zapisze go commit wywołującego."""
         def list_to_str(lw):
             return ", ".join(lw.item(i).text() for i in range(lw.count()))
 
@@ -229,5 +241,5 @@ class AddPerfumeDialog(QDialog):
             "top_notes": list_to_str(self.top_notes_list),
             "heart_notes": list_to_str(self.heart_notes_list),
             "base_notes": list_to_str(self.base_notes_list),
-            "image_data": getattr(self, "image_data", ""),
+            "image_hash": store_image(session, self.image_bytes) if self.image_bytes else None,
         }
@@ -0,0 +1,40 @@
+# ui/button_delegate.py
+
+from PyQt5.QtCore import Qt, QEvent, QModelIndex, QPersistentModelIndex, pyqtSignal
+from PyQt5.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionButton
+
+
+class ButtonDelegate(QStyledItemDelegate):
+    """Rysuje przycisk w komórce tabeli bez tworzenia prawdziwego QPushButton.
+
+    Jeden delegat obsługuje całą kolumnę – kliknięcie emituje ``clicked``
+    z indeksem komórki (indeks modelu widoku, np. proxy).
+    """
+    clicked = pyqtSignal(QModelIndex)
+
+    def __init__(self, text, parent=None):
+        super().__init__(parent)
+        self._text = text
+        self._pressed = QPersistentModelIndex()
+
+    def paint(self, painter, option, index):
+        opt = QStyleOptionButton()
+        opt.rect = option.rect.adjusted(2, 2, -2, -2)
+        opt.text = self._text
+        opt.state = QStyle.State_Enabled | QStyle.State_Raised
+        if self._pressed.isValid() and QModelIndex(self._pressed) == index:
+            opt.state = QStyle.State_Enabled | QStyle.State_Sunken
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_PushButton, opt, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonPress and event.button() == Qt.LeftButton:
+            self._pressed = QPersistentModelIndex(index)
+            return True
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            was_pressed = self._pressed.isValid() and QModelIndex(self._pressed) == index
+            self._pressed = QPersistentModelIndex()
+            if was_pressed and option.rect.contains(event.pos()):
+                self.clicked.emit(index)
+            return True
+        return False
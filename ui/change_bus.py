@@ -0,0 +1,53 @@
+# ui/change_bus.py
+"""Powiadomienia widoków o zatwierdzonych zmianach (sygnały Qt).
+
+Widok subskrybuje sygnał i odświeża tylko wskazane wiersze – nie musi wiedzieć,
+kto zmienił dane (okno zamówienia, import, inna zakładka). Sygnały niosą zbiór
+id albo None (zmieniło się nie wiadomo co – wczytaj wszystko od nowa).
+Sygnały idą zawsze kolejką zdarzeń Qt – widok odświeża się po zakończeniu
+commit (w ``after_commit`` sesja nie może jeszcze wykonywać zapytań), także
+gdy commit wykonał wątek roboczy.
+"""
+
+from PyQt5.QtCore import QObject, Qt, pyqtSignal
+
+from models.catalog import catalog  # noqa: F401 – katalog unieważnia się przed widokami
+from models.changes import ALL, add_change_listener
+
+
+def _ids(ids):
+    return None if ALL in ids else frozenset(ids)
+
+
+class ChangeBus(QObject):
+    perfumes_changed = pyqtSignal(object)  # id perfum (także zmienione liczniki) albo None
+    orders_changed = pyqtSignal(object)    # id zamówień zmienionych lub nowych albo None
+    orders_deleted = pyqtSignal(object)    # id usuniętych zamówień
+    _published = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._published.connect(self._dispatch, Qt.QueuedConnection)
+
+    def publish(self, changes):
+        self._published.emit(changes)
+
+    def _dispatch(self, changes):
+        if changes.perfume_ids:
+            self.perfumes_changed.emit(_ids(changes.perfume_ids))
+        if changes.order_ids:
+            self.orders_changed.emit(_ids(changes.order_ids))
+        if changes.deleted_order_ids:
+            self.orders_deleted.emit(frozenset(changes.deleted_order_ids))
+
+
+_bus = None
+
+
+def change_bus():
+    """Wspólna szyna aplikacji; pierwsze wywołanie musi paść w wątku GUI."""
+    global _bus
+    if _bus is None:
+        _bus = ChangeBus()
+        add_change_listener(_bus.publish)
+    return _bus
@@ -1,17 +1,20 @@
 # ui/edit_perfume_dialog.py
 
-import base64
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QSpinBox,
     QDoubleSpinBox, QPushButton, QMessageBox, QComboBox, QCheckBox,
-    QListWidget, QListWidgetItem, QFileDialog
+    QListWidget, QListWidgetItem, QFileDialog, QCompleter
 )
 from PyQt5.QtGui import QPixmap, QFont
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QStringListModel
+from models.database import Session
+from models.note import note_vocabulary, normalize_note
+from models.image import store_image
 from models.perfume import Perfume
+from ui.thumbnails import ThumbnailCache, DIALOG_THUMB_SIZE, decode_thumbnail
 
 class EditPerfumeDialog(QDialog):
-    def __init__(self, perfume: Perfume, parent=None):
+    def __init__(self, perfume: Perfume, parent=None, thumbnails: ThumbnailCache = None):
         super().__init__(parent)
         self.perfume = perfume
         self.setWindowTitle("Edytuj perfumy")
@@ -20,7 +23,8 @@ class EditPerfumeDialog(QDialog):
         base_font.setPointSize(9)
         self.setFont(base_font)
 
-        self.image_data = perfume.image_data or ""
+        self.image_hash = perfume.image_hash
+        self.image_bytes = None  # nowo wybrany plik; None = obraz bez zmian
 
         main_layout = QVBoxLayout(self)
         content_layout = QHBoxLayout()
@@ -142,7 +146,10 @@ class EditPerfumeDialog(QDialog):
 
         left_col.addStretch()
 
-        # PRAWA KOLUMNA – nuty zapachowe
+        # PRAWA KOLUMNA – nuty zapachowe (podpowiedzi ze słownika nut)
+        vocabulary = note_vocabulary(Session())
+        self._vocab_model = QStringListModel(vocabulary, self)
+        self._vocab_by_key = {normalize_note(n): n for n in vocabulary}
         right_col = QVBoxLayout()
         content_layout.addLayout(right_col, 1)
 
@@ -168,15 +175,20 @@ class EditPerfumeDialog(QDialog):
         # Ustaw focus na polu Nazwa
         self.name_input.setFocus()
 
-        # Załaduj istniejący obraz
-        if self.image_data:
-            self._set_image_from_bytes(base64.b64decode(self.image_data))
+        # Istniejący obraz z pamięci miniatur widoku; brak w pamięci = dekodowanie w tle
+        self._thumbnails = thumbnails or ThumbnailCache(DIALOG_THUMB_SIZE, parent=self)
+        self._thumbnails.ready.connect(self._on_thumbnail_ready)
+        self._on_thumbnail_ready(perfume.id)
 
     def _build_notes_group(self, parent, title, csv_notes=""):
         parent.addWidget(QLabel(f"{title}"))
         row = QHBoxLayout()
         note_input = QLineEdit()
         note_input.setPlaceholderText("Dodaj nutę…")
+        completer = QCompleter(self._vocab_model, note_input)
+        completer.setCaseSensitivity(Qt.CaseInsensitive)
+        completer.setFilterMode(Qt.MatchContains)
+        note_input.setCompleter(completer)
         add_btn = QPushButton("+")
         add_btn.setFocusPolicy(Qt.NoFocus)
         row.addWidget(note_input)
@@ -194,6 +206,8 @@ class EditPerfumeDialog(QDialog):
         def add_note():
             t = note_input.text().strip()
             if t:
+                # nuta znana ze słownika – zapisz ją w kanonicznej pisowni
+                t = self._vocab_by_key.get(normalize_note(t), t)
                 notes_list.addItem(QListWidgetItem(t))
                 note_input.clear()
 
@@ -212,16 +226,27 @@ class EditPerfumeDialog(QDialog):
         path, _ = QFileDialog.getOpenFileName(self, "Wybierz obraz", "", "Obrazy (*.png *.jpg *.jpeg)")
         if path:
             data = open(path, "rb").read()
-            self._set_image_from_bytes(data)
+            self.image_bytes = data
+            self._show_image(data)
 
-    def _set_image_from_bytes(self, data: bytes):
-        pix = QPixmap()
-        pix.loadFromData(data)
-        thumb = pix.scaled(100, 130, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        self.img_label.setPixmap(thumb)
-        self.image_data = base64.b64encode(data).decode()
+    def _on_thumbnail_ready(self, perfume_id):
+        if perfume_id != self.perfume.id or self.image_bytes is not None:
+            return
+        pix = self._thumbnails.get(perfume_id, self.image_hash)
+        if pix is not None:
+            self._set_pixmap(pix)
+
+    def _show_image(self, data: bytes):
+        self._set_pixmap(QPixmap.fromImage(decode_thumbnail(data, DIALOG_THUMB_SIZE)))
+
+    def _set_pixmap(self, pix: QPixmap):
+        size = self.img_label.size()
+        if pix.width() > size.width() or pix.height() > size.height():
+            pix = pix.scaled(size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        self.img_label.setPixmap(pix)
 
-    def get_data(self) -> dict:
+    def get_data(self, session) -> dict:
+        """Pola perfum; nowy obraz trafia do ``session`` – zapisze go commit wywołującego."""
         def list_to_str(lw):
             return ", ".join(lw.item(i).text() for i in range(lw.count()))
 
@@ -244,5 +269,5 @@ class EditPerfumeDialog(QDialog):
             "top_notes": list_to_str(self.top_notes_list),
             "heart_notes": list_to_str(self.heart_notes_list),
             "base_notes": list_to_str(self.base_notes_list),
-            "image_data": self.image_data,
+            "image_hash": store_image(session, self.image_bytes) if self.image_bytes else self.image_hash,
         }
@@ -0,0 +1,100 @@
+# ui/export_dialog.py
+"""Okno eksportu danych do CSV / XLSX (zestaw, etap/status, zakres dat sprzedaży)."""
+
+from datetime import date
+
+from PyQt5.QtCore import QDate
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QGridLayout, QLabel, QComboBox, QCheckBox,
+    QDateEdit, QPushButton, QFileDialog,
+)
+
+from models.database import track_action
+from services.export import DATASETS, ExportFilter, export_dataset
+from ui.export_job import start_export
+
+ALL = "Wszystkie"
+
+
+class ExportDialog(QDialog):
+    def __init__(self, parent=None, dataset_key="orders"):
+        super().__init__(parent)
+        self.setWindowTitle("Eksport danych")
+
+        layout = QVBoxLayout(self)
+        grid = QGridLayout()
+
+        grid.addWidget(QLabel("Dane:"), 0, 0)
+        self.dataset_combo = QComboBox()
+        for key, dataset in DATASETS.items():
+            self.dataset_combo.addItem(dataset.title, key)
+        self.dataset_combo.currentIndexChanged.connect(self._on_dataset_changed)
+        grid.addWidget(self.dataset_combo, 0, 1, 1, 3)
+
+        grid.addWidget(QLabel("Stan:"), 1, 0)
+        self.status_combo = QComboBox()
+        grid.addWidget(self.status_combo, 1, 1, 1, 3)
+
+        self.dates_checkbox = QCheckBox("Data sprzedaży od:")
+        grid.addWidget(self.dates_checkbox, 2, 0)
+        today = QDate.currentDate()
+        self.date_from = QDateEdit(QDate(today.year(), 1, 1))
+        self.date_to = QDateEdit(today)
+        for edit in (self.date_from, self.date_to):
+            edit.setCalendarPopup(True)
+            edit.setEnabled(False)
+            self.dates_checkbox.toggled.connect(edit.setEnabled)
+        grid.addWidget(self.date_from, 2, 1)
+        grid.addWidget(QLabel("do:"), 2, 2)
+        grid.addWidget(self.date_to, 2, 3)
+        layout.addLayout(grid)
+
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        export_btn = QPushButton("Eksportuj…")
+        export_btn.clicked.connect(self.export)
+        cancel_btn = QPushButton("Anuluj")
+        cancel_btn.clicked.connect(self.reject)
+        buttons.addWidget(export_btn)
+        buttons.addWidget(cancel_btn)
+        layout.addLayout(buttons)
+
+        self.dataset_combo.setCurrentIndex(max(self.dataset_combo.findData(dataset_key), 0))
+        self._on_dataset_changed()
+
+    def _on_dataset_changed(self):
+        dataset = DATASETS[self.dataset_combo.currentData()]
+        self.status_combo.clear()
+        self.status_combo.addItem(ALL, None)
+        for status in dataset.statuses:
+            self.status_combo.addItem(status, status)
+        self.dates_checkbox.setEnabled(dataset.has_dates)
+        if not dataset.has_dates:
+            self.dates_checkbox.setChecked(False)
+
+    def export_filter(self):
+        dates = self.dates_checkbox.isChecked()
+        return ExportFilter(
+            date_from=self.date_from.date().toPyDate() if dates else None,
+            date_to=self.date_to.date().toPyDate() if dates else None,
+            status=self.status_combo.currentData(),
+        )
+
+    def export(self):
+        key = self.dataset_combo.currentData()
+        flt = self.export_filter()
+        filename = f"{key}_{date.today():%Y_%m_%d}.csv"
+        path, selected = QFileDialog.getSaveFileName(
+            self, "Eksport danych", filename, "CSV (*.csv);;Excel (*.xlsx)",
+        )
+        if not path:
+            return None
+        if not path.lower().endswith((".csv", ".xlsx")):
+            path += ".xlsx" if "xlsx" in selected else ".csv"
+
+        def write(out_path, session, progress, is_cancelled):
+            return export_dataset(out_path, session, key, flt, progress, is_cancelled)
+
+        self.accept()
+        with track_action("Eksport danych"):
+            return start_export(self.parent(), write, path, f"Eksport: {DATASETS[key].title}…")
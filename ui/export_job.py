@@ -0,0 +1,103 @@
+# ui/export_job.py
+"""Eksport do pliku w wątku roboczym, z paskiem postępu i przyciskiem Anuluj.
+
+Funkcja eksportu dostaje ścieżkę, własną sesję wątku oraz wywołania
+``progress(zrobione, wszystkie)`` i ``is_cancelled()``; przerwanie sygnalizuje
+wyjątkiem ``ExportCancelled``. Niepełny plik sprząta sama funkcja eksportu
+(``services.export.replacing``) – ścieżka wybrana przez użytkownika jest
+zastępowana dopiero gotowym plikiem.
+"""
+
+import threading
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, Qt, pyqtSignal
+from PyQt5.QtWidgets import QProgressDialog, QMessageBox
+
+from models.database import SessionFactory, current_action, attach_action
+from services.export import ExportCancelled
+
+
+class _ExportSignals(QObject):
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(str, str)  # ścieżka, błąd ("" = sukces)
+    cancelled = pyqtSignal()
+
+
+class ExportJob(QRunnable):
+    # zadania w toku – żyją do końca run(), nawet gdy okno już zamknięto
+    _alive = set()
+
+    def __init__(self, write, path):
+        super().__init__()
+        self.setAutoDelete(False)
+        ExportJob._alive.add(self)
+        self.signals = _ExportSignals()
+        self.path = path
+        self._write = write
+        self._cancel = threading.Event()
+        action = current_action()
+        self.action = action and action.retain()  # akcja kończy się po dostarczeniu wyniku
+
+    def cancel(self):
+        self._cancel.set()
+
+    def run(self):
+        session = SessionFactory()
+        try:
+            with attach_action(self.action):
+                self._write(self.path, session, self._emit_progress, self._cancel.is_set)
+            self._emit(self.signals.finished, self.path, "")
+        except ExportCancelled:
+            self._emit(self.signals.cancelled)
+        except Exception as e:
+            self._emit(self.signals.finished, self.path, str(e) or e.__class__.__name__)
+        finally:
+            session.close()
+            ExportJob._alive.discard(self)
+
+    def _emit_progress(self, done, total):
+        self._emit(self.signals.progress, done, total)
+
+    @staticmethod
+    def _emit(signal, *args):
+        try:
+            signal.emit(*args)
+        except RuntimeError:
+            pass  # aplikacja jest zamykana – wynik nie ma już dokąd trafić
+
+
+def start_export(parent, write, path, label):
+    """Uruchamia eksport w tle z oknem postępu; zwraca zadanie (np. do testów)."""
+    dialog = QProgressDialog(label, "Anuluj", 0, 0, parent)
+    dialog.setWindowTitle("Eksport")
+    dialog.setWindowModality(Qt.WindowModal)
+    dialog.setMinimumDuration(300)
+    dialog.setAutoClose(False)
+    dialog.setAutoReset(False)
+
+    job = ExportJob(write, path)
+    dialog.canceled.connect(job.cancel)
+
+    def on_progress(done, total):
+        dialog.setMaximum(max(total, 1))
+        dialog.setValue(done)
+
+    def on_finished(out_path, error):
+        _done()
+        if error:
+            QMessageBox.critical(parent, "Błąd eksportu", error)
+        else:
+            QMessageBox.information(parent, "Eksport zakończony", f"Plik zapisany do:\n{out_path}")
+
+    def _done():
+        dialog.canceled.disconnect(job.cancel)
+        dialog.close()
+        dialog.deleteLater()
+        if job.action is not None:
+            job.action.release()
+
+    job.signals.progress.connect(on_progress)
+    job.signals.finished.connect(on_finished)
+    job.signals.cancelled.connect(_done)
+    QThreadPool.globalInstance().start(job)
+    return job
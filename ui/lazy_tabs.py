@@ -0,0 +1,44 @@
+# ui/lazy_tabs.py
+"""Zakładki tworzone dopiero przy pierwszym pokazaniu.
+
+``LazyTabWidget.add_lazy_tab(factory, title)`` wstawia pustą stronę; widok
+z ``factory()`` powstaje, gdy strona pierwszy raz staje się widoczna (zakładka
+aktywna w pokazanym oknie). Zakładki, których użytkownik nie otworzy, nie
+kosztują ani budowy widżetów, ani zapytań.
+"""
+
+from PyQt5.QtWidgets import QTabWidget, QVBoxLayout, QWidget
+
+
+class LazyPage(QWidget):
+    """Strona zakładki, która przy pierwszym pokazaniu buduje właściwy widok."""
+
+    def __init__(self, factory, parent=None):
+        super().__init__(parent)
+        self._factory = factory
+        self._view = None
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+    def view(self):
+        """Zbudowany widok albo None, jeśli strony jeszcze nie pokazano."""
+        return self._view
+
+    def ensure_view(self):
+        if self._view is None:
+            self._view = self._factory()
+            self._factory = None
+            self.layout().addWidget(self._view)
+        return self._view
+
+    def showEvent(self, event):
+        self.ensure_view()
+        super().showEvent(event)
+
+
+class LazyTabWidget(QTabWidget):
+    def add_lazy_tab(self, factory, title):
+        """Dodaje zakładkę, której widok powstanie przy pierwszym pokazaniu; zwraca LazyPage."""
+        page = LazyPage(factory)
+        self.addTab(page, title)
+        return page
@@ -0,0 +1,135 @@
+# ui/loader.py
+"""Wczytywanie danych list w tle.
+
+Zmiany filtrów są zbierane z opóźnieniem (debounce), a zapytanie wykonuje
+wątek z ``QThreadPool`` we własnej sesji. Do wątku GUI trafia wyłącznie
+wynik najnowszego żądania – starsze zadania są wyjmowane z kolejki puli,
+a wyniki tych, które już ruszyły, odrzucane.
+
+Funkcja zapytania dostaje sesję i zwraca zwykłe dane (wiersze, zbiory id),
+nigdy obiekty ORM – sesja wątku jest zamykana zaraz po zapytaniu.
+
+Żądanie zgłoszone wewnątrz ``track_action`` należy do tej akcji: jej zapytania
+w tle są doliczane do statystyk, a akcja kończy się dopiero po dostarczeniu
+wyniku (albo po jego odrzuceniu).
+"""
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+from models.database import SessionFactory, current_action, attach_action
+
+DEBOUNCE_MS = 250
+
+
+class _JobSignals(QObject):
+    # sygnał z wątku roboczego → kolejka zdarzeń wątku GUI
+    finished = pyqtSignal(int, object, str)  # generacja, wynik, błąd
+
+
+class _LoadJob(QRunnable):
+    # zadania w kolejce lub w toku – żyją do końca run(), nawet gdy widok już zamknięto
+    _alive = set()
+
+    def __init__(self, loader, generation, query, action):
+        super().__init__()
+        self.setAutoDelete(False)  # referencję trzyma Python (tryTake)
+        _LoadJob._alive.add(self)
+        self.signals = _JobSignals()
+        self._loader = loader
+        self.generation = generation
+        self._query = query
+        self.action = action
+
+    def run(self):
+        result, error = None, ""
+        if self._loader.is_current(self.generation):
+            session = SessionFactory()
+            try:
+                with attach_action(self.action):
+                    result = self._query(session)
+            except Exception as e:
+                error = str(e) or e.__class__.__name__
+            finally:
+                session.close()
+        try:
+            self.signals.finished.emit(self.generation, result, error)
+        except RuntimeError:
+            pass  # aplikacja jest zamykana – wynik nie ma już dokąd trafić
+        finally:
+            _LoadJob._alive.discard(self)
+
+
+class BackgroundLoader(QObject):
+    """Wykonuje ``query(session)`` w tle; emituje tylko najnowszy wynik."""
+
+    loaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, delay_ms=DEBOUNCE_MS, parent=None, pool=None):
+        super().__init__(parent)
+        self._pool = pool or QThreadPool.globalInstance()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self._start)
+        self._query = None
+        self._action = None  # akcja (track_action), do której należy czekające zapytanie
+        self._generation = 0
+        self._jobs = {}  # generacja → zadanie w kolejce lub w toku
+
+    def request(self, query, immediate=False):
+        """Zleca zapytanie; kolejne wywołania w oknie opóźnienia je zastępują."""
+        self._generation += 1  # od tej chwili starsze wyniki są nieaktualne
+        self._query = query
+        action = current_action()
+        self._release(self._action)
+        self._action = action and action.retain()
+        self._cancel_queued()
+        if immediate:
+            self._timer.stop()
+            self._start()
+        else:
+            self._timer.start()
+
+    def is_current(self, generation):
+        return generation == self._generation
+
+    def is_busy(self):
+        """True, dopóki najnowszy wynik nie został dostarczony."""
+        return self._query is not None or self._generation in self._jobs
+
+    def _cancel_queued(self):
+        for generation, job in list(self._jobs.items()):
+            if self._pool.tryTake(job):
+                del self._jobs[generation]
+                _LoadJob._alive.discard(job)
+                self._release(job.action)
+
+    @staticmethod
+    def _release(action):
+        if action is not None:
+            action.release()
+
+    def _start(self):
+        query, self._query = self._query, None
+        action, self._action = self._action, None
+        if query is None:
+            return
+        job = _LoadJob(self, self._generation, query, action)
+        job.signals.finished.connect(self._on_finished)
+        self._jobs[self._generation] = job
+        self._pool.start(job)
+
+    def _on_finished(self, generation, result, error):
+        job = self._jobs.pop(generation, None)
+        action = job.action if job else None
+        try:
+            if not self.is_current(generation):
+                return
+            with attach_action(action):  # odświeżenie modelu też należy do akcji
+                if error:
+                    self.failed.emit(error)
+                else:
+                    self.loaded.emit(result)
+        finally:
+            self._release(action)
@@ -1,6 +1,9 @@
 from PyQt5.QtWidgets import QMainWindow, QTabWidget
 from PyQt5.QtCore import Qt, QTimer
 
+from models.database import load_debug_config
+from ui.lazy_tabs import LazyTabWidget
+from ui.query_status import QueryStatusBar
 from ui.rozbiorki_view import rozbiorkaView
 from ui.pelne_flakony_view import PelneFlakonyView
 from ui.gotowe_odlewki_view import GotoweOdlewkiView
@@ -12,22 +15,22 @@ class MainWindow(QMainWindow):
         self.setWindowState(Qt.WindowMaximized)  # Maksymalizuj po otwarciu
 
         # Główny widget z zakładkami
-        tabs = QTabWidget()
+        tabs = LazyTabWidget()
         tabs.setTabPosition(QTabWidget.North)
         tabs.setMovable(True)
 
-        # Tworzenie trzech głównych widoków
-        self.rozbiorki_view = rozbiorkaView()
-        self.pelne_flakony_view = PelneFlakonyView()
-        self.gotowe_odlewki_view = GotoweOdlewkiView()
-
-        # Dodanie zakładek
-        tabs.addTab(self.rozbiorki_view, "Rozbiórki")
-        tabs.addTab(self.pelne_flakony_view, "Pełne flakony")
-        tabs.addTab(self.gotowe_odlewki_view, "Gotowe odlewki")
+        # Trzy główne widoki – każdy powstaje przy pierwszym otwarciu zakładki,
+        # a dane wczytuje dopiero po narysowaniu okna
+        tabs.add_lazy_tab(rozbiorkaView, "Rozbiórki")
+        tabs.add_lazy_tab(PelneFlakonyView, "Pełne flakony")
+        tabs.add_lazy_tab(GotoweOdlewkiView, "Gotowe odlewki")
 
         self.setCentralWidget(tabs)
 
+        # Statystyki zapytań ostatniej akcji – tylko w trybie diagnostycznym
+        if load_debug_config()["status_bar"]:
+            self.setStatusBar(QueryStatusBar(self))
+
         # Dopasuj do ekranu przy starcie oraz przy każdym resize
         QTimer.singleShot(10, self.resize_to_screen)
 
@@ -0,0 +1,363 @@
+# ui/orders_model.py
+
+from dataclasses import dataclass, replace
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtGui import QColor
+from sqlalchemy import func, tuple_, type_coerce, case, literal_column, String
+from sqlalchemy.orm import selectinload
+
+from models.order import (
+    Order, STAGES, STAGE_SEND_MESSAGE, STAGE_AWAITING_PAYMENT, STAGE_GENERATE_LABEL,
+    STAGE_SEND_PACKAGE, STAGE_GET_CONFIRMATION, STAGE_COMPLETE_BUYER, STAGE_DONE,
+)
+from models.order_item import OrderItem
+from models.perfume import Perfume
+from models.search_index import buyer_search_clause
+
+ID_ROLE = Qt.UserRole + 1
+
+COLUMNS = [
+    "Lp", "Kupujący", "Perfumy", "Kwota", "Wysyłka", "Stan",
+    "Data sprzedaży", "Gratis", "Uwagi", "Data potw.",
+    "Edytuj", "Usuń",
+]
+COL_EDIT = 10
+COL_DELETE = 11
+
+PAGE_SIZE = 200
+SPLIT_BG = QColor(210, 234, 255)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# LOGIKA STANU / KUPUJĄCEGO
+# ─────────────────────────────────────────────────────────────────────────────
+
+def buyer_display_name(order):
+    """Najlepsza dostępna nazwa kupującego."""
+    # Priorytet: name (FB) > buyer (stare) > imię nazwisko > "Brak danych"
+    name = getattr(order, 'name', None)
+    if name and name.strip():
+        return name.strip()
+
+    buyer = getattr(order, 'buyer', None)
+    if buyer and buyer.strip():
+        return buyer.strip()
+
+    first_name = getattr(order, 'first_name', None) or ""
+    last_name = getattr(order, 'last_name', None) or ""
+    full_name = f"{first_name} {last_name}".strip()
+    if full_name:
+        return full_name
+
+    return "Brak danych"
+
+
+# kolor etapu w kolumnie "Stan"
+STAGE_COLORS = {
+    STAGE_SEND_MESSAGE: QColor("red"),
+    STAGE_AWAITING_PAYMENT: QColor("black"),
+    STAGE_GENERATE_LABEL: QColor("red"),
+    STAGE_SEND_PACKAGE: QColor("red"),
+    STAGE_GET_CONFIRMATION: QColor("purple"),
+    STAGE_COMPLETE_BUYER: QColor("darkviolet"),
+    STAGE_DONE: QColor("gray"),
+}
+
+
+def order_status(o: Order):
+    """Etap realizacji zamówienia i kolor, którym jest wyświetlany."""
+    stage = o.stage or o.compute_stage()
+    return stage, STAGE_COLORS[stage]
+
+
+def stage_counts(session, split_only=False):
+    """Liczba zamówień w każdym etapie – jedno GROUP BY po indeksie."""
+    q = session.query(Order.stage, func.count(Order.id)).group_by(Order.stage)
+    if split_only:
+        q = q.filter(Order.is_split.is_(True))
+    return dict(q.all())
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# SORTOWANIE W SQL
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _text_key(col):
+    return func.lower(func.coalesce(col, ""))
+
+
+def _date_key(col):
+    # daty w SQLite są tekstem 'RRRR-MM-DD' – porównujemy je jako tekst;
+    # '' wpisane literalnie, żeby wyrażenie pasowało do indeksu ix_orders_sale_date_sort
+    return type_coerce(func.coalesce(col, literal_column("''")), String)
+
+
+# kolumna tabeli → wyrażenie ORDER BY (brak klucza = kolumna niesortowalna)
+SORT_KEYS = {
+    0: Order.id,
+    1: _text_key(func.coalesce(Order.name, Order.buyer, Order.first_name)),
+    3: func.coalesce(Order.total, 0.0),
+    4: func.coalesce(Order.shipping, 0.0),
+    5: case({stage: i for i, stage in enumerate(STAGES)}, value=Order.stage, else_=len(STAGES)),
+    6: _date_key(Order.sale_date),
+    8: _text_key(Order.notes),
+    9: _date_key(Order.confirmation_date),
+}
+
+
+class OrderRow:
+    """Lekki rekord jednego wiersza tabeli zamówień."""
+    __slots__ = (
+        "id", "buyer", "paid", "total", "shipping", "status", "status_color",
+        "sale_date", "gratis", "notes", "confirmation_date", "is_split", "sort_key",
+    )
+
+    def __init__(self, order, paid, gratis):
+        self.id = order.id
+        self.buyer = buyer_display_name(order)
+        self.paid = paid
+        self.total = order.total or 0.0
+        self.shipping = order.shipping or 0.0
+        self.status, self.status_color = order_status(order)
+        self.sale_date = str(order.sale_date or "")
+        self.gratis = gratis
+        self.notes = order.notes or ""
+        self.confirmation_date = order.confirmation_date.isoformat() if order.confirmation_date else ""
+        self.is_split = bool(getattr(order, "is_split", False))
+        self.sort_key = None  # wartość ORDER BY – miejsce wiersza przy odświeżaniu pojedynczych zamówień
+
+
+@dataclass(frozen=True)
+class OrdersQuery:
+    """Filtry i sortowanie listy zamówień – niezmienne, więc bezpieczne dla wątków."""
+    split_only: bool = False
+    status: str = "Wszystkie"
+    buyer_q: str = ""
+    sort_col: int = 0
+    sort_order: int = Qt.AscendingOrder
+
+
+def _base_query(session, spec, key):
+    # pozycje i perfumy całej strony dociągane zbiorczo (SELECT ... IN)
+    q = session.query(Order, key.label("sort_key")).options(
+        selectinload(Order.items)
+        .selectinload(OrderItem.perfume)
+        .load_only(Perfume.id, Perfume.brand, Perfume.name)
+    )
+    if spec.split_only:
+        q = q.filter(Order.is_split.is_(True))
+    if spec.status != "Wszystkie":
+        q = q.filter(Order.stage == spec.status)
+    buyer_clause = buyer_search_clause(spec.buyer_q)
+    if buyer_clause is not None:
+        q = q.filter(buyer_clause)
+    return q
+
+
+def page_query(session, spec, cursor=None):
+    """Zapytanie o stronę po kursorze (keyset) – bez LIMIT."""
+    key = SORT_KEYS[spec.sort_col]
+    desc = spec.sort_order == Qt.DescendingOrder
+    q = _base_query(session, spec, key)
+    if cursor is not None:
+        pos, last = tuple_(key, Order.id), tuple_(*cursor)
+        q = q.filter(pos < last if desc else pos > last)
+    if desc:
+        return q.order_by(key.desc(), Order.id.desc())
+    return q.order_by(key, Order.id)
+
+
+def fetch_orders_page(session, spec, cursor=None):
+    """Kolejne do PAGE_SIZE wierszy po kursorze – wszystkie filtry są w SQL.
+
+    Zwraca (wiersze, nowy kursor, czy to ostatnia strona). Wynik nie zawiera
+    obiektów ORM, więc strona może być wczytana w wątku roboczym.
+    """
+    batch = page_query(session, spec, cursor).limit(PAGE_SIZE).all()
+    if batch:
+        last_order, last_key = batch[-1]
+        cursor = (last_key, last_order.id)
+    return _build_rows(batch), cursor, len(batch) < PAGE_SIZE
+
+
+def fetch_orders(session, spec, order_ids):
+    """Wiersze wskazanych zamówień, o ile nadal pasują do filtrów ``spec``."""
+    batch = _base_query(session, spec, SORT_KEYS[spec.sort_col]).filter(
+        Order.id.in_(list(order_ids))
+    ).populate_existing().all()
+    return _build_rows(batch)
+
+
+def _build_rows(batch):
+    rows = []
+    for o, sort_key in batch:
+        items = [i for i in o.items if i.perfume is not None]
+        paid = ", ".join(
+            f"{i.perfume.brand} {i.perfume.name} ({i.quantity_ml} ml)"
+            for i in items if i.price_per_ml > 0
+        )
+        gratis = ", ".join(
+            f"{i.perfume.brand} {i.perfume.name}"
+            for i in items if i.price_per_ml == 0
+        )
+        row = OrderRow(o, paid, gratis)
+        row.sort_key = sort_key
+        rows.append(row)
+    return rows
+
+
+class OrdersTableModel(QAbstractTableModel):
+    """Model zamówień doczytywany stronami (keyset) przez canFetchMore/fetchMore.
+
+    Pierwszą stronę dla nowych filtrów wczytuje zwykle widok w tle
+    (``set_first_page``); kolejne strony przy przewijaniu doczytuje model.
+    """
+
+    def __init__(self, session, parent=None):
+        super().__init__(parent)
+        self.session = session
+        self._rows = []
+        self._cursor = None       # (klucz sortowania, id) ostatniego przejrzanego zamówienia
+        self._exhausted = True
+        self._query = OrdersQuery()
+
+    # ── API Qt ──────────────────────────────────────────────────────────
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        r = self._rows[index.row()]
+        col = index.column()
+
+        if role == Qt.DisplayRole:
+            if col == 0: return str(index.row() + 1)
+            if col == 1: return r.buyer
+            if col == 2: return r.paid
+            if col == 3: return f"{r.total:.2f}"
+            if col == 4: return f"{r.shipping:.2f}"
+            if col == 5: return r.status
+            if col == 6: return r.sale_date
+            if col == 7: return r.gratis
+            if col == 8: return r.notes
+            if col == 9: return r.confirmation_date
+            return None
+        if role == ID_ROLE:
+            return r.id
+        if role == Qt.ForegroundRole and col == 5:
+            return r.status_color
+        if role == Qt.BackgroundRole and r.is_split and col < COL_EDIT:
+            return SPLIT_BG
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        rows, self._cursor, self._exhausted = fetch_orders_page(
+            self.session, self._query, self._cursor
+        )
+        if not rows:
+            return
+        start = len(self._rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if column not in SORT_KEYS:
+            return
+        self.set_query(replace(self._query, sort_col=column, sort_order=order))
+
+    # ── Ładowanie ───────────────────────────────────────────────────────
+
+    @property
+    def query(self):
+        return self._query
+
+    def set_query(self, query):
+        """Wczytuje od razu (w wątku GUI) pierwszą stronę dla podanych filtrów."""
+        self.set_first_page(query, *fetch_orders_page(self.session, query))
+
+    def set_first_page(self, query, rows, cursor, exhausted):
+        """Podmienia zawartość na pierwszą stronę wczytaną dla ``query``."""
+        self.beginResetModel()
+        self._query = query
+        self._rows = list(rows)
+        self._cursor = cursor
+        self._exhausted = exhausted
+        self.endResetModel()
+
+    def order_id_at(self, row):
+        return self._rows[row].id
+
+    # ── Zmiany pojedynczych zamówień ────────────────────────────────────
+
+    def refresh_orders(self, order_ids):
+        """Odświeża wskazane zamówienia bez przeładowania listy.
+
+        Zmienione wiersze są podmieniane w miejscu (albo przenoszone, gdy zmienił
+        się klucz sortowania), nowe wstawiane na swoje miejsce – o ile mieszczą
+        się we wczytanym zakresie stron – a te, które przestały pasować do
+        filtrów, usuwane.
+        """
+        fresh = {row.id: row for row in fetch_orders(self.session, self._query, order_ids)}
+        last_col = len(COLUMNS) - 1
+        for oid in order_ids:
+            row = fresh.get(oid)
+            pos = self._index_of(oid)
+            if pos is not None and row is not None and row.sort_key == self._rows[pos].sort_key:
+                self._rows[pos] = row
+                self.dataChanged.emit(self.index(pos, 0), self.index(pos, last_col))
+                continue
+            if pos is not None:
+                self._remove_at(pos)
+            if row is not None and self._in_loaded_range(row):
+                pos = self._insert_position(row)
+                self.beginInsertRows(QModelIndex(), pos, pos)
+                self._rows.insert(pos, row)
+                self.endInsertRows()
+
+    def remove_ids(self, order_ids):
+        for oid in order_ids:
+            pos = self._index_of(oid)
+            if pos is not None:
+                self._remove_at(pos)
+
+    def _index_of(self, order_id):
+        return next((i for i, r in enumerate(self._rows) if r.id == order_id), None)
+
+    def _remove_at(self, pos):
+        self.beginRemoveRows(QModelIndex(), pos, pos)
+        del self._rows[pos]
+        self.endRemoveRows()
+
+    def _descending(self):
+        return self._query.sort_order == Qt.DescendingOrder
+
+    def _in_loaded_range(self, row):
+        """Czy wiersz należy do już wczytanych stron (dalsze doczyta przewijanie)."""
+        if self._exhausted or self._cursor is None:
+            return True
+        key = (row.sort_key, row.id)
+        return key >= self._cursor if self._descending() else key <= self._cursor
+
+    def _insert_position(self, row):
+        key, desc = (row.sort_key, row.id), self._descending()
+        for i, r in enumerate(self._rows):
+            if ((r.sort_key, r.id) < key) if desc else ((r.sort_key, r.id) > key):
+                return i
+        return len(self._rows)
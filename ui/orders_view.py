@@ -1,55 +1,33 @@
 # ui/orders_view.py
 
-from functools import partial
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QColor, QFont
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QFont
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QComboBox,
-    QPushButton, QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox,
+    QPushButton, QTableView, QHeaderView, QMessageBox,
     QAbstractItemView, QCheckBox,
 )
 
-from models.database import Session
-from models.order import Order
-from models.order_item import OrderItem
-from models.perfume import Perfume
-from ui.add_order_dialog import AddOrderDialog
-
-# ─────────────────────────────────────────────────────────────────────────────
-# WŁASNE KOMÓRKI → POPRAWNE SORTOWANIE LICZB
-# ─────────────────────────────────────────────────────────────────────────────
-
-class IntItem(QTableWidgetItem):
-    """Komórka sortowana jako liczba całkowita."""
-    def __init__(self, value: int):
-        super().__init__(str(value))
-        self._v = value
-
-    def __lt__(self, other):
-        if isinstance(other, IntItem):
-            return self._v < other._v
-        return super().__lt__(other)
-
-class FloatItem(QTableWidgetItem):
-    """Komórka sortowana jako liczba zmiennoprzecinkowa."""
-    def __init__(self, value: float, prec: int = 2):
-        super().__init__(f"{value:.{prec}f}")
-        self._v = value
-
-    def __lt__(self, other):
-        if isinstance(other, FloatItem):
-            return self._v < other._v
-        return super().__lt__(other)
+from sqlalchemy.orm import selectinload
 
-# ─────────────────────────────────────────────────────────────────────────────
+from models.database import Session, track_action
+from models.order import Order, STAGES
+from ui.add_order_dialog import AddOrderDialog
+from ui.button_delegate import ButtonDelegate
+from ui.change_bus import change_bus
+from ui.export_dialog import ExportDialog
+from ui.loader import BackgroundLoader
+from ui.orders_model import (
+    OrdersTableModel, OrdersQuery, fetch_orders_page, stage_counts,
+    SORT_KEYS, ID_ROLE, COL_EDIT, COL_DELETE,
+)
 
 class OrdersView(QWidget):
     """Zakładka z listą zamówień."""
     
-    def __init__(self, perfumes_view=None, parent=None):
+    def __init__(self, parent=None):
         super().__init__(parent)
         self.session = Session()
-        self.perfumes_view = perfumes_view
         
         font = QFont()
         font.setPointSize(9)
@@ -63,11 +41,9 @@ class OrdersView(QWidget):
         # Filtr po stanie
         filters.addWidget(QLabel("Stan:"))
         self.status_combo = QComboBox()
-        self.status_combo.addItems([
-            "Wszystkie", "Wyślij wiadomość", "Oczekiwanie na zapłatę", 
-            "Wygeneruj etykietę", "Wyślij paczkę", "Pobierz potwierdzenie", 
-            "Uzupełnij dane kupującego", "Zakończone"
-        ])
+        self.status_combo.addItem("Wszystkie", "Wszystkie")
+        for stage in STAGES:
+            self.status_combo.addItem(stage, stage)
         self.status_combo.currentIndexChanged.connect(self.load_orders)
         filters.addWidget(self.status_combo)
         
@@ -81,24 +57,27 @@ class OrdersView(QWidget):
         # Wyszukiwarka po kupującym
         filters.addWidget(QLabel("Kupujący:"))
         self.search_edit = QLineEdit()
-        self.search_edit.setPlaceholderText("Szukaj po kupującym…")
-        self.search_edit.textChanged.connect(self.load_orders)
+        self.search_edit.setPlaceholderText("Nazwa, imię i nazwisko, e-mail lub telefon…")
+        self.search_edit.textChanged.connect(self.schedule_load)
         filters.addWidget(self.search_edit)
         
         root.addLayout(filters)
         
-        # ── PRZYCISK „DODAJ" ───────────────────────────────────────────────
+        # ── PRZYCISKI „DODAJ" I „EKSPORT" ──────────────────────────────────
+        buttons = QHBoxLayout()
         add_btn = QPushButton("Dodaj zamówienie")
         add_btn.clicked.connect(self.open_new_order)
-        root.addWidget(add_btn)
+        buttons.addWidget(add_btn, 1)
+        export_btn = QPushButton("Eksport CSV/XLSX")
+        export_btn.clicked.connect(lambda: ExportDialog(self, "orders").exec_())
+        buttons.addWidget(export_btn)
+        root.addLayout(buttons)
         
         # ── TABELA ─────────────────────────────────────────────────────────
-        self.table = QTableWidget(0, 12)
-        self.table.setHorizontalHeaderLabels([
-            "Lp", "Kupujący", "Perfumy", "Kwota", "Wysyłka", "Stan",
-            "Data sprzedaży", "Gratis", "Uwagi", "Data potw.",
-            "Edytuj", "Usuń",
-        ])
+        # Model doczytuje kolejne strony przy przewijaniu; sortuje SQL-em
+        self.model = OrdersTableModel(self.session, self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
         
         root.addWidget(self.table)
         self.setLayout(root)
@@ -114,203 +93,140 @@ class OrdersView(QWidget):
         self.table.setWordWrap(True)
         self.table.setFont(font)
         
+        # Przyciski rysowane delegatem zamiast widgetów w każdym wierszu
+        self.edit_delegate = ButtonDelegate("Edytuj", self.table)
+        self.edit_delegate.clicked.connect(lambda idx: self.edit_order(idx.data(ID_ROLE)))
+        self.table.setItemDelegateForColumn(COL_EDIT, self.edit_delegate)
+        
+        self.delete_delegate = ButtonDelegate("Usuń", self.table)
+        self.delete_delegate.clicked.connect(lambda idx: self.delete_order(idx.data(ID_ROLE)))
+        self.table.setItemDelegateForColumn(COL_DELETE, self.delete_delegate)
+        
         # BLOKADA EDYCJI
         self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         
-        self.load_orders()
+        # Sortowanie po kliknięciu nagłówka – ORDER BY w SQL (domyślnie po Lp)
+        header = self.table.horizontalHeader()
+        header.setSortIndicatorShown(True)
+        header.setSortIndicator(0, Qt.AscendingOrder)
+        header.sortIndicatorChanged.connect(self._on_sort_changed)
+        self._sort = (0, Qt.AscendingOrder)
+        
+        # Pierwsza strona i liczniki etapów wczytywane w tle
+        self.loader = BackgroundLoader(parent=self)
+        self.loader.loaded.connect(self._apply_loaded)
+        self.loader.failed.connect(
+            lambda msg: QMessageBox.warning(self, "Błąd", f"Nie udało się wczytać zamówień: {msg}")
+        )
+        
+        # Zmiany zatwierdzone gdziekolwiek – odświeżane tylko dotknięte wiersze
+        bus = change_bus()
+        bus.orders_changed.connect(self._on_orders_changed)
+        bus.orders_deleted.connect(self._on_orders_deleted)
+        
+        # pierwsze wczytanie dopiero przy pokazaniu (showEvent), po narysowaniu okna
+        self._load_started = False
+        self._first_load = QTimer(self)
+        self._first_load.setSingleShot(True)
+        self._first_load.timeout.connect(self.load_orders)
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self._load_started and not self._first_load.isActive():
+            self._first_load.start(0)
+    
+    def is_loading(self):
+        """True, dopóki pierwsze albo bieżące wczytanie nie dostarczyło wyników."""
+        return not self._load_started or self.loader.is_busy()
     
     # ─────────────────────────────────────────────────────────────────────
     # ŁADOWANIE
     # ─────────────────────────────────────────────────────────────────────
     
     def load_orders(self):
-        self.table.setSortingEnabled(False)
-        self.table.setRowCount(0)
-        
-        orders = self.session.query(Order).all()
-        
-        # Filtr po rozbiórce (checkbox)
-        if self.split_checkbox.isChecked():
-            orders = [o for o in orders if getattr(o, "is_split", False)]
-        
-        # Filtr po stanie
-        selected_status = self.status_combo.currentText()
-        if selected_status != "Wszystkie":
-            filtered_orders = []
-            for order in orders:
-                status_txt, _ = self._status(order)
-                if status_txt == selected_status:
-                    filtered_orders.append(order)
-            orders = filtered_orders
-        
-        # Wyszukiwarka - ZMIANA: obsłuż zarówno nowe pole 'name' jak i stare 'buyer'
-        buyer_q = self.search_edit.text().strip().lower()
-        if buyer_q:
-            def matches_buyer(order):
-                # Sprawdź nowe pole 'name' (Facebook)
-                name = getattr(order, 'name', None) or ""
-                if buyer_q in name.lower():
-                    return True
-                
-                # Sprawdź stare pole 'buyer' (kompatybilność wsteczna)
-                buyer = getattr(order, 'buyer', None) or ""
-                if buyer_q in buyer.lower():
-                    return True
-                
-                # Sprawdź imię i nazwisko
-                first_name = getattr(order, 'first_name', None) or ""
-                last_name = getattr(order, 'last_name', None) or ""
-                full_name = f"{first_name} {last_name}".strip()
-                if buyer_q in full_name.lower():
-                    return True
-                
-                return False
-            
-            orders = [o for o in orders if matches_buyer(o)]
-        
-        for lp, order in enumerate(orders, 1):
-            items = self.session.query(OrderItem).filter_by(order_id=order.id).all()
-            
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-            
-            paid = ", ".join(
-                f"{self.session.get(Perfume, i.perfume_id).brand} "
-                f"{self.session.get(Perfume, i.perfume_id).name} ({i.quantity_ml} ml)"
-                for i in items if i.price_per_ml > 0 and self.session.get(Perfume, i.perfume_id)
-            )
-            
-            gratis = ", ".join(
-                f"{self.session.get(Perfume, i.perfume_id).brand} "
-                f"{self.session.get(Perfume, i.perfume_id).name}"
-                for i in items if i.price_per_ml == 0 and self.session.get(Perfume, i.perfume_id)
-            )
-            
-            status_txt, status_col = self._status(order)
-            
-            # ZMIANA: wyświetl odpowiednie pole kupującego
-            buyer_display = self._get_buyer_display_name(order)
-            
-            self.table.setItem(row, 0, IntItem(lp))
-            self.table.setItem(row, 1, QTableWidgetItem(buyer_display))
-            self.table.setItem(row, 2, QTableWidgetItem(paid))
-            self.table.setItem(row, 3, FloatItem(order.total))
-            self.table.setItem(row, 4, FloatItem(order.shipping))
-            self.table.setItem(row, 5, self._colored_item(status_txt, status_col))
-            self.table.setItem(row, 6, QTableWidgetItem(str(order.sale_date or "")))
-            self.table.setItem(row, 7, QTableWidgetItem(gratis))
-            self.table.setItem(row, 8, QTableWidgetItem(order.notes or ""))
-            self.table.setItem(
-                row, 9,
-                QTableWidgetItem(order.confirmation_date.isoformat() if order.confirmation_date else "")
-            )
-            
-            # przyciski
-            edit_btn = QPushButton("Edytuj")
-            edit_btn.clicked.connect(partial(self.edit_order, order.id))
-            self.table.setCellWidget(row, 10, edit_btn)
-            
-            del_btn = QPushButton("Usuń")
-            del_btn.clicked.connect(partial(self.delete_order, order.id))
-            self.table.setCellWidget(row, 11, del_btn)
-            
-            # podświetlenie rozbiórek
-            if getattr(order, "is_split", False):
-                bg = QColor(210, 234, 255)
-                for c in range(self.table.columnCount()):
-                    cell = self.table.item(row, c)
-                    if cell:
-                        cell.setBackground(bg)
-        
-        # Domyślne sortowanie numeryczne po Lp
-        self.table.setSortingEnabled(True)
-        self.table.sortItems(0, Qt.AscendingOrder)
+        """Wczytuje w tle pierwszą stronę zamówień dla bieżących filtrów."""
+        self._load_started = True
+        with track_action("Wczytanie zamówień"):
+            self._request_load(immediate=True)
     
-    # ─────────────────────────────────────────────────────────────────────
-    # POMOCNICZE
-    # ─────────────────────────────────────────────────────────────────────
+    def schedule_load(self):
+        """Jak load_orders, ale dopiero po chwili przerwy w pisaniu."""
+        with track_action("Wyszukiwanie zamówień"):
+            self._request_load(immediate=False)
     
-    def _get_buyer_display_name(self, order):
-        """NOWA METODA: Zwróć najlepszą dostępną nazwę kupującego"""
-        # Priorytet: name (FB) > buyer (stare) > imię nazwisko > "Brak danych"
-        name = getattr(order, 'name', None)
-        if name and name.strip():
-            return name.strip()
-        
-        buyer = getattr(order, 'buyer', None)
-        if buyer and buyer.strip():
-            return buyer.strip()
-        
-        first_name = getattr(order, 'first_name', None) or ""
-        last_name = getattr(order, 'last_name', None) or ""
-        full_name = f"{first_name} {last_name}".strip()
-        if full_name:
-            return full_name
-        
-        return "Brak danych"
+    def _current_query(self):
+        sort_col, sort_order = self._sort
+        return OrdersQuery(
+            split_only=self.split_checkbox.isChecked(),
+            status=self.status_combo.currentData(),
+            buyer_q=self.search_edit.text(),
+            sort_col=sort_col,
+            sort_order=sort_order,
+        )
     
-    def _has_complete_buyer_data(self, order):
-        """NOWA METODA: Sprawdź czy zamówienie ma kompletne dane kupującego"""
-        # Sprawdź czy są wypełnione podstawowe dane kontaktowe
-        name = getattr(order, 'name', None)
-        first_name = getattr(order, 'first_name', None)
-        last_name = getattr(order, 'last_name', None)
-        email = getattr(order, 'email', None)
-        phone = getattr(order, 'phone', None)
-        
-        # Musi być wypełniona przynajmniej nazwa FB lub imię+nazwisko
-        has_name = (name and name.strip()) or (first_name and first_name.strip() and last_name and last_name.strip())
+    def _request_load(self, immediate):
+        query = self._current_query()
         
-        # Musi być wypełniony email lub telefon
-        has_contact = (email and email.strip()) or (phone and phone.strip())
+        def load(session):
+            return query, fetch_orders_page(session, query), stage_counts(session, query.split_only)
         
-        return has_name and has_contact
+        self.loader.request(load, immediate)
     
-    @staticmethod
-    def _colored_item(text, color: QColor):
-        item = QTableWidgetItem(text)
-        item.setForeground(color)
-        return item
+    def _apply_loaded(self, result):
+        query, page, counts = result
+        self.model.set_first_page(query, *page)
+        self._update_stage_counts(counts)
     
-    def _status(self, o: Order):
-        """ZAKTUALIZOWANA METODA: Dodano sprawdzanie danych kupującego"""
-        if o.confirmation_obtained:
-            # NOWA LOGIKA: Sprawdź dane kupującego po zakończeniu wszystkich kroków
-            if not self._has_complete_buyer_data(o):
-                return "Uzupełnij dane kupującego", QColor("darkviolet")
-            return "Zakończone", QColor("gray")
-        if o.sent:
-            return "Pobierz potwierdzenie", QColor("purple")
-        if o.generated_label:
-            return "Wyślij paczkę", QColor("red")
-        if o.received_money:
-            return "Wygeneruj etykietę", QColor("red")
-        if o.sent_message:
-            return "Oczekiwanie na zapłatę", QColor("black")
-        return "Wyślij wiadomość", QColor("red")
+    def _on_orders_changed(self, order_ids):
+        if not self._load_started:
+            return  # pierwsze wczytanie i tak zobaczy zmianę
+        if order_ids is None:
+            self.load_orders()
+            return
+        self.model.refresh_orders(order_ids)
+        self._update_stage_counts(stage_counts(self.session, self.model.query.split_only))
+    
+    def _on_orders_deleted(self, order_ids):
+        if not self._load_started:
+            return
+        self.model.remove_ids(order_ids)
+        self._update_stage_counts(stage_counts(self.session, self.model.query.split_only))
+    
+    def _update_stage_counts(self, counts):
+        """Dopisuje do pozycji filtra liczbę zamówień w każdym etapie."""
+        self.status_combo.setItemText(0, f"Wszystkie ({sum(counts.values())})")
+        for i, stage in enumerate(STAGES, 1):
+            self.status_combo.setItemText(i, f"{stage} ({counts.get(stage, 0)})")
+    
+    def _on_sort_changed(self, column, order):
+        if column in SORT_KEYS:
+            self._sort = (column, order)
+            self.load_orders()
+        else:
+            # kolumna bez sortowania w SQL – przywróć poprzedni wskaźnik
+            header = self.table.horizontalHeader()
+            header.blockSignals(True)
+            header.setSortIndicator(*self._sort)
+            header.blockSignals(False)
     
     # ─────────────────────────────────────────────────────────────────────
     # CRUD
     # ─────────────────────────────────────────────────────────────────────
     
+    # Po zapisie listy (tu i w zakładce perfum) odświeża szyna zmian (ui/change_bus.py)
+    
     def open_new_order(self):
         dlg = AddOrderDialog(self)
-        if dlg.exec_():
-            if self.perfumes_view:
-                self.perfumes_view.reload()  # ZMIANA: użyj reload() zamiast load_perfumes()
-            self.load_orders()
+        dlg.exec_()
     
     def edit_order(self, order_id: int):
-        order = self.session.get(Order, order_id)
+        order = self.session.get(Order, order_id, options=[selectinload(Order.items)])
         if not order:
             QMessageBox.warning(self, "Błąd", "Nie znaleziono zamówienia.")
             return
         
         dlg = AddOrderDialog(self, order_to_edit=order)
-        if dlg.exec_():
-            if self.perfumes_view:
-                self.perfumes_view.reload()  # ZMIANA: użyj reload() zamiast load_perfumes()
-            self.load_orders()
+        dlg.exec_()
     
     def delete_order(self, order_id: int):
         if QMessageBox.question(
@@ -321,14 +237,11 @@ class OrdersView(QWidget):
             return
         
         try:
-            self.session.query(OrderItem).filter_by(order_id=order_id).delete()
-            self.session.query(Order).filter_by(id=order_id).delete()
+            order = self.session.get(Order, order_id)
+            if order is not None:
+                self.session.delete(order)  # pozycje usuwa kaskada Order.items
             self.session.commit()
             
-            if self.perfumes_view:
-                self.perfumes_view.reload()  # ZMIANA: użyj reload() zamiast load_perfumes()
-            self.load_orders()
-            
         except Exception as e:
             self.session.rollback()
             QMessageBox.critical(self, "Błąd", f"Nie udało się usunąć: {e}")
@@ -0,0 +1,96 @@
+# ui/perfume_picker.py
+"""Wspólna lista perfum dla pól wyboru w pozycjach zamówienia.
+
+Wszystkie ``PerfumeCombo`` w oknie korzystają z jednego ``PerfumePickerModel``:
+nowa pozycja nie kopiuje katalogu, a rekord perfum i jego wiersz w modelu są
+odczytem ze słownika po id. Wpisywanie w polu zawęża listę (fragment marki lub
+nazwy, bez rozróżniania wielkości liter).
+"""
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QStandardItemModel, QStandardItem
+from PyQt5.QtWidgets import QComboBox, QCompleter
+
+from models.catalog import catalog
+
+ID_ROLE = Qt.UserRole  # domyślna rola QComboBox.currentData()
+MIN_CONTENTS_LENGTH = 30  # szerokość pola w znakach – bez mierzenia całej listy
+
+
+def load_picker_entries(session, extra_ids=()):
+    """Dostępne perfumy oraz ``extra_ids`` (np. pozycje edytowanego zamówienia), z katalogu."""
+    extra_ids = set(extra_ids)
+    return [e for e in catalog.entries(session) if e.status == "Dostępny" or e.id in extra_ids]
+
+
+class PerfumePickerModel(QStandardItemModel):
+    """Jedna kolumna "marka nazwa" z id w ``ID_ROLE`` i słownikami id → rekord / wiersz."""
+
+    def __init__(self, entries, parent=None):
+        super().__init__(parent)
+        self._entries = {}
+        self._rows = {}
+        items = []
+        for row, entry in enumerate(entries):
+            label = f"{entry.brand} {entry.name}"
+            if entry.status and entry.status != "Dostępny":
+                label += f" ({entry.status.lower()})"
+            item = QStandardItem(label)
+            item.setData(entry.id, ID_ROLE)
+            item.setEditable(False)
+            items.append(item)
+            self._entries[entry.id] = entry
+            self._rows[entry.id] = row
+        if items:
+            self.appendColumn(items)  # jedno wstawienie zamiast sygnału na każdy wiersz
+
+    def entry(self, perfume_id):
+        """Rekord (id, brand, name, price_per_ml, to_decant, status) albo None."""
+        return self._entries.get(perfume_id)
+
+    def row_of(self, perfume_id):
+        return self._rows.get(perfume_id)
+
+    def id_at(self, row):
+        item = self.item(row)
+        return item.data(ID_ROLE) if item is not None else None
+
+    def labels(self):
+        return [self.item(row).text() for row in range(self.rowCount())]
+
+
+class PerfumeCombo(QComboBox):
+    """Pole wyboru perfum na wspólnym modelu, z podpowiedziami podczas pisania."""
+
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.setEditable(True)
+        self.setInsertPolicy(QComboBox.NoInsert)
+        # szerokość z minimalnej liczby znaków – AdjustToContents mierzyłby każdy wpis
+        self.setSizeAdjustPolicy(QComboBox.AdjustToMinimumContentsLengthWithIcon)
+        self.setMinimumContentsLength(MIN_CONTENTS_LENGTH)
+        self.setModel(model)
+        self.view().setUniformItemSizes(True)
+
+        completer = QCompleter(model, self)
+        completer.setCaseSensitivity(Qt.CaseInsensitive)
+        completer.setFilterMode(Qt.MatchContains)
+        completer.setCompletionMode(QCompleter.PopupCompletion)
+        self.setCompleter(completer)
+        # niedokończony tekst nie zmienia wyboru – przywracamy nazwę wybranych perfum
+        self.lineEdit().editingFinished.connect(self._restore_text)
+
+    def perfume_id(self):
+        return self.currentData(ID_ROLE)
+
+    def set_perfume_id(self, perfume_id):
+        """Ustawia perfumy po id; False, gdy nie ma ich na liście."""
+        row = self.model().row_of(perfume_id)
+        if row is None:
+            return False
+        self.setCurrentIndex(row)
+        return True
+
+    def _restore_text(self):
+        if self.currentIndex() >= 0 and self.currentText() != self.itemText(self.currentIndex()):
+            self.setEditText(self.itemText(self.currentIndex()))
@@ -0,0 +1,286 @@
+# ui/perfumes_model.py
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+from PyQt5.QtGui import QColor
+
+from models.catalog import catalog
+from models.note import perfume_ids_with_notes
+from models.search_index import search_perfumes
+
+ID_ROLE = Qt.UserRole + 1    # id perfum dla dowolnej komórki wiersza
+SORT_ROLE = Qt.UserRole + 2  # wartość typowana do sortowania (liczby jako liczby)
+IMAGE_ROLE = Qt.UserRole + 3  # skrót zdjęcia (perfume_images.hash) albo None
+
+COLUMNS = [
+    "Status", "Marka", "Nazwa", "Do odlania", "Pozostało",
+    "Cena/ml", "Zamówień", "Sprzedaż", "Cena zakupu",
+    "Opłaty", "Bilans", "Zdjęcie", "Edytuj", "Usuń",
+]
+COL_THUMB = 11
+COL_EDIT = 12
+COL_DELETE = 13
+
+SPLIT_BG = QColor(210, 234, 255)
+
+
+def _fmt_ml(value):
+    return str(int(value)) if float(value).is_integer() else f"{value:.2f}"
+
+
+class PerfumeRow:
+    """Lekki rekord jednego wiersza tabeli perfum (bez obiektu ORM)."""
+    __slots__ = (
+        "id", "status", "brand", "name", "to_decant", "remaining",
+        "price_per_ml", "orders_cnt", "sales_sum", "purchase_price",
+        "extra", "balance", "is_split", "image_hash",
+    )
+
+    def __init__(self, p):
+        self.id = p.id
+        self.status = p.status or ""
+        self.brand = p.brand or ""
+        self.name = p.name or ""
+        self.to_decant = p.to_decant or 0
+        self.remaining = p.available_ml
+        self.price_per_ml = p.price_per_ml or 0
+        self.orders_cnt = p.order_count or 0
+        self.sales_sum = p.selling_price or 0
+        self.purchase_price = p.purchase_price or 0
+        self.extra = p.extra_costs or 0
+        self.balance = p.balance or 0
+        self.is_split = bool(p.is_split)
+        self.image_hash = p.image_hash
+
+
+def load_perfume_rows(session, perfume_ids=None):
+    """Buduje wiersze tabeli – wszystkie albo tylko dla podanych id.
+
+    Rekordy pochodzą ze wspólnego katalogu (models/catalog.py) – do bazy trafia
+    tylko zapytanie o perfumy zmienione od poprzedniego wczytania.
+    """
+    return [PerfumeRow(entry) for entry in catalog.entries(session, perfume_ids)]
+
+
+def search_perfume_ids(session, search_text, notes_text=""):
+    """Id perfum pasujących do wyszukiwarki, od najlepiej dopasowanych; None = brak filtra.
+
+    ``search_text`` przeszukuje indeks FTS (marka, nazwa, nuty; każde słowo
+    jako prefiks) – kolejność wg bm25. ``notes_text`` to nuty po przecinku,
+    które perfumy muszą mieć wszystkie (indeks perfume_notes); zawęża wynik.
+    """
+    hits = search_perfumes(session, search_text)
+    keywords = [w.strip() for w in notes_text.split(",") if w.strip()]
+    with_notes = perfume_ids_with_notes(session, keywords)
+    if hits is None:
+        return None if with_notes is None else sorted(with_notes)
+    ids = [pid for pid, _ in hits]
+    return ids if with_notes is None else [pid for pid in ids if pid in with_notes]
+
+
+class PerfumesTableModel(QAbstractTableModel):
+    """Model tabeli perfum; zmiany zgłaszane per wiersz, bez przebudowy całości."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+        self._row_by_id = {}
+        self._thumbnails = None
+
+    # ── API Qt ──────────────────────────────────────────────────────────
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        r = self._rows[index.row()]
+        col = index.column()
+
+        if role == Qt.DisplayRole:
+            return self._display(r, col)
+        if role == SORT_ROLE:
+            return self._sort_value(r, col)
+        if role == ID_ROLE:
+            return r.id
+        if role == IMAGE_ROLE:
+            return r.image_hash
+        if role == Qt.DecorationRole and col == COL_THUMB and self._thumbnails is not None:
+            return self._thumbnails.get(r.id, r.image_hash)
+        if role == Qt.ForegroundRole:
+            return self._foreground(r, col)
+        if role == Qt.BackgroundRole and r.is_split and col < COL_THUMB:
+            return SPLIT_BG
+        return None
+
+    @staticmethod
+    def _display(r, col):
+        if col == 0: return r.status
+        if col == 1: return r.brand
+        if col == 2: return r.name
+        if col == 3: return f"{r.to_decant:.2f}"
+        if col == 4: return _fmt_ml(r.remaining)
+        if col == 5: return f"{r.price_per_ml:.2f}"
+        if col == 6: return str(r.orders_cnt)
+        if col == 7: return f"{r.sales_sum:.2f}"
+        if col == 8: return f"{r.purchase_price:.2f}"
+        if col == 9: return f"{r.extra:.2f}"
+        if col == 10: return f"{r.balance:.2f}"
+        return None
+
+    @staticmethod
+    def _sort_value(r, col):
+        if col == 0: return r.status
+        if col == 1: return r.brand.lower()
+        if col == 2: return r.name.lower()
+        if col == 3: return float(r.to_decant)
+        if col == 4: return float(r.remaining)
+        if col == 5: return float(r.price_per_ml)
+        if col == 6: return r.orders_cnt
+        if col == 7: return float(r.sales_sum)
+        if col == 8: return float(r.purchase_price)
+        if col == 9: return float(r.extra)
+        if col == 10: return float(r.balance)
+        return None
+
+    @staticmethod
+    def _foreground(r, col):
+        if col == 0:
+            return QColor("green" if r.status == "Dostępny" else "red")
+        if col == 4:
+            return QColor("green" if r.remaining > 50 else "gold" if r.remaining > 20 else "red")
+        if col == 10 and r.balance:
+            return QColor("green" if r.balance > 0 else "red")
+        return None
+
+    # ── Miniatury ───────────────────────────────────────────────────────
+
+    def set_thumbnails(self, cache):
+        """Pamięć miniatur kolumny "Zdjęcie" (ui.thumbnails.ThumbnailCache)."""
+        self._thumbnails = cache
+        cache.ready.connect(self.notify_image_ready)
+
+    def notify_image_ready(self, perfume_id):
+        """Miniatura gotowa – odświeża ikonę wiersza (tabela i galeria)."""
+        pos = self._row_by_id.get(perfume_id)
+        if pos is not None:
+            self.dataChanged.emit(self.index(pos, 0), self.index(pos, COL_THUMB), [Qt.DecorationRole])
+
+    # ── Aktualizacje ────────────────────────────────────────────────────
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self._rows = list(rows)
+        self._reindex()
+        self.endResetModel()
+
+    def update_rows(self, rows):
+        """Podmienia istniejące wiersze (dataChanged) i dopisuje nowe."""
+        new_rows = []
+        last_col = len(COLUMNS) - 1
+        for row in rows:
+            pos = self._row_by_id.get(row.id)
+            if pos is None:
+                new_rows.append(row)
+                continue
+            self._rows[pos] = row
+            self.dataChanged.emit(self.index(pos, 0), self.index(pos, last_col))
+        if new_rows:
+            start = len(self._rows)
+            self.beginInsertRows(QModelIndex(), start, start + len(new_rows) - 1)
+            self._rows.extend(new_rows)
+            for i, row in enumerate(new_rows, start):
+                self._row_by_id[row.id] = i
+            self.endInsertRows()
+
+    def remove_ids(self, perfume_ids):
+        """Usuwa wiersze podanych id – ciągłe zakresy naraz, indeks przebudowany raz na końcu."""
+        positions = sorted({self._row_by_id[pid] for pid in perfume_ids if pid in self._row_by_id},
+                           reverse=True)
+        if not positions:
+            return
+        # od końca, żeby pozycje pozostałych zakresów się nie przesuwały
+        end = start = positions[0]
+        for pos in positions[1:] + [None]:
+            if pos is not None and pos == start - 1:
+                start = pos
+                continue
+            self.beginRemoveRows(QModelIndex(), start, end)
+            del self._rows[start:end + 1]
+            self.endRemoveRows()
+            end = start = pos
+        self._reindex()
+
+    def row_at(self, row):
+        """PerfumeRow z wiersza ``row`` modelu."""
+        return self._rows[row]
+
+    def row_by_id(self, pid):
+        pos = self._row_by_id.get(pid)
+        return None if pos is None else self._rows[pos]
+
+    def _reindex(self):
+        self._row_by_id = {r.id: i for i, r in enumerate(self._rows)}
+
+
+class PerfumesFilterProxy(QSortFilterProxyModel):
+    """Filtr statusu i wyników wyszukiwania oraz sortowanie po wartościach typowanych.
+
+    Dopóki działa wyszukiwanie, a użytkownik nie wybrał kolumny sortowania,
+    wiersze są ułożone według trafności wyniku (kolejność z ``set_id_filter``).
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._status = "Wszystkie"
+        self._ids = None  # None = bez filtra wyszukiwania, inaczej id → miejsce w wyniku
+        self._user_sort = (-1, Qt.AscendingOrder)  # kolumna wybrana w nagłówku
+        self._by_rank = False
+        self.setSortRole(SORT_ROLE)
+
+    def set_status(self, status: str):
+        self._status = status
+        self.invalidateFilter()
+
+    def set_id_filter(self, perfume_ids):
+        """Pokazuje tylko podane id w podanej kolejności (wynik wyszukiwania); None wyłącza filtr."""
+        self._ids = None if perfume_ids is None else {pid: pos for pos, pid in enumerate(perfume_ids)}
+        self._by_rank = self._user_sort[0] < 0 and self._ids is not None
+        self.invalidateFilter()
+        if self._user_sort[0] < 0:
+            self._apply_sort()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        # wywoływane przez nagłówek tabeli; -1 = bez kolumny (kolejność trafności albo z bazy)
+        self._user_sort = (column, order)
+        self._apply_sort()
+
+    def _apply_sort(self):
+        column, order = self._user_sort
+        self._by_rank = column < 0 and self._ids is not None
+        if self._by_rank:
+            super().sort(0, Qt.AscendingOrder)
+        else:
+            super().sort(column, order)
+
+    def lessThan(self, left, right):
+        if self._by_rank:
+            model = self.sourceModel()
+            last = len(self._ids)
+            return (self._ids.get(model.row_at(left.row()).id, last)
+                    < self._ids.get(model.row_at(right.row()).id, last))
+        return super().lessThan(left, right)
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        r = self.sourceModel().row_at(source_row)
+        if self._status != "Wszystkie" and r.status != self._status:
+            return False
+        return self._ids is None or r.id in self._ids
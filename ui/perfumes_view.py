@@ -1,36 +1,29 @@
 # ui/perfumes_view.py
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
-    QComboBox, QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox,
-    QFileDialog, QAbstractItemView
+    QComboBox, QTableView, QHeaderView, QMessageBox,
+    QFileDialog, QAbstractItemView, QCheckBox, QListView, QStackedWidget
 )
-from PyQt5.QtGui import QFont, QColor
-from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QFont
+from PyQt5.QtCore import Qt, QSize, QTimer
 from datetime import datetime
-from xml.sax.saxutils import escape
-import os
-import base64
-from PyQt5.QtGui import QPixmap
-
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.lib import colors
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-
-from models.database import Session
-from models.perfume import Perfume
-from models.order_item import OrderItem
 
-DECANT_COST = 4.0
-EXPORT_COLUMNS = [
-    ("Marka", "brand"),
-    ("Nazwa", "name"),
-    ("Cena/ml [zł]", "price_per_ml"),
-    ("Pozostało [ml]", "remaining_ml"),
-    ("Link do Fragrantici", "fragrantica_url"),
-]
+from sqlalchemy.exc import IntegrityError
+
+from models.changes import REPORTED, mark_changed
+from models.database import Session, track_action
+from models.perfume import Perfume
+from services.perfume_import import import_perfumes, read_csv_text
+from ui.button_delegate import ButtonDelegate
+from ui.change_bus import change_bus
+from ui.export_dialog import ExportDialog
+from ui.export_job import start_export
+from ui.loader import BackgroundLoader
+from ui.perfumes_model import (
+    PerfumesTableModel, PerfumesFilterProxy, load_perfume_rows, search_perfume_ids,
+    ID_ROLE, IMAGE_ROLE, COL_THUMB, COL_EDIT, COL_DELETE,
+)
+from ui.thumbnails import ThumbnailCache, PerfumeGalleryModel, TABLE_THUMB_SIZE, GALLERY_THUMB_SIZE
 
 
 class PerfumesView(QWidget):
@@ -45,6 +38,7 @@ class PerfumesView(QWidget):
 
         # Filtr statusu i wyszukiwarka nut
         self.filter_status = "Wszystkie"
+        self.search_text = ""
         self.search_notes = ""
 
         root = QVBoxLayout(self)
@@ -58,137 +52,192 @@ class PerfumesView(QWidget):
         pdf_btn = QPushButton("Zapisz do PDF")
         pdf_btn.clicked.connect(self.save_to_pdf)
         top_row.addWidget(pdf_btn)
+
+        export_btn = QPushButton("Eksport CSV/XLSX")
+        export_btn.clicked.connect(lambda: ExportDialog(self, "perfumes").exec_())
+        top_row.addWidget(export_btn)
+        import_btn = QPushButton("Import CSV")
+        import_btn.clicked.connect(self.import_csv)
+        top_row.addWidget(import_btn)
         top_row.addStretch()
+
+        self.gallery_checkbox = QCheckBox("Galeria")
+        self.gallery_checkbox.toggled.connect(self.set_gallery_mode)
+        top_row.addWidget(self.gallery_checkbox)
         root.addLayout(top_row)
 
         # Filtry i wyszukiwarka
         filt_row = QHBoxLayout()
         self.status_combo = QComboBox()
         self.status_combo.addItems(["Wszystkie", "Dostępny", "Niedostępny"])
-        self.status_combo.currentTextChanged.connect(self.reload)
+        self.status_combo.currentTextChanged.connect(self.apply_status_filter)
         filt_row.addWidget(QLabel("Status:"))
         filt_row.addWidget(self.status_combo)
 
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Marka, nazwa, nuty…")
+        self.search_edit.textChanged.connect(self.schedule_search)
+        filt_row.addWidget(QLabel("Szukaj:"))
+        filt_row.addWidget(self.search_edit)
+
         self.notes_edit = QLineEdit()
-        self.notes_edit.setPlaceholderText("Szukaj po nutach…")
-        self.notes_edit.textChanged.connect(self.reload)
+        self.notes_edit.setPlaceholderText("np. wanilia, róża – wszystkie naraz")
+        self.notes_edit.textChanged.connect(self.schedule_search)
         filt_row.addWidget(QLabel("Nuty:"))
         filt_row.addWidget(self.notes_edit)
 
         filt_row.addStretch()
         root.addLayout(filt_row)
 
-        # Tabela
-        self.table = QTableWidget()
-        self.table.setColumnCount(13)
-        self.table.setHorizontalHeaderLabels([
-            "Status", "Marka", "Nazwa", "Do odlania", "Pozostało",
-            "Cena/ml", "Zamówień", "Sprzedaż", "Cena zakupu",
-            "Opłaty", "Bilans", "Edytuj", "Usuń",
-        ])
+        # Tabela (model + proxy filtrujący, przyciski rysowane delegatem)
+        self.model = PerfumesTableModel(self)
+        self.proxy = PerfumesFilterProxy(self)
+        self.proxy.setSourceModel(self.model)
+
+        # Miniatury dekodowane w tle, osobna pamięć dla każdego rozmiaru
+        self.table_thumbs = ThumbnailCache(TABLE_THUMB_SIZE, parent=self)
+        self.model.set_thumbnails(self.table_thumbs)
+        self.gallery_thumbs = ThumbnailCache(GALLERY_THUMB_SIZE, parent=self)
+        self.gallery_thumbs.ready.connect(self.model.notify_image_ready)
+
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(24)
         self.table.setAlternatingRowColors(True)
         self.table.setWordWrap(True)
         self.table.setSortingEnabled(True)
+        self.table.sortByColumn(-1, Qt.AscendingOrder)  # kolejność z bazy do pierwszego kliknięcia
+
+        self.edit_delegate = ButtonDelegate("Edytuj", self.table)
+        self.edit_delegate.clicked.connect(lambda idx: self.edit_perfume(idx.data(ID_ROLE)))
+        self.table.setItemDelegateForColumn(COL_EDIT, self.edit_delegate)
+
+        self.delete_delegate = ButtonDelegate("Usuń", self.table)
+        self.delete_delegate.clicked.connect(lambda idx: self.delete_perfume(idx.data(ID_ROLE)))
+        self.table.setItemDelegateForColumn(COL_DELETE, self.delete_delegate)
+
+        # Kolumna zdjęcia wyświetlana jako pierwsza
+        self.table.setIconSize(TABLE_THUMB_SIZE)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(COL_THUMB, QHeaderView.Fixed)
+        header.resizeSection(COL_THUMB, TABLE_THUMB_SIZE.width() + 16)
+        header.moveSection(COL_THUMB, 0)
 
         # BLOKADA EDYCJI KOMÓREK
         self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
 
-        root.addWidget(self.table)
+        # Galeria – te same (przefiltrowane i posortowane) wiersze jako kafelki
+        self.gallery_model = PerfumeGalleryModel(self.gallery_thumbs, ID_ROLE, IMAGE_ROLE, self)
+        self.gallery_model.setSourceModel(self.proxy)
+        self.gallery = QListView()
+        self.gallery.setModel(self.gallery_model)
+        self.gallery.setViewMode(QListView.IconMode)
+        self.gallery.setIconSize(GALLERY_THUMB_SIZE)
+        self.gallery.setGridSize(QSize(GALLERY_THUMB_SIZE.width() + 40, GALLERY_THUMB_SIZE.height() + 50))
+        self.gallery.setResizeMode(QListView.Adjust)
+        self.gallery.setMovement(QListView.Static)
+        self.gallery.setUniformItemSizes(True)
+        self.gallery.setLayoutMode(QListView.Batched)
+        self.gallery.setBatchSize(200)
+        self.gallery.setWordWrap(True)
+        self.gallery.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.gallery.doubleClicked.connect(lambda idx: self.edit_perfume(idx.data(ID_ROLE)))
+
+        self.stack = QStackedWidget()
+        self.stack.addWidget(self.table)
+        self.stack.addWidget(self.gallery)
+        root.addWidget(self.stack)
         self.setLayout(root)
 
-        self.reload()
-
-    def reload(self):
-        """Filtruje i odświeża tabelę."""
+        # Zapytania list w tle – wiersze tabeli i wyniki wyszukiwarki osobno
+        self.rows_loader = BackgroundLoader(parent=self)
+        self.rows_loader.loaded.connect(self.model.set_rows)
+        self.rows_loader.failed.connect(self._on_load_failed)
+        self.search_loader = BackgroundLoader(parent=self)
+        self.search_loader.loaded.connect(self.proxy.set_id_filter)
+        self.search_loader.failed.connect(self._on_load_failed)
+
+        # zmiany zatwierdzone gdziekolwiek (zamówienia, import, edycja) – tylko te wiersze
+        change_bus().perfumes_changed.connect(self._on_perfumes_changed)
+
+        # pierwsze wczytanie dopiero przy pokazaniu (showEvent), po narysowaniu okna
+        self._load_started = False
+        self._first_load = QTimer(self)
+        self._first_load.setSingleShot(True)
+        self._first_load.timeout.connect(self.reload)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self._load_started and not self._first_load.isActive():
+            self._first_load.start(0)
+
+    def is_loading(self):
+        """True, dopóki pierwsze albo bieżące wczytanie nie dostarczyło wyników."""
+        return not self._load_started or self.rows_loader.is_busy() or self.search_loader.is_busy()
+
+    def set_gallery_mode(self, enabled):
+        """Przełącza między tabelą a galerią kafelków (podwójne kliknięcie = edycja)."""
+        self.stack.setCurrentWidget(self.gallery if enabled else self.table)
+
+    def apply_status_filter(self):
+        """Filtr statusu działa na wczytanych wierszach – bez zapytania."""
         self.filter_status = self.status_combo.currentText()
+        self.proxy.set_status(self.filter_status)
+
+    def schedule_search(self):
+        """Wyszukiwanie (tekst i nuty) w tle, po chwili przerwy w pisaniu."""
+        self._request_search(immediate=False)
+
+    def apply_filters(self):
+        """Stosuje od razu oba filtry (status i wyszukiwarkę)."""
+        self.apply_status_filter()
+        self._request_search(immediate=True)
+
+    def _request_search(self, immediate):
+        self.search_text = self.search_edit.text().strip()
         self.search_notes = self.notes_edit.text().strip().lower()
+        search, notes = self.search_text, self.search_notes
+        self.search_loader.request(lambda s: search_perfume_ids(s, search, notes), immediate)
 
-        q = self.session.query(Perfume)
-        if self.filter_status == "Dostępny":
-            q = q.filter(Perfume.status == "Dostępny")
-        elif self.filter_status == "Niedostępny":
-            q = q.filter(Perfume.status == "Niedostępny")
-        perfumes = q.all()
-
-        if self.search_notes:
-            keywords = [w.strip() for w in self.search_notes.split(",") if w.strip()]
-            def note_match(p: Perfume):
-                text = " ".join([
-                    p.top_notes or "", p.heart_notes or "", p.base_notes or ""
-                ]).lower()
-                return all(k in text for k in keywords)
-            perfumes = list(filter(note_match, perfumes))
-
-        self.table.setRowCount(len(perfumes))
-        for row, p in enumerate(perfumes):
-            # Obliczenia
-            orders = self.session.query(OrderItem).filter_by(perfume_id=p.id).all()
-            used_ml = sum(o.quantity_ml for o in orders)
-            remaining = max((p.to_decant or 0) - used_ml, 0)
-
-            orders_cnt = sum(1 for o in orders if o.price_per_ml > 0)
-            sales_sum = sum(
-                o.quantity_ml * o.price_per_ml for o in orders if o.price_per_ml > 0
-            ) + orders_cnt * DECANT_COST
-            extra = orders_cnt * 3  # koszty dodatkowe
-            balance = sales_sum - (p.purchase_price or 0) - extra
-
-            # Helper do kolorowania
-            def colored_item(text, fg=None):
-                item = QTableWidgetItem(str(text))
-                if fg:
-                    item.setForeground(QColor(fg))
-                return item
-
-            # Wypełnianie wiersza
-            status_col = "green" if p.status == "Dostępny" else "red"
-            self.table.setItem(row, 0, colored_item(p.status, status_col))
-            self.table.setItem(row, 1, QTableWidgetItem(p.brand or ""))
-            self.table.setItem(row, 2, QTableWidgetItem(p.name or ""))
-            self.table.setItem(row, 3, QTableWidgetItem(f"{p.to_decant or 0:.2f}"))
-
-            rem_txt = str(int(remaining)) if float(remaining).is_integer() else f"{remaining:.2f}"
-            rem_col = "green" if remaining > 50 else "gold" if remaining > 20 else "red"
-            self.table.setItem(row, 4, colored_item(rem_txt, rem_col))
-
-            self.table.setItem(row, 5, QTableWidgetItem(f"{p.price_per_ml or 0:.2f}"))
-            self.table.setItem(row, 6, QTableWidgetItem(str(orders_cnt)))
-            self.table.setItem(row, 7, QTableWidgetItem(f"{sales_sum:.2f}"))
-            self.table.setItem(row, 8, QTableWidgetItem(f"{p.purchase_price or 0:.2f}"))
-            self.table.setItem(row, 9, QTableWidgetItem(f"{extra:.2f}"))
-            bal_col = "green" if balance > 0 else "red" if balance < 0 else None
-            self.table.setItem(row, 10, colored_item(f"{balance:.2f}", bal_col))
-
-            # Przyciski Edytuj / Usuń
-            edit_btn = QPushButton("Edytuj")
-            edit_btn.clicked.connect(lambda _, pid=p.id: self.edit_perfume(pid))
-            self.table.setCellWidget(row, 11, edit_btn)
-
-            del_btn = QPushButton("Usuń")
-            del_btn.clicked.connect(lambda _, pid=p.id: self.delete_perfume(pid))
-            self.table.setCellWidget(row, 12, del_btn)
-
-            # Obrazek (jeśli istnieje)
-            # (opcjonalnie można dodać kolumnę z miniaturą na początku)
-
-            # Podświetlenie rozbiórek
-            if getattr(p, "is_split", False):
-                bg = QColor(210, 234, 255)
-                for c in range(self.table.columnCount()):
-                    cell = self.table.item(row, c)
-                    if cell:
-                        cell.setBackground(bg)
+    def reload(self):
+        """Wczytuje w tle wszystkie perfumy od nowa i stosuje bieżące filtry."""
+        self._load_started = True
+        with track_action("Wczytanie perfum"):
+            self.apply_filters()
+            self.rows_loader.request(load_perfume_rows, immediate=True)
+
+    def _on_load_failed(self, message):
+        QMessageBox.warning(self, "Błąd", f"Nie udało się wczytać perfum: {message}")
+
+    def _on_perfumes_changed(self, perfume_ids):
+        if not self._load_started:
+            return  # pierwsze wczytanie i tak zobaczy zmianę
+        if perfume_ids is None:
+            self.reload()
+        else:
+            self.refresh_perfumes(perfume_ids)
+
+    def refresh_perfumes(self, perfume_ids):
+        """Odświeża (lub dopisuje) tylko wskazane wiersze; usuwa te, których już nie ma."""
+        ids = {pid for pid in perfume_ids if pid is not None}
+        if self.rows_loader.is_busy():
+            # trwające wczytywanie mogło nie zobaczyć tej zmiany – zleć je od nowa
+            self.rows_loader.request(load_perfume_rows, immediate=True)
+        elif ids:
+            rows = load_perfume_rows(self.session, ids)
+            self.model.update_rows(rows)
+            self.model.remove_ids(ids - {row.id for row in rows})
 
     def add_perfume(self):
         from ui.add_perfume_dialog import AddPerfumeDialog
         dlg = AddPerfumeDialog(self)
         if dlg.exec_():
             try:
-                self.session.add(Perfume(**dlg.get_data()))
+                perfume = Perfume(**dlg.get_data(self.session))
+                self.session.add(perfume)
                 self.session.commit()
-                self.reload()
             except Exception as e:
                 self.session.rollback()
                 QMessageBox.critical(self, "Błąd", str(e))
@@ -199,12 +248,15 @@ class PerfumesView(QWidget):
         if not p:
             QMessageBox.warning(self, "Błąd", "Nie znaleziono perfum.")
             return
-        dlg = EditPerfumeDialog(p, self)
+        dlg = EditPerfumeDialog(p, self, thumbnails=self.gallery_thumbs)
         if dlg.exec_():
-            for k, v in dlg.get_data().items():
-                setattr(p, k, v)
-            self.session.commit()
-            self.reload()
+            try:
+                for k, v in dlg.get_data(self.session).items():
+                    setattr(p, k, v)
+                self.session.commit()
+            except Exception as e:
+                self.session.rollback()
+                QMessageBox.critical(self, "Błąd", str(e))
 
     def delete_perfume(self, pid: int):
         if QMessageBox.question(
@@ -213,65 +265,47 @@ class PerfumesView(QWidget):
         ) != QMessageBox.Yes:
             return
         try:
-            self.session.query(Perfume).filter_by(id=pid).delete()
+            self.session.query(Perfume).filter_by(id=pid).execution_options(**{REPORTED: True}).delete()
+            mark_changed(self.session, perfume_ids=[pid])
             self.session.commit()
-            self.reload()
+        except IntegrityError:
+            # klucze obce są włączone – historia zamówień nie może wskazywać na nic
+            self.session.rollback()
+            QMessageBox.warning(
+                self, "Usuń perfumy",
+                "Tych perfum nie można usunąć, bo występują w zamówieniach.\n"
+                "Zmień ich status na „Niedostępny”.",
+            )
         except Exception as e:
             self.session.rollback()
             QMessageBox.critical(self, "Błąd", str(e))
 
     def save_to_pdf(self):
-        # Rejestracja fontu
-        font_path = os.path.join(os.path.dirname(__file__), 'DejaVuSans.ttf')
-        if not os.path.isfile(font_path):
-            try:
-                import matplotlib.font_manager as fm
-                for f in fm.findSystemFonts():
-                    if "DejaVuSans" in f:
-                        font_path = f
-                        break
-            except Exception:
-                pass
-        pdfmetrics.registerFont(TTFont('DejaVuSans', font_path))
-
-        today = datetime.now()
-        filename = f"lista_perfum_{today:%Y_%m_%d}.pdf"
+        """Eksport katalogu do PDF w tle – okno postępu pozwala go przerwać."""
+        filename = f"lista_perfum_{datetime.now():%Y_%m_%d}.pdf"
         path, _ = QFileDialog.getSaveFileName(self, "Zapisz listę jako PDF", filename, "PDF Files (*.pdf)")
         if not path:
-            return
-
-        perfumes = self.session.query(Perfume).order_by(Perfume.brand.asc(), Perfume.name.asc()).all()
-        headers = [col[0] for col in EXPORT_COLUMNS]
-        styles = getSampleStyleSheet()
-        cell_style = ParagraphStyle('cell', parent=styles['Normal'], fontName='DejaVuSans', fontSize=10, leading=12)
-
-        data = [headers]
-        for p in perfumes:
-            # obliczenia jak wyżej...
-            used_ml = sum(o.quantity_ml for o in self.session.query(OrderItem).filter_by(perfume_id=p.id))
-            remaining = max((p.to_decant or 0) - used_ml, 0)
-            remaining_str = str(int(remaining)) if float(remaining).is_integer() else f"{remaining:.2f}"
-            row = [
-                Paragraph(escape(p.brand or ""), cell_style),
-                Paragraph(escape(p.name or ""), cell_style),
-                Paragraph(f"{p.price_per_ml or 0:.2f}", cell_style),
-                Paragraph(remaining_str, cell_style),
-                Paragraph(escape(p.fragrantica_url or ""), cell_style),
-            ]
-            data.append(row)
-
-        col_widths = [90, 170, 85, 90, 210]
-        table_style = TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'DejaVuSans'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('GRID', (0, 0), (-1, -1), 0.3, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.whitesmoke, colors.lightgrey]),
-        ])
-
-        doc = SimpleDocTemplate(path, pagesize=landscape(A4), title="Lista perfum")
-        elements = [Paragraph("Lista perfum", styles["Title"]), Spacer(1, 12), Table(data, colWidths=col_widths, repeatRows=1, style=table_style)]
-        doc.build(elements)
-
-        QMessageBox.information(self, "Eksport zakończony", f"PDF zapisany do:\n{path}")
+            return None
+        from services.pdf_export import write_catalog_pdf  # reportlab dopiero przy eksporcie
+        with track_action("Eksport PDF"):
+            return start_export(self, write_catalog_pdf, path, "Zapisywanie listy perfum do PDF…")
+
+    def import_csv(self):
+        """Hurtowy import katalogu z CSV; raport z listą pominiętych wierszy."""
+        path, _ = QFileDialog.getOpenFileName(self, "Import perfum z CSV", "", "CSV (*.csv)")
+        if not path:
+            return None
+        try:
+            with track_action("Import perfum"):
+                report = import_perfumes(self.session, read_csv_text(path))
+        except Exception as e:
+            QMessageBox.critical(self, "Błąd importu", str(e))
+            return None
+        self.session.expire_all()  # zapis hurtowy omija obiekty w sesji; wiersze odświeży szyna zmian
+
+        box = QMessageBox(QMessageBox.Warning if report.errors else QMessageBox.Information,
+                          "Import zakończony", report.summary(), QMessageBox.Ok, self)
+        if report.errors:
+            box.setDetailedText("\n".join(f"linia {line_no}: {message}" for line_no, message in report.errors))
+        box.exec_()
+        return report
@@ -0,0 +1,32 @@
+# ui/query_status.py
+"""Pasek stanu z liczbą i czasem zapytań ostatnich akcji (tryb diagnostyczny)."""
+
+from PyQt5.QtCore import pyqtSignal
+from PyQt5.QtWidgets import QStatusBar, QLabel
+
+from models.database import add_action_listener, remove_action_listener
+
+
+class QueryStatusBar(QStatusBar):
+    """Pokazuje podsumowanie każdej zakończonej akcji (``track_action``)."""
+
+    # akcja może się zakończyć w wątku roboczym – sygnał przenosi ją do wątku GUI
+    action_finished = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.summary_label = QLabel("Brak akcji z zapytaniami.")
+        self.addWidget(self.summary_label, 1)
+        self.action_finished.connect(self._show)
+        add_action_listener(self._notify)
+        self.destroyed.connect(lambda: remove_action_listener(self._notify))
+
+    def _notify(self, stats):
+        try:
+            self.action_finished.emit(stats)
+        except RuntimeError:
+            remove_action_listener(self._notify)  # pasek już zamknięty
+
+    def _show(self, stats):
+        self.summary_label.setText(stats.summary())
+        self.summary_label.setStyleSheet("color: #b00020;" if stats.slow_queries else "")
@@ -1,24 +1,40 @@
 # ui/rozbiorki_view.py
 
-from PyQt5.QtWidgets import QWidget, QTabWidget, QVBoxLayout
+from PyQt5.QtWidgets import QWidget, QVBoxLayout
+
+from ui.lazy_tabs import LazyTabWidget
+
+
+# Widoki importowane dopiero przy pierwszym otwarciu zakładki – krótszy start
+def _perfumes_view():
+    from ui.perfumes_view import PerfumesView
+    return PerfumesView()
+
+
+def _orders_view():
+    from ui.orders_view import OrdersView
+    return OrdersView()
 
-from ui.perfumes_view import PerfumesView
-from ui.orders_view import OrdersView
 
 class rozbiorkaView(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
-        
+
         layout = QVBoxLayout(self)
-        
-        # Podział na dwie zakładki: Perfumy i Zamówienia
-        sub_tabs = QTabWidget()
-        
-        self.perfumes_view = PerfumesView()
-        self.orders_view = OrdersView(self.perfumes_view)
-        
-        sub_tabs.addTab(self.perfumes_view, "Perfumy")
-        sub_tabs.addTab(self.orders_view, "Zamówienia")
-        
+
+        # Podział na dwie zakładki: Perfumy i Zamówienia – każda budowana przy pierwszym otwarciu
+        sub_tabs = LazyTabWidget()
+
+        self._perfumes_page = sub_tabs.add_lazy_tab(_perfumes_view, "Perfumy")
+        self._orders_page = sub_tabs.add_lazy_tab(_orders_view, "Zamówienia")
+
         layout.addWidget(sub_tabs)
         self.setLayout(layout)
+
+    @property
+    def perfumes_view(self):
+        return self._perfumes_page.ensure_view()
+
+    @property
+    def orders_view(self):
+        return self._orders_page.ensure_view()
@@ -0,0 +1,54 @@
+# ui/startup.py
+"""Raport czasu zimnego startu w dzienniku zapytań (``organizer_queries.log``).
+
+``main.py`` zaznacza kolejne etapy (``lap``): import modułów, przygotowanie
+aplikacji i bazy, budowę i pokazanie okna. Pierwsze wczytanie danych to
+pierwsza akcja z ``FIRST_LOAD_ACTIONS`` zakończona po pokazaniu okna; raport
+rozdziela czas do jej rozpoczęcia (rysowanie okna) i czas samego wczytania.
+"""
+
+import threading
+import time
+
+from models.database import add_action_listener, query_log, remove_action_listener
+
+FIRST_LOAD_ACTIONS = ("Wczytanie perfum", "Wczytanie zamówień")
+
+
+class StartupTimer:
+    def __init__(self, started):
+        self._started = started
+        self._last = started
+        self._lock = threading.Lock()
+        self._reported = False
+        self.stages = []  # (etap, sekundy)
+
+    def lap(self, stage):
+        """Zamyka etap trwający od poprzedniego wywołania (albo od startu procesu)."""
+        now = time.perf_counter()
+        self.stages.append((stage, now - self._last))
+        self._last = now
+
+    def wait_for_first_load(self):
+        """Raport zostanie zapisany po pierwszym wczytaniu danych (wywołać po show())."""
+        add_action_listener(self._on_action_finished)
+
+    def _on_action_finished(self, stats):
+        # słuchacz może być wywołany z wątku roboczego
+        if stats.name not in FIRST_LOAD_ACTIONS:
+            return
+        with self._lock:
+            if self._reported:
+                return
+            self._reported = True
+        remove_action_listener(self._on_action_finished)
+        self.stages.append(("do pierwszego wczytania", stats.started - self._last))
+        self.stages.append((f"pierwsze wczytanie ({stats.name}, {stats.queries} zapytań)",
+                            stats.wall_seconds))
+        query_log.info(self.summary())
+
+    def summary(self):
+        total = sum(seconds for _, seconds in self.stages)
+        return "Start aplikacji: " + ", ".join(
+            f"{stage} {seconds:.3f} s" for stage, seconds in self.stages
+        ) + f"; razem {total:.3f} s"
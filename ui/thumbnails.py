@@ -0,0 +1,137 @@
+# ui/thumbnails.py
+"""Miniatury zdjęć perfum.
+
+Obraz jest wczytywany z ``perfume_images``, dekodowany i skalowany w wątku
+roboczym (``QImage`` jest bezpieczny poza wątkiem GUI). Gotowe pixmapy trzyma
+ograniczona pamięć podręczna LRU z kluczem (id perfum, skrót obrazu) – po
+zmianie zdjęcia skrót się zmienia, a stara miniatura po prostu wypada.
+"""
+
+from collections import OrderedDict
+
+from PyQt5.QtCore import (
+    Qt, QObject, QRunnable, QThreadPool, QSize, QBuffer, QByteArray,
+    QIdentityProxyModel, pyqtSignal,
+)
+from PyQt5.QtGui import QImage, QImageReader, QPixmap
+
+from models.database import SessionFactory
+from models.image import load_image
+
+TABLE_THUMB_SIZE = QSize(24, 24)
+GALLERY_THUMB_SIZE = QSize(120, 150)
+DIALOG_THUMB_SIZE = QSize(100, 130)  # podgląd w oknach dodawania/edycji perfum
+CACHE_CAPACITY = 600
+
+_decode_pool = None
+
+
+def decode_pool():
+    """Osobna, mała pula – dekodowanie nie blokuje wczytywania list."""
+    global _decode_pool
+    if _decode_pool is None:
+        _decode_pool = QThreadPool()
+        _decode_pool.setMaxThreadCount(2)
+    return _decode_pool
+
+
+def decode_thumbnail(data: bytes, size: QSize) -> QImage:
+    """Dekoduje od razu w zmniejszonym rozmiarze (JPEG nie rozwija pełnej rozdzielczości)."""
+    buffer = QBuffer()
+    buffer.setData(QByteArray(data))
+    buffer.open(QBuffer.ReadOnly)
+    reader = QImageReader(buffer)
+    full = reader.size()
+    if full.isValid():
+        reader.setScaledSize(full.scaled(size, Qt.KeepAspectRatio))
+    image = reader.read()
+    if not image.isNull() and (image.width() > size.width() or image.height() > size.height()):
+        image = image.scaled(size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    return image
+
+
+class _DecodeSignals(QObject):
+    decoded = pyqtSignal(object, QImage)  # klucz (id, skrót), miniatura
+
+
+class _DecodeJob(QRunnable):
+    def __init__(self, key, size, signals):
+        super().__init__()
+        self._key = key
+        self._size = size
+        self._signals = signals
+
+    def run(self):
+        session = SessionFactory()
+        try:
+            data = load_image(session, self._key[1])
+        except Exception:
+            data = None
+        finally:
+            session.close()
+        image = decode_thumbnail(data, self._size) if data else QImage()
+        try:
+            self._signals.decoded.emit(self._key, image)
+        except RuntimeError:
+            pass  # widok z pamięcią miniatur został już zamknięty
+
+
+class ThumbnailCache(QObject):
+    """Pamięć podręczna LRU miniatur jednego rozmiaru."""
+
+    ready = pyqtSignal(int)  # id perfum, których miniatura jest już dostępna
+
+    def __init__(self, size: QSize, capacity=CACHE_CAPACITY, parent=None):
+        super().__init__(parent)
+        self.size = size
+        self._capacity = capacity
+        self._pixmaps = OrderedDict()  # (id, skrót) → QPixmap (pusta = brak obrazu)
+        self._pending = set()
+        self._signals = _DecodeSignals(self)
+        self._signals.decoded.connect(self._on_decoded)
+
+    def get(self, perfume_id, digest):
+        """Miniatura z pamięci albo None – wtedy zleca dekodowanie w tle."""
+        if not digest:
+            return None
+        key = (perfume_id, digest)
+        pixmap = self._pixmaps.get(key)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(key)
+            return None if pixmap.isNull() else pixmap
+        if key not in self._pending:
+            self._pending.add(key)
+            decode_pool().start(_DecodeJob(key, self.size, self._signals))
+        return None
+
+    def _on_decoded(self, key, image):
+        self._pending.discard(key)
+        self._pixmaps[key] = QPixmap.fromImage(image)
+        self._pixmaps.move_to_end(key)
+        while len(self._pixmaps) > self._capacity:
+            self._pixmaps.popitem(last=False)
+        self.ready.emit(key[0])
+
+
+class PerfumeGalleryModel(QIdentityProxyModel):
+    """Widok kafelków: marka i nazwa jako podpis, duża miniatura jako ikona."""
+
+    def __init__(self, thumbnails: ThumbnailCache, id_role, image_role, parent=None):
+        super().__init__(parent)
+        self._thumbnails = thumbnails
+        self._id_role = id_role
+        self._image_role = image_role
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        src = self.mapToSource(index)
+        if role == Qt.DisplayRole:
+            brand = src.sibling(src.row(), 1).data()
+            name = src.sibling(src.row(), 2).data()
+            return f"{brand}\n{name}"
+        if role == Qt.DecorationRole:
+            return self._thumbnails.get(src.data(self._id_role), src.data(self._image_role))
+        if role == Qt.ForegroundRole:
+            return None
+        return super().data(index, role)